@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+import benchmark
+from benchmark import OPERATIONS, run_benchmark
+from store import SampleStore, cpu_flags
+from wire import compute_time
+
+# OPENSSL_ia32cap bits that turn an extension off: (/proc/cpuinfo flag, mask of the first word = CPUID.1:EDX|ECX,
+# mask of the second word = CPUID.7.0:EBX|ECX). See the OPENSSL_ia32cap manual page.
+CPU_FEATURES = {
+    "avx2": ("avx2", 0, 1 << 5),
+    "avx512": ("avx512f", 0, (1 << 16) | (1 << 17) | (1 << 21) | (1 << 28) | (1 << 30) | (1 << 31)),
+    "sha": ("sha_ni", 0, 1 << 29),
+}
+
+# Features turned off by each configuration. AVX-512 code paths also rely on AVX2, so both go together.
+ABLATIONS = {
+    "baseline": [],
+    "no_avx512": ["avx512"],
+    "no_avx2": ["avx2", "avx512"],
+    "no_sha": ["sha"],
+    "no_simd": ["avx2", "avx512", "sha"],
+}
+
+
+def ia32cap(features: list) -> str:
+    # OPENSSL_ia32cap value that clears the given features from the capability vector detected by libcrypto
+    first = second = 0
+    for feature in features:
+        _, mask_first, mask_second = CPU_FEATURES[feature]
+        first, second = first | mask_first, second | mask_second
+    return f"~{first:#x}:~{second:#x}"
+
+
+def host_features() -> dict:
+    flags = cpu_flags()
+    return {feature: flag in flags for feature, (flag, _, _) in CPU_FEATURES.items()}
+
+
+def _run_configuration(job_path: str):
+    # Child side: one whole suite, with OPENSSL_ia32cap already in the environment
+    with open(job_path, 'r') as f:
+        job = json.load(f)
+    benchmark.openssl_path, benchmark.libcrypto_path, benchmark.provider_path = job['paths']
+    store = SampleStore(resume=job['resume']) if job['store'] else None
+
+    results = {}
+    for test, algorithms in job['algorithms'].items():
+        message = bytes.fromhex(job['message']) if test == "SIGNATURE" else None
+        results[test] = run_benchmark(algorithms, test=test, message=message, backend=job['backend'], store=store)
+
+    with open(job_path, 'w') as f:
+        json.dump(results, f)
+
+
+def speedups(results: dict) -> dict:
+    # Time with the features turned off over the baseline time: how much each operation gains from them
+    table = {}
+    for test, algorithms in results.get("baseline", {}).items():
+        for algorithm, baseline in algorithms.items():
+            for operation in OPERATIONS[test]:
+                reference = compute_time(baseline, operation)
+                if not reference:
+                    continue
+                for configuration, suite in results.items():
+                    measured = suite.get(test, {}).get(algorithm)
+                    if configuration == "baseline" or not measured or not compute_time(measured, operation):
+                        continue
+                    table.setdefault(test, {}).setdefault(algorithm, {}).setdefault(operation, {})[configuration] = \
+                        round(compute_time(measured, operation) / reference, 3)
+    return table
+
+
+def print_speedups(table: dict, configurations: list):
+    for test, algorithms in table.items():
+        print(f"\n{test} - slowdown without the CPU features (time / baseline time)")
+        print(f"{'algorithm':<24} {'operation':<15} " + " ".join(f"{c:>10}" for c in configurations))
+        for algorithm, operations in algorithms.items():
+            for operation, ratios in operations.items():
+                print(f"{algorithm:<24} {operation:<15} "
+                      + " ".join(f"{ratios[c]:>9.2f}x" if c in ratios else f"{'-':>10}" for c in configurations))
+
+
+def run_ablation(algorithms: dict, message: bytes, backend: str = "cli", ablations: dict | None = None,
+                 store: bool = True, resume: bool = True) -> dict:
+    # Reruns the KEM and signature suites once per configuration, with OPENSSL_ia32cap masking the
+    # configuration's features. libcrypto reads the variable once, when it is loaded: every configuration runs
+    # in a fresh interpreter (and, with the CLI backend, every openssl process inherits it).
+    # Only OpenSSL's own code paths are affected: liboqs dispatches on the CPU by itself, so the PQC
+    # algorithms change only through the primitives they take from OpenSSL (e.g. SHA-2 for SPHINCS+).
+    ablations = ablations or ABLATIONS
+    features = host_features()
+    print(f"CPU features: {', '.join(f'{f}={features[f]}' for f in features)}")
+    if platform.machine().lower() not in ("x86_64", "amd64", "i386", "i686"):
+        print(f"OPENSSL_ia32cap has no effect on {platform.machine()}: no ablation.")
+        return {}
+
+    report = {'host': features, 'configurations': {}, 'results': {}}
+    for configuration, disabled in ablations.items():
+        if disabled and not any(features[feature] for feature in disabled):
+            print(f"Skipping '{configuration}': the CPU has none of {', '.join(disabled)}.")
+            continue
+
+        env = dict(os.environ)
+        env.pop("OPENSSL_ia32cap", None)
+        if disabled:
+            env["OPENSSL_ia32cap"] = ia32cap(disabled)
+        report['configurations'][configuration] = {'disabled': disabled, 'ia32cap': env.get("OPENSSL_ia32cap")}
+        print(f"\nConfiguration '{configuration}' (OPENSSL_ia32cap={env.get('OPENSSL_ia32cap', 'unset')})")
+
+        fd, job_path = tempfile.mkstemp(prefix="pqc_ablation_", suffix=".json")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'algorithms': algorithms, 'message': message.hex(), 'backend': backend,
+                           'store': store, 'resume': resume,
+                           'paths': [benchmark.openssl_path, benchmark.libcrypto_path, benchmark.provider_path]}, f)
+            subprocess.run([sys.executable, os.path.abspath(__file__), job_path], env=env, check=True)
+            with open(job_path, 'r') as f:
+                report['results'][configuration] = json.load(f)
+        except (subprocess.CalledProcessError, OSError, ValueError) as e:
+            print(f"Error in configuration '{configuration}': {e}")
+            logging.error(f"Error in ablation configuration '{configuration}': \n{e}")
+        finally:
+            os.remove(job_path)
+
+    report['speedup'] = speedups(report['results'])
+    print_speedups(report['speedup'], [c for c in report['results'] if c != "baseline"])
+    return report
+
+
+if __name__ == "__main__":
+    _run_configuration(sys.argv[1])
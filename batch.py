@@ -0,0 +1,79 @@
+import itertools
+import logging
+import os
+import statistics
+import subprocess
+import time
+
+from benchmark import get_backend, LibCryptoError
+from timing import summarize, timed
+
+
+def run_batch_verification(algorithms, backend: str = "libcrypto", batch_size: int = 1000, num_keys: int = 4,
+                           unique_signatures: int = 64, message_size: int = 64, parse_iterations: int = 100) -> dict:
+    # Verifiers check many signatures against a handful of public keys: each public key is parsed once and
+    # then verifies a batch of `batch_size` (message, signature) pairs. Key parsing and verification are
+    # reported separately, together with what reloading the key for every signature (as sig_benchmark does
+    # with `openssl dgst`) would cost instead.
+    impl = get_backend(backend)
+    results = {}
+
+    for category in ['classical', 'pqc']:
+        for algo in algorithms[category]:
+            algorithm = algo['name']
+            key_size = algo.get('key') if category == "classical" else None
+            print(f"Algorithm - {algorithm.upper()} (batch verification, {num_keys} keys x {batch_size} signatures)")
+
+            try:
+                # Untimed preparation. Signing is the slow side for SPHINCS+, so the batch cycles through
+                # `unique_signatures` pairs per key: a verification costs the same whether or not it was seen before.
+                batches = []
+                for _ in range(num_keys):
+                    key = impl.generate_key(algorithm, key_size, "SIGNATURE")
+                    pairs = []
+                    for _ in range(min(unique_signatures, batch_size)):
+                        message = os.urandom(message_size)
+                        pairs.append((message, impl.sign(algorithm, key, message)))
+                    batches.append((impl.export_key(key)[1], pairs))
+                    impl.release_key(key)
+
+                verifications = []
+                start = time.perf_counter_ns()
+                for public_pem, pairs in batches:
+                    public = impl.load_public_key(algorithm, public_pem)
+                    for message, signature in itertools.islice(itertools.cycle(pairs), batch_size):
+                        valid, elapsed = timed(impl.verify, algorithm, public, message, signature)
+                        if not valid:
+                            raise RuntimeError(f"Batch verification of a valid {algorithm.upper()} signature failed.")
+                        verifications.append(elapsed)
+                    impl.release_key(public)
+                total = (time.perf_counter_ns() - start) / 1e9
+
+                parsing = []
+                for public_pem, _ in itertools.islice(itertools.cycle(batches), parse_iterations):
+                    public, elapsed = timed(impl.load_public_key, algorithm, public_pem)
+                    parsing.append(elapsed)
+                    impl.release_key(public)
+            except (RuntimeError, LibCryptoError, subprocess.CalledProcessError, OSError) as e:
+                print(f"Error in batch verification for {algorithm.upper()}: {e}")
+                logging.error(f"Error in batch verification for {algorithm.upper()}: \n{e}")
+                continue
+
+            parse_time = statistics.median(parsing) / 1e9
+            verify_time = statistics.median(verifications) / 1e9
+            amortized = parse_time / batch_size
+            results[algorithm] = {
+                'backend': backend,
+                'keys': num_keys,
+                'batch_size': batch_size,
+                'ops_per_sec': round(len(verifications) / total, 3),
+                'key_parsing': summarize(parsing),
+                'verification': summarize(verifications),
+                'amortized_parsing_per_verification': round(amortized, 9),
+                'reload_per_verification': round(parse_time + verify_time, 9),
+                'reuse_speedup': round((parse_time + verify_time) / (verify_time + amortized), 3)
+            }
+            print(f"  {results[algorithm]['ops_per_sec']:12.1f} verifications/s, key parsing "
+                  f"{parse_time * 1e6:.1f} us ({amortized * 1e9:.1f} ns amortized), "
+                  f"reuse speedup x{results[algorithm]['reuse_speedup']:.2f}")
+    return results
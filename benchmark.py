@@ -1,16 +1,24 @@
 import subprocess
+import itertools
+from functools import partial
 import json
 import os
 import statistics
 import sys
-import time
-from tqdm import tqdm
-import matplotlib.pyplot as plt
 import logging
 
-from cryptography.hazmat.primitives.asymmetric import rsa, ec, padding
+from cryptography.hazmat.primitives.asymmetric import rsa, ec, padding, utils
 from cryptography.hazmat.primitives import hashes, serialization
 
+from libcrypto import load_libcrypto, LibCryptoError
+from timing import sample, summarize, timed, TIMING
+from keystore import KeyStore, key_pool
+from store import SampleStore, environment
+from resources import children, measured, run_process, summarize_memory
+from wire import wire_sizes
+from registry import family, rsa_bits, ALL_OPERATIONS, OPERATIONS
+from hostenv import controlled, host_fingerprint, measure_quietly, print_host, with_baseline
+
 debug = {
     "first": True
 }
@@ -29,9 +37,44 @@ except Exception as e:
 
 openssl_path = "/opt/openssl-3.3.2/bin/openssl"
 provider_path = "/opt/openssl-3.3.2/lib64/ossl-modules"
+libcrypto_path = "/opt/openssl-3.3.2/lib64/libcrypto.so.3"
 tmp = "./tmp"
 
-ciphertext_path = f"{tmp}/ciphertext.bin"
+# "all": key generation and operations with the fresh key, "keygen": key generation only,
+# "ops": operations only, drawing keys from a pool of pre-generated keys (see keystore.py)
+PHASES = ("all", "keygen", "ops")
+
+
+def memfd(name: str, data: bytes) -> int:
+    # Anonymous in-memory file, handed to `openssl` as /dev/fd/<fd>: nothing ever touches the disk
+    fd = os.memfd_create(name, os.MFD_CLOEXEC)
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+    return fd
+
+
+def fd_path(fd: int) -> str:
+    return f"/dev/fd/{fd}"
+
+
+CHUNK_SIZE = 1 << 20
+
+
+def file_chunks(path: str, chunk_size: int = CHUNK_SIZE):
+    # Large messages are streamed through one reused buffer, never loaded whole into memory
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while n := f.readinto(buffer):
+            yield view[:n]
+
+
+def file_digest(path: str):
+    digest = hashes.Hash(hashes.SHA256())
+    for chunk in file_chunks(path):
+        digest.update(chunk)
+    return digest.finalize()
 
 
 def cleanup_files(files: list | str):
@@ -59,328 +102,741 @@ def cleanup_files(files: list | str):
         logging.error("Error: cleanup_files() called with unsupported argument.")
 
 
+def provider_args(algorithm: str | None = None, pqc: bool = False) -> list:
+    # oqsprovider and default provider arguments of `openssl` for a PQC algorithm, or unconditionally with
+    # pqc=True (listings, chains mixing classical and PQC keys)
+    if not pqc and (algorithm is None or family(algorithm) != "pqc"):
+        return []
+    return ['-provider', 'oqsprovider', '-provider', 'default', '-provider-path', provider_path]
+
+
 def generate_key(algorithm: str, key_size: int | None) -> dict:
+    # Keys are exchanged with `openssl` through pipes: the private key is read from the stdout of
+    # `genpkey` and fed to `pkey -pubout` on its stdin
     try:
-        cleanup_files(["private_key.pem", "public_key.pem"])
-
         logging.info(f"Key generation for algorithm {algorithm.upper()} started.") if debug["first"] else None
 
         if algorithm == "ecdh":
-            # Generate private key
-            result = subprocess.run([
+            command = [
                 openssl_path, "genpkey",
                 "-algorithm", "EC",
-                "-pkeyopt", "ec_paramgen_curve:prime256v1",
-                "-out", f"{tmp}/private_key.pem"
-            ], capture_output=True, text=True, check=True)
-            logging.debug(f"  > COMMAND: {' '.join(result.args)}") if debug["first"] else None
-            logging.debug(f"  > Private Key {algorithm.upper()} generated successfully.") if debug["first"] else None
-
-            # Generate public key
-            result = subprocess.run([
-                openssl_path, "pkey",
-                "-in", f"{tmp}/private_key.pem",
-                "-pubout",
-                "-out", f"{tmp}/public_key.pem"
-            ], capture_output=True, text=True, check=True)
-
-            logging.debug(f"  > COMMAND: {' '.join(result.args)}") if debug["first"] else None
-            logging.debug(f"  > Public Key {algorithm.upper()} generated successfully.\n") if debug["first"] else None
-
-        elif "rsa" in algorithm:
-            # Generate private key
-            result = subprocess.run([
+                "-pkeyopt", "ec_paramgen_curve:prime256v1"
+            ]
+        elif family(algorithm) == "rsa":
+            command = [
                 openssl_path, "genpkey",
                 "-algorithm", "RSA",
-                "-pkeyopt", f"rsa_keygen_bits:{key_size}",
-                "-out", f"{tmp}/private_key.pem"
-            ], capture_output=True, text=True, check=True)
-            logging.debug(f"  > COMMAND: {' '.join(result.args)}") if debug["first"] else None
-            logging.debug(f"  > Private Key {algorithm.upper()} generated successfully.") if debug["first"] else None
-
-            # Generate public key
-            result = subprocess.run([
-                openssl_path, "pkey",
-                "-in", f"{tmp}/private_key.pem",
-                "-pubout",
-                "-out", f"{tmp}/public_key.pem"
-            ], capture_output=True, text=True, check=True)
-            logging.debug(f"  > COMMAND: {' '.join(result.args)}") if debug["first"] else None
-            logging.debug(f"  > Public Key {algorithm.upper()} generated successfully.\n") if debug["first"] else None
-
+                "-pkeyopt", f"rsa_keygen_bits:{key_size or rsa_bits(algorithm)}"
+            ]
         else:
-            # Generate private key
-            result = subprocess.run([
+            command = [
                 openssl_path, 'genpkey',
-                '-out', f'{tmp}/private_key.pem',
                 '-algorithm', algorithm,
                 '-provider', 'default',
                 '-provider', 'oqsprovider',
                 '-provider-path', provider_path
-            ], capture_output=True, text=True, check=True)
-            logging.debug(f"  > COMMAND: {' '.join(result.args)}") if debug["first"] else None
-            logging.debug(f"  > Private Key {algorithm.upper()} generated successfully.") if debug["first"] else None
-
-            # Generate public key
-            result = subprocess.run([
-                openssl_path, 'pkey',
-                '-in', f'{tmp}/private_key.pem',
-                '-pubout',
-                '-out', f'{tmp}/public_key.pem',
-                '-provider', 'oqsprovider',
-                '-provider', 'default',
-                '-provider-path', provider_path
-            ], capture_output=True, text=True, check=True)
-            logging.debug(f"  > COMMAND: {' '.join(result.args)}") if debug["first"] else None
-            logging.debug(f"  > Public Key {algorithm.upper()} generated successfully.\n") if debug["first"] else None
-
-        private_size = os.path.getsize(f'{tmp}/private_key.pem')
-        public_size = os.path.getsize(f'{tmp}/public_key.pem')
-
-        return {'private_size': private_size, 'public_size': public_size}
+            ]
+
+        # Generate private key
+        result = run_process(command)
+        private_pem = result.stdout
+        logging.debug(f"  > COMMAND: {' '.join(result.args)}") if debug["first"] else None
+        logging.debug(f"  > Private Key {algorithm.upper()} generated successfully.") if debug["first"] else None
+
+        # Generate public key
+        result = run_process([openssl_path, "pkey", "-pubout"] + provider_args(algorithm), data=private_pem)
+        public_pem = result.stdout
+        logging.debug(f"  > COMMAND: {' '.join(result.args)}") if debug["first"] else None
+        logging.debug(f"  > Public Key {algorithm.upper()} generated successfully.\n") if debug["first"] else None
+
+        return {
+            'private_pem': private_pem,
+            'public_pem': public_pem,
+            'private_size': len(private_pem),
+            'public_size': len(public_pem)
+        }
     except subprocess.CalledProcessError as e:
-        print(f"Error in key generation for {algorithm.upper()}: {e.stderr}")
-        logging.error(f"Error in key generation for {algorithm.upper()}: \n{e.stderr}")
+        print(f"Error in key generation for {algorithm.upper()}: {e.stderr.decode(errors='replace')}")
+        logging.error(f"Error in key generation for {algorithm.upper()}: \n{e.stderr.decode(errors='replace')}")
         return {}
 
 
-def kem_benchmark(algorithm: str, key_size: int | None, num_iterations: int = 100) -> dict:
-    print(" > Starting KEM benchmark...")
-    logging.info("\nStarting KEM benchmark...")
-
-    keygen_times, encap_times, decap_times = [], [], []
+class CliBackend:
+    # One `openssl` process per operation. Keys live in memfd files passed as /dev/fd/<fd>, data and
+    # outputs go through stdin/stdout, so no file is created or deleted while measuring.
+    # Classical signatures are produced with `cryptography`, as they always have been.
+    name = "cli"
+
+    def __init__(self):
+        self._kem_support = None
+        self._version = None
+
+    def version(self) -> str:
+        # OpenSSL binary and oqsprovider versions, e.g. "OpenSSL 3.3.2 3 Sep 2024; oqsprovider 0.7.0"
+        if self._version is None:
+            openssl = subprocess.run([openssl_path, "version"], capture_output=True, text=True).stdout.strip()
+            providers = subprocess.run([openssl_path, "list", "-providers"] + provider_args(pqc=True),
+                                       capture_output=True, text=True).stdout
+
+            provider, oqs_version = None, "n/a"
+            for line in providers.splitlines():
+                if line.startswith("  ") and not line.startswith("    "):
+                    provider = line.strip()
+                elif provider == "oqsprovider" and line.strip().startswith("version:"):
+                    oqs_version = line.split(":", 1)[1].strip()
+            self._version = f"{openssl}; oqsprovider {oqs_version}"
+        return self._version
+
+    def _classical_signature(self, algorithm: str, test: str) -> bool:
+        return test == "SIGNATURE" and family(algorithm) != "pqc"
+
+    def generate_key(self, algorithm: str, key_size: int | None, test: str = "KEM"):
+        if self._classical_signature(algorithm, test):
+            if algorithm == "ecdsa":
+                private_key = ec.generate_private_key(ec.SECP256R1())
+            else:
+                # rsa<bits> carries its size in the name when none is given
+                private_key = rsa.generate_private_key(public_exponent=65537,
+                                                       key_size=key_size or rsa_bits(algorithm))
+            return {"private": private_key, "public": private_key.public_key()}
+
+        key = generate_key(algorithm, key_size)
+        if not key:
+            raise RuntimeError(f"Key generation for {algorithm.upper()} failed.")
+        key["private_fd"] = memfd("private_key.pem", key["private_pem"])
+        key["public_fd"] = memfd("public_key.pem", key["public_pem"])
+        return key
+
+    def export_key(self, key) -> tuple[bytes, bytes]:
+        if "private_pem" in key:
+            return key["private_pem"], key["public_pem"]
+        return (
+            key["private"].private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption()
+            ),
+            key["public"].public_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo
+            )
+        )
 
-    key_sizes = generate_key(algorithm, key_size)
-    if not key_sizes:
-        return {}
+    def import_key(self, algorithm: str, private_pem: bytes, public_pem: bytes, test: str = "KEM"):
+        if self._classical_signature(algorithm, test):
+            private_key = serialization.load_pem_private_key(private_pem, password=None)
+            return {"private": private_key, "public": private_key.public_key()}
+
+        return {
+            'private_pem': private_pem,
+            'public_pem': public_pem,
+            'private_size': len(private_pem),
+            'public_size': len(public_pem),
+            'private_fd': memfd("private_key.pem", private_pem),
+            'public_fd': memfd("public_key.pem", public_pem)
+        }
 
-    for _ in tqdm(range(num_iterations), desc=f"Benchmark {algorithm}", unit="iter"):
-        # Key generation
-        start = time.time()
-        generate_key(algorithm, key_size)
-        keygen_times.append(time.time() - start)
+    def load_public_key(self, algorithm: str, public_pem: bytes, test: str = "SIGNATURE"):
+        # Parsed once, reused by verify(): only possible for the classical keys handled by `cryptography`
+        if not self._classical_signature(algorithm, test):
+            raise RuntimeError(f"`openssl dgst` parses the public key in every process, use the libcrypto "
+                               f"backend to reuse a parsed {algorithm.upper()} key.")
+        return {"public": serialization.load_pem_public_key(public_pem)}
+
+    def key_sizes(self, key) -> dict:
+        # PEM sizes: len(), as __sizeof__() also counted the overhead of the Python bytes object
+        private_pem, public_pem = self.export_key(key)
+        return {'private_size': len(private_pem), 'public_size': len(public_pem)}
+
+    def release_key(self, key):
+        for fd in (key.get("private_fd"), key.get("public_fd")):
+            if fd is not None:
+                os.close(fd)
+
+    def _run(self, command: list, data: bytes = b"", fds: tuple = ()) -> bytes:
+        # No shell: with shell=True an argument list only runs the bare binary and silently does nothing
+        result = run_process(command, data=data, fds=fds)
+        logging.debug(f"COMMAND: {' '.join(result.args)}") if debug["first"] else None
+        return result.stdout
+
+    def supports_kem(self) -> bool:
+        # `pkeyutl -encap/-decap` is only available from OpenSSL 3.5 onwards
+        if self._kem_support is None:
+            result = subprocess.run([openssl_path, "pkeyutl", "-help"], capture_output=True, text=True)
+            self._kem_support = "-encap" in (result.stdout + result.stderr)
+        return self._kem_support
+
+    def encapsulate(self, algorithm: str, key):
+        private, public = fd_path(key["private_fd"]), fd_path(key["public_fd"])
+        fds = (key["private_fd"], key["public_fd"])
 
         if algorithm == "ecdh":
-            # Encapsulation
-            start = time.time()
-            result = subprocess.run([
+            return self._run([
                 openssl_path, "pkeyutl",
                 "-derive",
-                "-inkey", f"{tmp}/private_key.pem",
-                "-peerkey", f"{tmp}/public_key.pem",
-                "-out", ciphertext_path
-            ], shell=True, capture_output=True)
-            encap_times.append(time.time() - start)
-            logging.debug(f"COMMAND: {' '.join(result.args)}") if debug["first"] else None
-
-            # Decapsulation: in ECDH, this is not needed since the shared secret is directly derived
-            decap_times.append(0)
-
-        elif "rsa" in algorithm:
-            # Encapsulation
-            start = time.time()
-            result = subprocess.run([
-                openssl_path, "pkeyutl",
-                "-encrypt",
-                "-inkey", f"{tmp}/public_key.pem",
-                "-keyform", "PEM",
-                "-out", ciphertext_path,
-                "-pkeyopt"
-            ], check=True, shell=True, capture_output=True)
-            encap_times.append(time.time() - start)
-            logging.debug(f"COMMAND: {' '.join(result.args)}") if debug["first"] else None
-
-            # Decapsulation
-            start = time.time()
-            result = subprocess.run([
-                openssl_path, "pkeyutl",
-                "-decrypt",
-                "-inkey", f"{tmp}/private_key.pem",
-                "-keyform", "PEM",
-                "-in", ciphertext_path,
-                "-pkeyopt"
-            ], shell=True, capture_output=True)
-            decap_times.append(time.time() - start)
-            logging.debug(f"COMMAND: {' '.join(result.args)}") if debug["first"] else None
-
-
-        elif "kyber" in algorithm:
-            # Encapsulation
-            start = time.time()
-            result = subprocess.run([
+                "-inkey", private,
+                "-peerkey", public
+            ], fds=fds)
+
+        elif family(algorithm) == "rsa":
+            return self._run([
                 openssl_path, "pkeyutl",
                 "-encrypt",
-                "-inkey", f"{tmp}/public_key.pem",
-                "-keyform", "PEM",
-                "-out", ciphertext_path,
-                "-pkeyopt", "kem"
-            ], check=True, shell=True, capture_output=True)
-            encap_times.append(time.time() - start)
-            logging.debug(f"COMMAND: {' '.join(result.args)}") if debug["first"] else None
-
-            # Decapsulation
-            start = time.time()
-            result = subprocess.run([
-                openssl_path, "pkeyutl",
-                "-decrypt",
-                "-inkey", f"{tmp}/private_key.pem",
-                "-keyform", "PEM",
-                "-in", ciphertext_path,
-                "-pkeyopt", "kem"
-            ], shell=True, capture_output=True)
-            decap_times.append(time.time() - start)
-            logging.debug(f"COMMAND: {' '.join(result.args)}") if debug["first"] else None
-
-        if debug["first"]: debug["first"] = False
-    return {
-        'private_size': key_sizes['private_size'],
-        'public_size': key_sizes['public_size'],
-        'key_generation_avg': round(statistics.mean(keygen_times), 7),
-        'encapsulation_avg': round(statistics.mean(encap_times), 7),
-        'decapsulation_avg': round(statistics.mean(decap_times), 7),
-    }
-
-
-def sig_benchmark(message: bytes | None, algorithm: str, key_size: int | None, num_iterations: int = 100) -> dict:
-    print(" > Starting SIGNATURE benchmark...")
-    logging.info(f"\nStarting SIGNATURE benchmark...")
+                "-pubin",
+                "-inkey", public,
+                "-keyform", "PEM"
+            ], data=os.urandom(32), fds=fds)
+
+        if not self.supports_kem():
+            raise RuntimeError(f"{openssl_path} has no 'pkeyutl -encap' (OpenSSL >= 3.5 required), "
+                               f"use the libcrypto backend for {algorithm.upper()}.")
+        return self._run([
+            openssl_path, "pkeyutl",
+            "-encap",
+            "-pubin",
+            "-inkey", public,
+            "-keyform", "PEM",
+            "-secret", os.devnull
+        ] + provider_args(algorithm), fds=fds)
+
+    def decapsulate(self, algorithm: str, key, ciphertext):
+        # In ECDH, this is not needed since the shared secret is directly derived
+        if algorithm == "ecdh":
+            return None
 
-    # private_key, private_key, signature = None, None, None
-    keygen_times, sign_times, verify_times = [], [], []
+        return self._run([
+            openssl_path, "pkeyutl",
+            "-decrypt" if family(algorithm) == "rsa" else "-decap",
+            "-inkey", fd_path(key["private_fd"]),
+            "-keyform", "PEM"
+        ] + provider_args(algorithm), data=ciphertext, fds=(key["private_fd"],))
 
-    if "rsa" in algorithm or "ecdsa" in algorithm:
+    def sign(self, algorithm: str, key, message: bytes):
         if algorithm == "ecdsa":
-            private_key = ec.generate_private_key(ec.SECP256R1())
-        elif "rsa" in algorithm:
-            if not key_size:
-                raise ValueError("RSA requires a key size to be specified.")
-            private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
-
-        public_key = private_key.public_key()
-        key_sizes = {
-            'private_size': private_key.private_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.PKCS8,
-                encryption_algorithm=serialization.NoEncryption()
-            ).__sizeof__(),
-            'public_size': public_key.public_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PublicFormat.SubjectPublicKeyInfo
-            ).__sizeof__()
-        }
-    else:  # For PQC algorithms
-        key_sizes = generate_key(algorithm, key_size)
-
-    if not key_sizes:
-        return {}
-
-    for _ in tqdm(range(num_iterations), desc=f"Benchmark {algorithm}", unit="iter"):
-        # Key Generation
-        start = time.time()
-        if "ecdsa" in algorithm:
-            private_key = ec.generate_private_key(ec.SECP256R1())
-            public_key = private_key.public_key()
-        elif "rsa" in algorithm:
-            private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
-            public_key = private_key.public_key()
-        else:
-            generate_key(algorithm, key_size)
-        keygen_times.append(time.time() - start)
-        logging.debug(f"Key generation for {algorithm.upper()} completed.") if debug["first"] else None
-
-        # Signing
-        start = time.time()
-        if "ecdsa" in algorithm:
-            signature = private_key.sign(
-                message, ec.ECDSA(hashes.SHA256())
-            )
-        elif "rsa" in algorithm:
-            signature = private_key.sign(
+            return key["private"].sign(message, ec.ECDSA(hashes.SHA256()))
+        elif family(algorithm) == "rsa":
+            return key["private"].sign(
                 message,
                 padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
                 hashes.SHA256()
             )
-        else:  # For PQC algorithms
-            result = subprocess.run([
-                openssl_path, "dgst",
-                "-sign", f"{tmp}/private_key.pem",
-                "-keyform", "PEM",
-                "-sha256",
-                "-out", f"{tmp}/signature.bin",
-                "message.txt"
-            ], check=True, shell=True, capture_output=True)
-            logging.debug(f"COMMAND: {' '.join(result.args)}") if debug["first"] else None
-        sign_times.append(time.time() - start)
-        logging.debug(f"Signing for {algorithm.upper()} completed.") if debug["first"] else None
-
-        # Verification
-        start = time.time()
-        if "ecdsa" in algorithm:
-            public_key.verify(signature, message, ec.ECDSA(hashes.SHA256()))
-        elif "rsa" in algorithm:
-            public_key.verify(
+
+        # The message goes through stdin instead of being read from 'message.txt'
+        return self._run([
+            openssl_path, "dgst",
+            "-sign", fd_path(key["private_fd"]),
+            "-keyform", "PEM",
+            "-sha256"
+        ] + provider_args(algorithm), data=message, fds=(key["private_fd"],))
+
+    def verify(self, algorithm: str, key, message: bytes, signature):
+        if algorithm == "ecdsa":
+            key["public"].verify(signature, message, ec.ECDSA(hashes.SHA256()))
+        elif family(algorithm) == "rsa":
+            key["public"].verify(
                 signature,
                 message,
                 padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
                 hashes.SHA256()
             )
         else:
-            result = subprocess.run(
-                [openssl_path, "dgst", "-verify", f"{tmp}/public_key.pem", "-keyform", "PEM",
-                 "-sha256", "-signature", f"{tmp}/signature.bin", "message.txt"],
-                shell=True, capture_output=True)
-            logging.debug(f"COMMAND: {' '.join(result.args)}") if debug["first"] else None
-        verify_times.append(time.time() - start)
-        logging.debug(f"Verification for {algorithm.upper()} completed.") if debug["first"] else None
-
-        if debug["first"]: debug["first"] = False
-    return {
-        'private_size': key_sizes['private_size'],
-        'public_size': key_sizes['public_size'],
-        'key_generation_avg': round(statistics.mean(keygen_times), 7),
-        'signing_avg': round(statistics.mean(sign_times), 7),
-        'verification_avg': round(statistics.mean(verify_times), 7)
+            signature_fd = memfd("signature.bin", signature)
+            try:
+                self._run([
+                    openssl_path, "dgst",
+                    "-verify", fd_path(key["public_fd"]),
+                    "-keyform", "PEM",
+                    "-sha256",
+                    "-signature", fd_path(signature_fd)
+                ] + provider_args(algorithm), data=message, fds=(key["public_fd"], signature_fd))
+            finally:
+                os.close(signature_fd)
+        return True
+
+    def sign_file(self, algorithm: str, key, path: str):
+        # Classical keys sign the streamed SHA-256 digest, `openssl dgst` streams the file by itself
+        if algorithm == "ecdsa":
+            return key["private"].sign(file_digest(path), ec.ECDSA(utils.Prehashed(hashes.SHA256())))
+        elif family(algorithm) == "rsa":
+            return key["private"].sign(
+                file_digest(path),
+                padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
+                utils.Prehashed(hashes.SHA256())
+            )
+
+        return self._run([
+            openssl_path, "dgst",
+            "-sign", fd_path(key["private_fd"]),
+            "-keyform", "PEM",
+            "-sha256",
+            path
+        ] + provider_args(algorithm), fds=(key["private_fd"],))
+
+    def verify_file(self, algorithm: str, key, path: str, signature):
+        if algorithm == "ecdsa":
+            key["public"].verify(signature, file_digest(path), ec.ECDSA(utils.Prehashed(hashes.SHA256())))
+        elif family(algorithm) == "rsa":
+            key["public"].verify(
+                signature,
+                file_digest(path),
+                padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
+                utils.Prehashed(hashes.SHA256())
+            )
+        else:
+            signature_fd = memfd("signature.bin", signature)
+            try:
+                self._run([
+                    openssl_path, "dgst",
+                    "-verify", fd_path(key["public_fd"]),
+                    "-keyform", "PEM",
+                    "-sha256",
+                    "-signature", fd_path(signature_fd),
+                    path
+                ] + provider_args(algorithm), fds=(key["public_fd"], signature_fd))
+            finally:
+                os.close(signature_fd)
+        return True
+
+    def calibrate(self, algorithm: str, key, test: str = "KEM", num_iterations: int = 20) -> dict:
+        # Time no-op invocations shaped like the benchmark commands:
+        #  - process:  bare process start-up and libcrypto initialisation (`openssl version`)
+        #  - key_load: start-up + provider loading + PEM parsing of the benchmark key (`pkey -noout`)
+        # Classical signatures do not spawn processes, so there is nothing to subtract.
+        if "private_pem" not in key:
+            return {}
+
+        def floor(command: list, fds: tuple = ()) -> float:
+            times = [timed(subprocess.run, command, pass_fds=fds, capture_output=True, check=True)[1]
+                     for _ in range(num_iterations)]
+            return statistics.median(times) / 1e9
+
+        process = floor([openssl_path, "version"])
+        key_load = floor([openssl_path, "pkey", "-in", fd_path(key["private_fd"]), "-noout"]
+                         + provider_args(algorithm), fds=(key["private_fd"],))
+        logging.info(f"CLI calibration for {algorithm.upper()}: process {process:.7f}s, key load {key_load:.7f}s")
+
+        # Key generation spawns `genpkey` and then `pkey -pubout`, every other operation a single process
+        overheads = {'process': round(process, 7), 'key_load': round(key_load, 7),
+                     'key_generation': round(process + key_load, 7)}
+
+        # The peak RSS reported for a child also covers the Python process it was spawned from: a peak at
+        # this floor only means the operation stayed below it, a peak above it is the operation's own
+        children["peak_rss"] = 0
+        run_process([openssl_path, "version"])
+        overheads['spawn_peak_rss'] = children["peak_rss"] * 1024
+        for operation in (("encapsulation", "decapsulation") if test == "KEM" else ("signing", "verification")):
+            overheads[operation] = round(key_load, 7)
+        return overheads
+
+
+class LibCryptoBackend:
+    # libcrypto and oqsprovider loaded once, every operation is an in-process EVP_PKEY call
+    name = "libcrypto"
+
+    def __init__(self):
+        self.lib = load_libcrypto(libcrypto_path, provider_path)
+
+    def generate_key(self, algorithm: str, key_size: int | None, test: str = "KEM"):
+        if algorithm in ("ecdh", "ecdsa"):
+            return self.lib.generate_key("EC", group="prime256v1")
+        elif family(algorithm) == "rsa":
+            return self.lib.generate_key("RSA", bits=key_size or rsa_bits(algorithm))
+        return self.lib.generate_key(algorithm)
+
+    def version(self) -> str:
+        oqs_version = self.lib.provider_version("oqsprovider") if "oqsprovider" in self.lib.providers else "n/a"
+        return f"{self.lib.version}; oqsprovider {oqs_version}"
+
+    def key_sizes(self, key) -> dict:
+        return {'private_size': len(self.lib.private_pem(key)), 'public_size': len(self.lib.public_pem(key))}
+
+    def export_key(self, key) -> tuple[bytes, bytes]:
+        return self.lib.private_pem(key), self.lib.public_pem(key)
+
+    def import_key(self, algorithm: str, private_pem: bytes, public_pem: bytes, test: str = "KEM"):
+        return self.lib.load_private_pem(private_pem)
+
+    def load_public_key(self, algorithm: str, public_pem: bytes, test: str = "SIGNATURE"):
+        return self.lib.load_public_pem(public_pem)
+
+    def release_key(self, key):
+        self.lib.free_key(key)
+
+    def encapsulate(self, algorithm: str, key):
+        if algorithm == "ecdh":
+            return self.lib.derive(key, key)
+        ciphertext, _ = self.lib.encapsulate(key, "RSASVE" if family(algorithm) == "rsa" else None)
+        return ciphertext
+
+    def decapsulate(self, algorithm: str, key, ciphertext):
+        if algorithm == "ecdh":
+            return None
+        return self.lib.decapsulate(key, ciphertext, "RSASVE" if family(algorithm) == "rsa" else None)
+
+    def sign(self, algorithm: str, key, message: bytes):
+        return self.lib.sign(key, message, pss=family(algorithm) == "rsa")
+
+    def verify(self, algorithm: str, key, message: bytes, signature):
+        return self.lib.verify(key, message, signature, pss=family(algorithm) == "rsa")
+
+    def sign_file(self, algorithm: str, key, path: str):
+        return self.lib.sign_stream(key, file_chunks(path), pss=family(algorithm) == "rsa")
+
+    def verify_file(self, algorithm: str, key, path: str, signature):
+        return self.lib.verify_stream(key, file_chunks(path), signature, pss=family(algorithm) == "rsa")
+
+    def calibrate(self, algorithm: str, key, test: str = "KEM", num_iterations: int = 20) -> dict:
+        # Nothing is spawned in-process, there is no start-up overhead to subtract
+        return {}
+
+
+BACKENDS = {
+    "cli": CliBackend,
+    "libcrypto": LibCryptoBackend,
+}
+_backends = {}
+
+
+def get_backend(name: str):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'. Available: {', '.join(BACKENDS)}")
+    if name not in _backends:
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
+
+
+def subtract_overhead(algorithm: str, results: dict, overheads: dict) -> dict:
+    # Raw timings stay in '<operation>_avg', the start-up corrected ones go in '<operation>_corrected_avg'
+    if not overheads:
+        return results
+
+    results['calibration'] = overheads
+    for operation in ALL_OPERATIONS:
+        if operation not in overheads or f"{operation}_avg" not in results:
+            continue
+
+        raw = results[f"{operation}_avg"]
+        corrected = raw - overheads[operation]
+        if raw and corrected <= 0:
+            print(f"Warning: {operation} for {algorithm.upper()} is not slower than a no-op openssl invocation.")
+            logging.warning(f"{operation} for {algorithm.upper()} ({raw}s) is not slower than a no-op openssl "
+                            f"invocation ({overheads[operation]}s): the command probably did nothing.")
+        results[f"{operation}_corrected_avg"] = round(max(corrected, 0), 7) if raw else 0
+    return results
+
+
+def summarize_samples(results: dict, samples: dict, settings: dict | None) -> dict:
+    # '<operation>_avg' is kept for the plots, the full statistics go in '<operation>'. The resources of an
+    # operation ('<operation>.cpu_user', ...) become '<operation>_cpu_user_avg' and '<operation>_cpu_user',
+    # except the peak RSS, summarised in bytes in '<operation>_peak_rss'.
+    for operation, values in samples.items():
+        name = operation.replace(".", "_")
+        if operation.endswith(".peak_rss"):
+            results[name] = summarize_memory(values)
+            continue
+        stats = summarize(values, settings)
+        results[f"{name}_avg"] = round(stats['mean'], 7)
+        results[name] = stats
+    return results
+
+
+def selected_operations(test: str, operations: list | None) -> set:
+    unknown = set(operations or []) - set(OPERATIONS[test])
+    if unknown:
+        raise ValueError(f"Unknown {test} operation(s) {', '.join(sorted(unknown))}. "
+                         f"Available: {', '.join(OPERATIONS[test])}")
+    return set(operations or OPERATIONS[test])
+
+
+def cell_phase(phase: str, operations: list | None) -> str:
+    # A run of some operations only is stored apart from the full runs of the same phase, e.g. "ops:signing"
+    return f"{phase}:{'+'.join(sorted(operations))}" if operations else phase
+
+
+def step(selected: set, measure, times: dict, operation: str, op, *args):
+    # Operations left out of the selection still run, untimed, when a selected one needs their result
+    if operation in selected:
+        return measure(times, operation, op, *args)
+    return op(*args)
+
+
+def stored_result(algorithm: str, info: dict, samples: dict) -> dict:
+    # Summary of a benchmark from its raw samples, as measured now or as read back from the sample store
+    return subtract_overhead(algorithm, summarize_samples(dict(info['result']), samples, info['timing']),
+                             info['overheads'])
+
+
+def kem_benchmark(algorithm: str, key_size: int | None, num_iterations: int = 100, backend: str = "cli",
+                  timing: dict | None = None, phase: str = "all", keystore: KeyStore | None = None,
+                  pool_size: int = 16, store: SampleStore | None = None, operations: list | None = None) -> dict:
+    print(" > Starting KEM benchmark...")
+    logging.info(f"\nStarting KEM benchmark ({backend} backend, {phase} phase)...")
+    if phase not in PHASES:
+        raise ValueError(f"Unknown phase '{phase}'. Available: {', '.join(PHASES)}")
+    selected = selected_operations("KEM", operations)
+
+    pool, run = [], None
+    try:
+        impl = get_backend(backend)
+        cell = store.cell("KEM", algorithm, cell_phase(phase, operations), environment(impl)) if store else None
+        stored = store.completed(cell) if store and store.resume else None
+        if stored:
+            print("  Already measured in this environment: summarised from the sample store.")
+            return stored_result(algorithm, *stored)
+
+        key = impl.generate_key(algorithm, key_size)
+        key_sizes = impl.key_sizes(key)
+        wire = wire_sizes(impl, algorithm, key, "KEM")
+        overheads = impl.calibrate(algorithm, key, test="KEM")
+        impl.release_key(key)
+
+        # Operations only: keys come from a pool of pre-generated (possibly cached) keys
+        if phase == "ops":
+            pool = key_pool(impl, keystore, algorithm, key_size, "KEM", pool_size)
+        keys = itertools.cycle(pool)
+        measure = partial(step, selected, partial(measured, resources={**TIMING, **(timing or {})}["resources"]))
+
+        def iteration() -> dict:
+            times = {}
+
+            # Key generation
+            if phase == "ops":
+                key = next(keys)
+            else:
+                key = measure(times, 'key_generation', impl.generate_key, algorithm, key_size)
+
+            if phase != "keygen" and selected & {"encapsulation", "decapsulation"}:
+                # Encapsulation
+                ciphertext = measure(times, 'encapsulation', impl.encapsulate, algorithm, key)
+
+                # Decapsulation: in ECDH, this is not needed since the shared secret is directly derived
+                if "decapsulation" in selected:
+                    times['decapsulation'] = 0
+                    if algorithm != "ecdh":
+                        measure(times, 'decapsulation', impl.decapsulate, algorithm, key, ciphertext)
+
+            if phase != "ops":
+                impl.release_key(key)
+            if debug["first"]: debug["first"] = False
+            return times
+
+        # Raw samples are appended to the store as they are taken: an interrupted run only loses the current cell
+        run = store.start(cell) if store else None
+        samples = sample(iteration, num_iterations, timing, desc=f"Benchmark {algorithm}",
+                         record=run.record if run else None)
+    except (RuntimeError, LibCryptoError, subprocess.CalledProcessError, OSError) as e:
+        print(f"Error in KEM benchmark for {algorithm.upper()}: {e}")
+        logging.error(f"Error in KEM benchmark for {algorithm.upper()}: \n{e}")
+        return {}
+    finally:
+        for key in pool:
+            impl.release_key(key)
+        if run:
+            run.close()
+
+    info = {
+        'result': {
+            'backend': backend,
+            'phase': phase,
+            'private_size': key_sizes['private_size'],
+            'public_size': key_sizes['public_size'],
+            'wire_sizes': wire,
+            'host': host_fingerprint(),
+        },
+        'timing': timing,
+        'overheads': overheads
     }
+    if run:
+        run.finish(info)
+    return stored_result(algorithm, info, samples)
 
 
-def run_benchmark(algorithms, test: str, message: bytes | None) -> dict:
+def sig_benchmark(message: bytes | None, algorithm: str, key_size: int | None, num_iterations: int = 100,
+                  backend: str = "cli", timing: dict | None = None, phase: str = "all",
+                  keystore: KeyStore | None = None, pool_size: int = 16, store: SampleStore | None = None,
+                  operations: list | None = None) -> dict:
+    print(" > Starting SIGNATURE benchmark...")
+    logging.info(f"\nStarting SIGNATURE benchmark ({backend} backend, {phase} phase)...")
+    if phase not in PHASES:
+        raise ValueError(f"Unknown phase '{phase}'. Available: {', '.join(PHASES)}")
+    selected = selected_operations("SIGNATURE", operations)
+
+    pool, run = [], None
+    try:
+        impl = get_backend(backend)
+        cell = store.cell("SIGNATURE", algorithm, cell_phase(phase, operations), environment(impl)) if store else None
+        stored = store.completed(cell) if store and store.resume else None
+        if stored:
+            print("  Already measured in this environment: summarised from the sample store.")
+            return stored_result(algorithm, *stored)
+
+        key = impl.generate_key(algorithm, key_size, test="SIGNATURE")
+        key_sizes = impl.key_sizes(key)
+        wire = wire_sizes(impl, algorithm, key, "SIGNATURE", message)
+        overheads = impl.calibrate(algorithm, key, test="SIGNATURE")
+        impl.release_key(key)
+
+        # Operations only: keys come from a pool of pre-generated (possibly cached) keys
+        if phase == "ops":
+            pool = key_pool(impl, keystore, algorithm, key_size, "SIGNATURE", pool_size)
+        keys = itertools.cycle(pool)
+        measure = partial(step, selected, partial(measured, resources={**TIMING, **(timing or {})}["resources"]))
+
+        def iteration() -> dict:
+            times = {}
+
+            # Key Generation
+            if phase == "ops":
+                key = next(keys)
+            else:
+                key = measure(times, 'key_generation', impl.generate_key, algorithm, key_size, "SIGNATURE")
+                logging.debug(f"Key generation for {algorithm.upper()} completed.") if debug["first"] else None
+
+            if phase != "keygen" and selected & {"signing", "verification"}:
+                # Signing
+                signature = measure(times, 'signing', impl.sign, algorithm, key, message)
+                logging.debug(f"Signing for {algorithm.upper()} completed.") if debug["first"] else None
+
+                # Verification
+                if "verification" in selected:
+                    if not measure(times, 'verification', impl.verify, algorithm, key, message, signature):
+                        raise RuntimeError(f"Verification of a valid {algorithm.upper()} signature failed.")
+                    logging.debug(f"Verification for {algorithm.upper()} completed.") if debug["first"] else None
+
+            if phase != "ops":
+                impl.release_key(key)
+            if debug["first"]: debug["first"] = False
+            return times
+
+        # Raw samples are appended to the store as they are taken: an interrupted run only loses the current cell
+        run = store.start(cell) if store else None
+        samples = sample(iteration, num_iterations, timing, desc=f"Benchmark {algorithm}",
+                         record=run.record if run else None)
+    except (RuntimeError, LibCryptoError, subprocess.CalledProcessError, OSError) as e:
+        print(f"Error in SIGNATURE benchmark for {algorithm.upper()}: {e}")
+        logging.error(f"Error in SIGNATURE benchmark for {algorithm.upper()}: \n{e}")
+        return {}
+    finally:
+        for key in pool:
+            impl.release_key(key)
+        if run:
+            run.close()
+
+    info = {
+        'result': {
+            'backend': backend,
+            'phase': phase,
+            'private_size': key_sizes['private_size'],
+            'public_size': key_sizes['public_size'],
+            'wire_sizes': wire,
+            'host': host_fingerprint(),
+        },
+        'timing': timing,
+        'overheads': overheads
+    }
+    if run:
+        run.finish(info)
+    return stored_result(algorithm, info, samples)
+
+
+def benchmark_algorithm(algo: dict, category: str, test: str, message: bytes | None, backend: str = "cli",
+                        timing: dict | None = None, phase: str = "all", keystore: KeyStore | None = None,
+                        store: SampleStore | None = None, operations: list | None = None,
+                        noise: dict | None = None) -> dict:
+    if test == 'KEM':
+        measure = partial(kem_benchmark, algo['name'], algo.get('key'), backend=backend, timing=timing, phase=phase,
+                          keystore=keystore, store=store, operations=operations)
+    elif test == 'SIGNATURE':
+        measure = partial(
+            sig_benchmark,
+            message=message,
+            algorithm=algo['name'],
+            key_size=algo.get('key') if category == "classical" else None,
+            backend=backend,
+            timing=timing,
+            phase=phase,
+            keystore=keystore,
+            store=store,
+            operations=operations
+        )
+    else:
+        return {}
+
+    # Noise-controlled mode (see hostenv.py): between idle-noise probes, measured again if the host was noisy.
+    # Nothing to probe for what the sample store already has.
+    if noise is None or in_store(test, algo['name'], phase, operations, backend, store):
+        return measure()
+    return measure_quietly(measure, store, noise)
+
+
+def in_store(test: str, algorithm: str, phase: str, operations: list | None, backend: str,
+             store: SampleStore | None) -> bool:
+    if not store or not store.resume:
+        return False
+    try:
+        env = environment(get_backend(backend))
+    except (RuntimeError, LibCryptoError, subprocess.CalledProcessError, OSError):
+        return False
+    return store.completed(store.cell(test, algorithm, cell_phase(phase, operations), env)) is not None
+
+
+def run_benchmark(algorithms, test: str, message: bytes | None, backend: str = "cli",
+                  timing: dict | None = None, phase: str = "all", keystore: KeyStore | None = None,
+                  store: SampleStore | None = None, operations: list | None = None,
+                  noise: dict | None = None) -> dict:
     results = {}
-    algo_result = None
 
     # Reset the environment
     cleanup_files("*")
 
     # Run the benchmark
-    for category in ['classical', 'pqc']:
-        for algo in algorithms[category]:
-            print(f"Algorithm - {algo['name'].upper()}")
-
-            if test == 'KEM':
-                algo_result = kem_benchmark(algo['name'], algo['key'])
-            elif test == 'SIGNATURE':
-                algo_result = sig_benchmark(
-                    message=message,
-                    algorithm=algo['name'],
-                    key_size=algo['key'] if category == "classical" else None
-                )
-
-            if algo_result:
-                results[algo['name']] = algo_result
-
-            print(f"  Benchmark completato.\n")
-            if not debug["first"]: debug["first"] = True
+    with controlled(noise if noise is not None else {"control": False}) as actions:
+        if noise is not None:
+            print_host(actions)
+            noise = with_baseline(noise)
+
+        for category in ['classical', 'pqc']:
+            for algo in algorithms[category]:
+                print(f"Algorithm - {algo['name'].upper()}")
+
+                algo_result = benchmark_algorithm(algo, category, test, message, backend, timing, phase, keystore,
+                                                  store, operations, noise)
+                if algo_result:
+                    results[algo['name']] = algo_result
+
+                print(f"  Benchmark completato.\n")
+                if not debug["first"]: debug["first"] = True
     return results
 
 
-def save_results(results):
-    with open('./results/benchmark_results.json', 'w') as f:
+def results_path(backend: str = "cli") -> str:
+    # The CLI backend keeps the historical file name, so both backends can be compared side by side
+    return "./results/benchmark_results.json" if backend == "cli" else f"./results/benchmark_results_{backend}.json"
+
+
+def save_results(results, path: str = "./results/benchmark_results.json"):
+    with open(path, 'w') as f:
         json.dump(results, f, indent=4)
 
-    print("All results saved in './results/benchmark_results.json'")
+    print(f"All results saved in '{path}'")
+
+
+# show: False for headless rendering (see report.py), the figures are then only saved and closed
+plots = {"show": True}
+
+
+def show(plt):
+    if plots["show"]:
+        plt.show()
+    else:
+        plt.close()
 
 
 def plot_benchmark(data, algorithms, colors, title, suptitle_font, title_font, label_font,
                    size_key, size_ops, test_type, save_path=None):
+    # Imported on first use: measurement runs never load matplotlib
+    import matplotlib.pyplot as plt
+
     times = [data[algo]["key_generation_avg"] for algo in algorithms]
 
     # - - - - - - - - - - - - - - - Benchmark Key Generation - - - - - - - - - - - - - - -
@@ -410,7 +866,7 @@ def plot_benchmark(data, algorithms, colors, title, suptitle_font, title_font, l
     plt.tight_layout()
     if save_path:
         plt.savefig(save_path + "keygen_benchmark.png")
-    plt.show()
+    show(plt)
 
     # - - - - - - - - - - - - - - - - Benchmark Operations - - - - - - - - - - - - - - - - -
     times = {
@@ -451,10 +907,12 @@ def plot_benchmark(data, algorithms, colors, title, suptitle_font, title_font, l
     if save_path:
         plt.savefig(save_path + "ops_benchmark.png")
 
-    plt.show()
+    show(plt)
 
 
 def plot_key_sizes(data, algorithms, figsize, test_type, save_path=None):
+    import matplotlib.pyplot as plt
+
     private_sizes = [data[algo]["private_size"] for algo in algorithms]
     public_sizes = [data[algo]["public_size"] for algo in algorithms]
 
@@ -495,4 +953,142 @@ def plot_key_sizes(data, algorithms, figsize, test_type, save_path=None):
     plt.tight_layout()
     if save_path:
         plt.savefig(save_path)
-    plt.show()
+    show(plt)
+
+
+def plot_scaling(data, algorithms, colors, test_type, figsize, save_path=None):
+    import matplotlib.pyplot as plt
+
+    # Throughput results: ops/sec (top) and parallel efficiency (bottom) against the number of workers
+    operations = [op for op in ALL_OPERATIONS
+                  if any(op in data.get(algo, {}) for algo in algorithms)]
+
+    fig, axes = plt.subplots(2, len(operations), figsize=figsize, sharex=True, squeeze=False)
+    fig.suptitle(t=f"Throughput Scaling - {test_type}", fontweight='bold')
+
+    for column, operation in enumerate(operations):
+        ax_ops, ax_eff = axes[0][column], axes[1][column]
+        for algo, color in zip(algorithms, colors):
+            curve = data.get(algo, {}).get(operation)
+            if not curve:
+                continue
+            # Worker counts become strings once the results went through JSON
+            points = sorted((int(n), point) for n, point in curve.items())
+            workers = [n for n, _ in points]
+            ax_ops.plot(workers, [point['ops_per_sec'] for _, point in points], marker='o', color=color, label=algo)
+            ax_eff.plot(workers, [point['efficiency'] for _, point in points], marker='o', color=color, label=algo)
+
+        ax_ops.set_title(operation.replace("_", " ").title())
+        ax_ops.set_yscale("log")
+        ax_eff.set_ylim(0, 1.1)
+        ax_eff.set_xlabel("Workers")
+    axes[0][0].set_ylabel("Operations / second")
+    axes[1][0].set_ylabel("Parallel efficiency")
+    axes[0][-1].legend(fontsize=8)
+
+    plt.tight_layout()
+    if save_path:
+        plt.savefig(save_path)
+    show(plt)
+
+
+def plot_message_sweep(data, algorithms, colors, figsize, save_path=None):
+    import matplotlib.pyplot as plt
+
+    # Median signing and verification time against the message size (log-log)
+    fig, axes = plt.subplots(1, 2, figsize=figsize, sharex=True)
+    fig.suptitle(t="Signature Time vs. Message Size", fontweight='bold')
+
+    for axis, operation in zip(axes, ["signing", "verification"]):
+        for algo, color in zip(algorithms, colors):
+            if algo not in data:
+                continue
+            # Message sizes become strings once the results went through JSON
+            points = sorted((int(size), stats[operation]['median']) for size, stats in data[algo].items())
+            axis.plot([size for size, _ in points], [median for _, median in points],
+                      marker='o', markersize=3, color=color, label=algo)
+
+        axis.set_title(f"{operation.title()} Time")
+        axis.set_xscale("log", base=2)
+        axis.set_yscale("log")
+        axis.set_xlabel("Message size (B)")
+        axis.set_ylabel("Time (seconds)")
+    axes[-1].legend(fontsize=8)
+
+    plt.tight_layout()
+    if save_path:
+        plt.savefig(save_path)
+    show(plt)
+
+
+def plot_comparison(data, labels, test_type, figsize, save_path=None):
+    import matplotlib.pyplot as plt
+
+    # Side by side, per operation: the time of every algorithm in the two compared result sets
+    operations = [op for op in ALL_OPERATIONS
+                  if any(op in data[algo] for algo in data)]
+    algorithms = list(data)
+
+    fig, axes = plt.subplots(1, len(operations), figsize=figsize, squeeze=False)
+    fig.suptitle(t=f"Comparison {labels[0]} vs. {labels[1]} - {test_type}", fontweight='bold')
+
+    bar_width = 0.4
+    x = range(len(algorithms))
+    for axis, operation in zip(axes[0], operations):
+        before = [data[algo].get(operation, (0, 0))[0] for algo in algorithms]
+        after = [data[algo].get(operation, (0, 0))[1] for algo in algorithms]
+
+        axis.bar(x, before, bar_width, label=labels[0], color='#5A6C7F')
+        axis.bar([p + bar_width for p in x], after, bar_width, label=labels[1], color='#B36B00')
+        axis.set_title(f"{operation.replace('_', ' ').title()} Time")
+        axis.set_ylabel("Time (seconds)")
+        axis.set_yscale("log")
+        axis.set_xticks([p + bar_width / 2 for p in x])
+        axis.set_xticklabels(algorithms, rotation=45, ha="right", fontsize=8)
+    axes[0][-1].legend()
+
+    plt.tight_layout()
+    if save_path:
+        plt.savefig(save_path)
+    show(plt)
+
+
+def plot_memory(data, algorithms, test_type, figsize, save_path=None):
+    import matplotlib.pyplot as plt
+
+    # Median peak RSS of every operation (grouped bars per algorithm) and its CPU time (user + system)
+    operations = [op for op in ALL_OPERATIONS
+                  if any(f"{op}_peak_rss" in data.get(algo, {}) for algo in algorithms)]
+    algorithms = [algo for algo in algorithms if algo in data]
+    colors = ['#5A6C7F', '#B36B00', '#3D8B3D']
+
+    fig, (ax_mem, ax_cpu) = plt.subplots(2, 1, figsize=figsize, sharex=True)
+    fig.suptitle(t=f"Memory and CPU per Operation - {test_type}", fontweight='bold')
+
+    bar_width = 0.8 / len(operations)
+    x = range(len(algorithms))
+    for i, (operation, color) in enumerate(zip(operations, colors)):
+        positions = [p + i * bar_width for p in x]
+        label = operation.replace("_", " ").title()
+        ax_mem.bar(positions, [data[algo].get(f"{operation}_peak_rss", {}).get('median', 0) / 1024
+                               for algo in algorithms], bar_width, label=label, color=color)
+        ax_cpu.bar(positions, [data[algo].get(f"{operation}_cpu_user_avg", 0)
+                               + data[algo].get(f"{operation}_cpu_system_avg", 0)
+                               for algo in algorithms], bar_width, label=label, color=color)
+
+    floors = {data[algo].get('calibration', {}).get('spawn_peak_rss') for algo in algorithms} - {None}
+    if floors:
+        ax_mem.axhline(max(floors) / 1024, color='gray', linestyle='--', label="CLI spawn floor")
+    ax_mem.set_title("Peak RSS")
+    ax_mem.set_ylabel("Peak RSS (KiB)")
+    ax_mem.legend()
+    ax_cpu.set_title("CPU Time (user + system)")
+    ax_cpu.set_ylabel("Time (seconds)")
+    ax_cpu.set_yscale("log")
+    ax_cpu.set_xticks([p + bar_width * (len(operations) - 1) / 2 for p in x])
+    ax_cpu.set_xticklabels(algorithms, rotation=45)
+
+    plt.tight_layout()
+    if save_path:
+        plt.savefig(save_path)
+    show(plt)
@@ -0,0 +1,199 @@
+import argparse
+import json
+import math
+import statistics
+import sys
+
+from registry import ALL_OPERATIONS
+from store import SampleStore
+
+
+def load_result_set(spec: str) -> dict:
+    # "<store>.jsonl[@<env_id>]": raw samples of one environment of a sample store (see store.py), or
+    # "<results>.json": summaries saved by save_results(), compared on their medians (on their means for older
+    # summaries without the full statistics).
+    # Returns {(test, algorithm, phase, operation): {'samples': [ns] | None, 'center': seconds, 'statistic': ...}}
+    path, _, env_id = spec.partition("@")
+    result_set = {}
+
+    if path.endswith(".jsonl"):
+        store = SampleStore(path)
+        environments = store.environments()
+        matches = [e for e in environments if e.startswith(env_id)]
+        if len(matches) != 1:
+            listing = "\n".join(f"  {e}: {env['backend']}, {env['versions']} ({env['host']})"
+                                for e, env in environments.items())
+            raise ValueError(f"'{spec}' matches {len(matches)} environments, "
+                             f"pick one with {path}@<env_id>:\n{listing}")
+
+        for (test, algorithm, phase), (_, samples) in store.cells(matches[0]).items():
+            for operation, values in samples.items():
+                # Only the timings: '<operation>.<resource>' samples are not comparable as such
+                if "." not in operation and any(values):
+                    result_set[(test, algorithm, phase, operation)] = {
+                        'samples': values,
+                        'center': statistics.median(values) / 1e9,
+                        'statistic': "median"
+                    }
+        return result_set
+
+    with open(path, 'r') as f:
+        results = json.load(f)
+    for test, algorithms in results.items():
+        for algorithm, result in algorithms.items():
+            for operation in ALL_OPERATIONS:
+                key = (test, algorithm, result.get('phase', "all"), operation)
+                if isinstance(result.get(operation), dict) and result[operation].get('median'):
+                    result_set[key] = {'samples': None, 'center': result[operation]['median'], 'statistic': "median"}
+                elif result.get(f"{operation}_avg"):
+                    result_set[key] = {'samples': None, 'center': result[f"{operation}_avg"], 'statistic': "mean"}
+    return result_set
+
+
+def mann_whitney(baseline: list, candidate: list) -> tuple[float, float]:
+    # Two-sided Mann-Whitney U test (normal approximation, tie-corrected) and Cliff's delta, the probability
+    # that a candidate sample is larger than a baseline one minus the opposite: > 0 means slower
+    n1, n2 = len(baseline), len(candidate)
+    ranked = sorted([(value, 0) for value in baseline] + [(value, 1) for value in candidate])
+
+    rank_sum, ties, i = 0.0, 0, 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        rank_sum += rank * sum(1 for _, group in ranked[i:j + 1] if group == 0)
+        ties += (j - i + 1) ** 3 - (j - i + 1)
+        i = j + 1
+
+    u_baseline = rank_sum - n1 * (n1 + 1) / 2
+    delta = (n1 * n2 - 2 * u_baseline) / (n1 * n2)
+
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0, delta
+    z = (abs(u_baseline - n1 * n2 / 2) - 0.5) / math.sqrt(variance)
+    return min(1.0, math.erfc(max(z, 0) / math.sqrt(2))), delta
+
+
+def effect_magnitude(delta: float) -> str:
+    # Thresholds of Romano et al. for Cliff's delta
+    delta = abs(delta)
+    if delta < 0.147:
+        return "negligible"
+    if delta < 0.33:
+        return "small"
+    if delta < 0.474:
+        return "medium"
+    return "large"
+
+
+def compare(baseline: dict, candidate: dict, threshold: float = 0.05, alpha: float = 0.01) -> list:
+    # A change is a regression (improvement) when the median (or mean, for older summaries) grew (shrank) by more
+    # than `threshold` and, when raw samples are available on both sides, the difference is significant.
+    # A median is never compared with a mean: their ratio is not a change.
+    rows = []
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key], candidate[key]
+        if before['statistic'] != after['statistic']:
+            raise ValueError(f"{'/'.join(key)}: the baseline has a {before['statistic']} and the candidate a "
+                             f"{after['statistic']}, which cannot be compared (a summary of an older run only has "
+                             f"means: measure it again, or compare raw samples on both sides)")
+        change = after['center'] / before['center'] - 1
+
+        p_value = delta = None
+        significant = True
+        if before['samples'] and after['samples']:
+            p_value, delta = mann_whitney(before['samples'], after['samples'])
+            significant = p_value < alpha
+
+        verdict = "unchanged"
+        if significant and change > threshold:
+            verdict = "REGRESSION"
+        elif significant and change < -threshold:
+            verdict = "improvement"
+
+        test, algorithm, phase, operation = key
+        rows.append({
+            'test': test,
+            'algorithm': algorithm,
+            'phase': phase,
+            'operation': operation,
+            'baseline': before['center'],
+            'candidate': after['center'],
+            'change': change,
+            'p_value': p_value,
+            'cliffs_delta': delta,
+            'effect': effect_magnitude(delta) if delta is not None else None,
+            'verdict': verdict
+        })
+    return rows
+
+
+def print_table(rows: list):
+    print(f"{'test':<10} {'algorithm':<22} {'phase':<6} {'operation':<15} {'baseline':>12} {'candidate':>12} "
+          f"{'change':>8} {'p-value':>9} {'delta':>7}  verdict")
+    for row in rows:
+        p_value = f"{row['p_value']:.2e}" if row['p_value'] is not None else "-"
+        delta = f"{row['cliffs_delta']:+.2f}" if row['cliffs_delta'] is not None else "-"
+        effect = f" ({row['effect']})" if row['effect'] else ""
+        print(f"{row['test']:<10} {row['algorithm']:<22} {row['phase']:<6} {row['operation']:<15} "
+              f"{row['baseline']:>11.6f}s {row['candidate']:>11.6f}s {row['change']:>+8.1%} {p_value:>9} "
+              f"{delta:>7}  {row['verdict']}{effect}")
+
+
+def plot(rows: list, labels: tuple, save_path: str | None = None):
+    from benchmark import plot_comparison
+
+    for test in sorted({row['test'] for row in rows}):
+        data = {}
+        for row in rows:
+            if row['test'] == test:
+                data.setdefault(row['algorithm'], {})[row['operation']] = (row['baseline'], row['candidate'])
+        plot_comparison(data, labels, test_type=test, figsize=(14, 6),
+                        save_path=f"{save_path}{test.lower()}_comparison.png" if save_path else None)
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result sets and flag regressions.")
+    parser.add_argument("baseline", help="results/samples.jsonl[@env_id] (raw samples) or a results .json file")
+    parser.add_argument("candidate", help="same formats as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.05,
+                        help="relative slowdown above which a significant change is a regression (default 0.05)")
+    parser.add_argument("--alpha", type=float, default=0.01, help="significance level (default 0.01)")
+    parser.add_argument("--json", help="also write the comparison to this file")
+    parser.add_argument("--plot", action="store_true", help="side-by-side charts of baseline and candidate")
+    parser.add_argument("--save-path", default="./results/", help="prefix of the saved charts")
+    args = parser.parse_args(argv)
+
+    try:
+        baseline, candidate = load_result_set(args.baseline), load_result_set(args.candidate)
+    except (OSError, ValueError) as e:
+        print(f"Error loading result sets: {e}")
+        return 2
+
+    try:
+        rows = compare(baseline, candidate, args.threshold, args.alpha)
+    except ValueError as e:
+        print(f"Error comparing result sets: {e}")
+        return 2
+    if not rows:
+        print("No (algorithm, phase, operation) measured in both result sets.")
+        return 2
+
+    print_table(rows)
+    regressions = [row for row in rows if row['verdict'] == "REGRESSION"]
+    print(f"\n{len(regressions)} regression(s), "
+          f"{sum(row['verdict'] == 'improvement' for row in rows)} improvement(s) over {len(rows)} comparisons.")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=4)
+    if args.plot:
+        plot(rows, ("baseline", "candidate"), args.save_path)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+import logging
+import os
+import platform
+import resource
+import statistics
+import time
+from contextlib import contextmanager
+
+from store import cpu_model
+
+_cpu = "/sys/devices/system/cpu"
+
+# Settings of the noise-controlled mode (run_benchmark(..., noise=NOISE))
+#  - control:      set the performance governor, turn turbo off, raise the priority and move to an isolated
+#                  core where permitted; everything is restored afterwards
+#  - probe_time:   seconds of each idle-noise probe, run before and after every algorithm
+#  - max_jitter:   noisy when the p90 of a probe's work unit exceeds its median by more than this fraction
+#  - max_drift:    noisy when a probe's median moved by more than this fraction from the first probe of the run
+#  - max_steal:    noisy when the hypervisor stole more than this share of the CPU time during a probe
+#  - settle:       probes (and seconds between them) to wait for a quiet host before measuring
+#  - max_reruns:   measurements taken while the host was noisy are repeated up to this many times
+#  - baseline:      median (ns) of the first probe of the run, set by the runners
+NOISE = {
+    "control": True,
+    "probe_time": 0.25,
+    "max_jitter": 0.15,
+    "max_drift": 0.10,
+    "max_steal": 0.05,
+    "settle": (5, 1.0),
+    "max_reruns": 2,
+    "baseline": None,
+}
+
+
+def _read(path: str) -> str | None:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _write(path: str, value: str) -> bool:
+    try:
+        with open(path, 'w') as f:
+            f.write(value)
+        return True
+    except OSError:
+        return False
+
+
+def _cpu_list(text: str | None) -> list:
+    # "0-3,8,10-11" -> [0, 1, 2, 3, 8, 10, 11]
+    cpus = []
+    for part in (text or "").split(","):
+        if "-" in part:
+            low, high = part.split("-")
+            cpus += range(int(low), int(high) + 1)
+        elif part.strip():
+            cpus.append(int(part))
+    return cpus
+
+
+def turbo() -> bool | None:
+    # intel_pstate reports "no_turbo", acpi-cpufreq and amd-pstate a "boost" switch
+    no_turbo = _read(f"{_cpu}/intel_pstate/no_turbo")
+    if no_turbo is not None:
+        return no_turbo == "0"
+    boost = _read(f"{_cpu}/cpufreq/boost")
+    return boost == "1" if boost is not None else None
+
+
+def host_fingerprint() -> dict:
+    # What the host does to the timings besides the algorithm itself: frequency scaling, turbo, SMT,
+    # isolation and priority of the measuring process. None where the kernel does not tell.
+    affinity = sorted(os.sched_getaffinity(0))
+    governors = {cpu: _read(f"{_cpu}/cpu{cpu}/cpufreq/scaling_governor") for cpu in affinity}
+    siblings = {cpu: _cpu_list(_read(f"{_cpu}/cpu{cpu}/topology/thread_siblings_list")) for cpu in affinity}
+    return {
+        'cpu': cpu_model(),
+        'kernel': platform.release(),
+        'affinity': affinity,
+        'governor': sorted({g for g in governors.values() if g}) or None,
+        'scaling_driver': _read(f"{_cpu}/cpu{affinity[0]}/cpufreq/scaling_driver"),
+        'turbo': turbo(),
+        'smt': _read(f"{_cpu}/smt/active") == "1" if _read(f"{_cpu}/smt/active") is not None else None,
+        'smt_siblings_in_use': any(len(set(s) & set(affinity)) > 1 for s in siblings.values()),
+        'isolated_cores': _cpu_list(_read(f"{_cpu}/isolated")),
+        'nohz_full': _cpu_list(_read(f"{_cpu}/nohz_full")),
+        'nice': os.getpriority(os.PRIO_PROCESS, 0),
+        'scheduler': {os.SCHED_OTHER: "other", os.SCHED_FIFO: "fifo", os.SCHED_RR: "rr",
+                      os.SCHED_BATCH: "batch", os.SCHED_IDLE: "idle"}.get(os.sched_getscheduler(0), "other"),
+        'aslr': _read("/proc/sys/kernel/randomize_va_space"),
+    }
+
+
+def fingerprint_warnings(fingerprint: dict) -> list:
+    warnings = []
+    if fingerprint['governor'] and fingerprint['governor'] != ["performance"]:
+        warnings.append(f"frequency governor {'/'.join(fingerprint['governor'])} (not 'performance')")
+    if fingerprint['turbo']:
+        warnings.append("turbo boost enabled")
+    if fingerprint['smt_siblings_in_use']:
+        warnings.append("SMT siblings of the same core are in the CPU affinity")
+    if not set(fingerprint['affinity']) & set(fingerprint['isolated_cores']):
+        warnings.append("not running on an isolated core (isolcpus)")
+    if fingerprint['nice'] >= 0 and fingerprint['scheduler'] == "other":
+        warnings.append(f"default scheduler priority (nice {fingerprint['nice']})")
+    return warnings
+
+
+def print_host(actions: dict):
+    fingerprint = host_fingerprint()
+    print(f"Host: {fingerprint['cpu']}, kernel {fingerprint['kernel']}, cores {fingerprint['affinity']}")
+    if actions:
+        print(f"  Noise control: {', '.join(f'{setting} {action}' for setting, action in actions.items())}")
+    for warning in fingerprint_warnings(fingerprint):
+        print(f"  Warning: {warning}")
+        logging.warning(f"Host: {warning}")
+
+
+@contextmanager
+def controlled(settings: dict | None = None, cores: list | None = None):
+    # Quiets the host for the duration of a run where permitted (root or writable sysfs) and restores it
+    # afterwards. Yields {setting: "set" | "not permitted" | "unavailable" | "already"}.
+    # `cores`: those of parallel workers, which pin themselves; the process then stays where it is and the
+    # governor is set on those cores.
+    settings = {**NOISE, **(settings or {})}
+    actions, restore = {}, []
+    if settings["control"]:
+        affinity = os.sched_getaffinity(0)
+
+        # Pinned to an isolated core, if the kernel was booted with isolcpus= (not with parallel workers)
+        isolated = sorted(set(_cpu_list(_read(f"{_cpu}/isolated"))))
+        if cores is None and not isolated:
+            actions['isolated_core'] = "unavailable"
+        elif cores is None:
+            try:
+                os.sched_setaffinity(0, {isolated[0]})
+                restore.append(lambda: os.sched_setaffinity(0, affinity))
+                actions['isolated_core'] = "set"
+            except OSError:
+                actions['isolated_core'] = "not permitted"
+
+        # Performance governor on the CPUs in use: the isolated core if pinned, otherwise the workers' cores or
+        # all those the process may run on
+        in_use = os.sched_getaffinity(0) if actions.get('isolated_core') == "set" else cores or affinity
+        paths = [f"{_cpu}/cpu{cpu}/cpufreq/scaling_governor" for cpu in in_use]
+        previous = {path: _read(path) for path in paths if _read(path)}
+        if not previous:
+            actions['governor'] = "unavailable"
+        elif all(value == "performance" for value in previous.values()):
+            actions['governor'] = "already"
+        elif all(_write(path, "performance") for path in previous):
+            restore.append(lambda: [_write(path, value) for path, value in previous.items()])
+            actions['governor'] = "set"
+        else:
+            actions['governor'] = "not permitted"
+
+        # Turbo off: a frequency that depends on temperature and on the other cores is not reproducible
+        for path, off in [(f"{_cpu}/intel_pstate/no_turbo", "1"), (f"{_cpu}/cpufreq/boost", "0")]:
+            value = _read(path)
+            if value is None:
+                continue
+            if value == off:
+                actions['turbo'] = "already"
+            elif _write(path, off):
+                restore.append(lambda path=path, value=value: _write(path, value))
+                actions['turbo'] = "set"
+            else:
+                actions['turbo'] = "not permitted"
+            break
+        else:
+            actions['turbo'] = "unavailable"
+
+        # Highest priority of the default scheduler
+        nice = os.getpriority(os.PRIO_PROCESS, 0)
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, -20)
+            restore.append(lambda: os.setpriority(os.PRIO_PROCESS, 0, nice))
+            actions['priority'] = "set"
+        except OSError:
+            actions['priority'] = "not permitted"
+
+        logging.info(f"Noise control: {actions}")
+    try:
+        yield actions
+    finally:
+        for undo in reversed(restore):
+            try:
+                undo()
+            except OSError as e:
+                logging.warning(f"Noise control: could not restore a setting: {e}")
+
+
+def _work_unit() -> int:
+    total = 0
+    for i in range(2000):
+        total += i
+    return total
+
+
+def _steal() -> tuple[int, int]:
+    # (steal, total) jiffies of all CPUs since boot
+    fields = [int(v) for v in (_read("/proc/stat") or "cpu 0").splitlines()[0].split()[1:]]
+    return (fields[7] if len(fields) > 7 else 0), sum(fields[:8])
+
+
+def probe(settings: dict | None = None) -> dict:
+    # Idle-noise probe: a fixed CPU-bound work unit repeated for `probe_time` seconds on the measuring core.
+    # On a quiet host its duration barely varies; interrupts, other processes, frequency changes and a busy
+    # hypervisor show up as jitter, as a drift from the `baseline` median and as stolen time.
+    settings = {**NOISE, **(settings or {})}
+    baseline = settings["baseline"]
+    switches = resource.getrusage(resource.RUSAGE_SELF).ru_nivcsw
+    steal, total = _steal()
+
+    times = []
+    deadline = time.perf_counter() + settings["probe_time"]
+    while time.perf_counter() < deadline or len(times) < 10:
+        start = time.perf_counter_ns()
+        _work_unit()
+        times.append(time.perf_counter_ns() - start)
+
+    steal_after, total_after = _steal()
+    median = statistics.median(times)
+    result = {
+        'median': median,
+        'jitter': round(statistics.quantiles(times, n=10)[8] / median - 1, 4),
+        'drift': round(median / baseline - 1, 4) if baseline else 0.0,
+        'steal': round((steal_after - steal) / (total_after - total), 4) if total_after > total else 0.0,
+        'involuntary_switches': resource.getrusage(resource.RUSAGE_SELF).ru_nivcsw - switches,
+        'load': round(os.getloadavg()[0], 2),
+    }
+    result['noisy'] = (result['jitter'] > settings["max_jitter"] or abs(result['drift']) > settings["max_drift"]
+                       or result['steal'] > settings["max_steal"])
+    return result
+
+
+def settle(settings: dict | None = None) -> dict:
+    # Probes until the host is quiet, at most `settle` times (at least once); the last probe is returned either way
+    settings = {**NOISE, **(settings or {})}
+    attempts, pause = settings["settle"]
+    result = probe(settings)
+    for _ in range(attempts - 1):
+        if not result['noisy']:
+            break
+        time.sleep(pause)
+        result = probe(settings)
+    return result
+
+
+def with_baseline(settings: dict | None = None) -> dict:
+    # Settings of a run: the first (settled) probe is the baseline of the drift of all the following ones
+    settings = {**NOISE, **(settings or {})}
+    return {**settings, "baseline": settle(settings)['median']}
+
+
+def measure_quietly(measure, store, settings: dict | None = None) -> dict:
+    # measure() between two probes; a measurement with a noisy probe on either side is taken again (fresh,
+    # even if resuming from the sample store, the new run replacing the noisy one) up to `max_reruns` times.
+    # The probes and the verdict go in the result's 'noise' entry.
+    settings = {**NOISE, **(settings or {})}
+    probes, result, noisy = [], {}, False
+    resume = store.resume if store else None
+    try:
+        for attempt in range(settings["max_reruns"] + 1):
+            before = settle(settings)
+            result = measure()
+            after = probe(settings)
+            probes.append({'before': before, 'after': after})
+
+            noisy = before['noisy'] or after['noisy']
+            if not noisy or not result:
+                break
+            print(f"  Host noisy during the measurement (jitter {max(before['jitter'], after['jitter']):.0%}, "
+                  f"drift {max(abs(before['drift']), abs(after['drift'])):.0%}), "
+                  f"{'measuring again' if attempt < settings['max_reruns'] else 'kept as noisy'}.")
+            logging.warning(f"Noisy measurement (attempt {attempt + 1}): {probes[-1]}")
+            if store:
+                store.resume = False
+    finally:
+        if store:
+            store.resume = resume
+
+    if result:
+        result['noise'] = {'noisy': noisy, 'attempts': len(probes), 'probes': probes}
+    return result
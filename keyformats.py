@@ -0,0 +1,141 @@
+import logging
+import statistics
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import benchmark
+from benchmark import generate_key, LibCryptoError
+from libcrypto import load_libcrypto
+from timing import summarize, timed
+from wire import pem_to_der
+
+# Encoding and decoding take microseconds: no bootstrap of the median (and no ci95_median) for these samples
+KEY_FORMATS_TIMING = {"bootstrap": 0}
+
+
+def _cryptography_codecs(private_pem: bytes) -> tuple[dict, dict]:
+    # {(part, format): (encode(key) -> bytes, decode(bytes) -> key)} with `cryptography`, classical keys only.
+    # PEM and DER are PKCS#8 / SubjectPublicKeyInfo; raw is the EC scalar / uncompressed point (RSA has none).
+    private_key = serialization.load_pem_private_key(private_pem, password=None)
+    public_key = private_key.public_key()
+    pkcs8, spki = serialization.PrivateFormat.PKCS8, serialization.PublicFormat.SubjectPublicKeyInfo
+    none = serialization.NoEncryption()
+
+    codecs = {
+        ('private', 'pem'): (lambda k: k.private_bytes(serialization.Encoding.PEM, pkcs8, none),
+                             lambda data: serialization.load_pem_private_key(data, password=None)),
+        ('private', 'der'): (lambda k: k.private_bytes(serialization.Encoding.DER, pkcs8, none),
+                             lambda data: serialization.load_der_private_key(data, password=None)),
+        ('public', 'pem'): (lambda k: k.public_bytes(serialization.Encoding.PEM, spki),
+                            serialization.load_pem_public_key),
+        ('public', 'der'): (lambda k: k.public_bytes(serialization.Encoding.DER, spki),
+                            serialization.load_der_public_key),
+    }
+    if isinstance(private_key, ec.EllipticCurvePrivateKey):
+        curve = private_key.curve
+        codecs[('private', 'raw')] = (
+            lambda k: k.private_numbers().private_value.to_bytes((curve.key_size + 7) // 8, "big"),
+            lambda data: ec.derive_private_key(int.from_bytes(data, "big"), curve))
+        codecs[('public', 'raw')] = (
+            lambda k: k.public_bytes(serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint),
+            lambda data: ec.EllipticCurvePublicKey.from_encoded_point(curve, data))
+    return codecs, {'private': private_key, 'public': public_key}
+
+
+def _libcrypto_codecs(lib, private_pem: bytes) -> tuple[dict, dict]:
+    # Same with libcrypto (and oqsprovider), for every algorithm. Raw encodings exist for PQC keys, not RSA/EC.
+    private_key = lib.load_private_pem(private_pem)
+    public_key = lib.load_public_pem(lib.public_pem(private_key))
+    key_type = lib.key_type(private_key)
+
+    codecs = {
+        ('private', 'pem'): (lib.private_pem, lib.load_private_pem),
+        ('private', 'der'): (lib.private_der, lib.load_private_der),
+        ('public', 'pem'): (lib.public_pem, lib.load_public_pem),
+        ('public', 'der'): (lib.public_der, lib.load_public_der),
+        ('private', 'raw'): (lib.raw_private_key, lambda data: lib.load_raw_private_key(key_type, data)),
+        ('public', 'raw'): (lib.raw_public_key, lambda data: lib.load_raw_public_key(key_type, data)),
+    }
+    return codecs, {'private': private_key, 'public': public_key}
+
+
+def measure_codec(encode, decode, key, iterations: int, release=None) -> dict:
+    encoded, decoded = [], []
+    for _ in range(iterations + 1):
+        data, encode_time = timed(encode, key)
+        parsed, decode_time = timed(decode, data)
+        if release:
+            release(parsed)
+        encoded.append(encode_time)
+        decoded.append(decode_time)
+
+    # The first round (lazy initialisation of decoders and providers) is a warmup
+    return {
+        'size': len(data),
+        'encode': summarize(encoded[1:], KEY_FORMATS_TIMING),
+        'decode': summarize(decoded[1:], KEY_FORMATS_TIMING),
+    }
+
+
+def run_key_formats(algorithms, iterations: int = 200, libraries: tuple = ("cryptography", "libcrypto")) -> dict:
+    # Encode and decode time of the private and public keys of every algorithm in PEM, DER (PKCS#8 / SPKI)
+    # and raw form. Keys come from generate_key(); `cryptography` handles the classical keys, libcrypto all of them.
+    lib = None
+    if "libcrypto" in libraries:
+        try:
+            lib = load_libcrypto(benchmark.libcrypto_path, benchmark.provider_path)
+        except (OSError, LibCryptoError) as e:
+            print(f"libcrypto not available, key formats measured without it: {e}")
+            logging.error(f"Key formats: unable to load libcrypto: \n{e}")
+            libraries = tuple(library for library in libraries if library != "libcrypto")
+    results = {}
+
+    for test, tables in algorithms.items():
+        for category in ['classical', 'pqc']:
+            for algo in tables[category]:
+                algorithm = algo['name']
+                print(f"Algorithm - {algorithm.upper()} ({test} key formats)")
+
+                # ECDSA keys are generated as ECDH ones: the same P-256 key pair
+                key = generate_key("ecdh" if algorithm == "ecdsa" else algorithm, algo.get('key'))
+                if not key:
+                    continue
+
+                for library in libraries:
+                    try:
+                        if library == "cryptography":
+                            if category != "classical":
+                                continue
+                            codecs, keys = _cryptography_codecs(key['private_pem'])
+                            release = None
+                        else:
+                            codecs, keys = _libcrypto_codecs(lib, key['private_pem'])
+                            release = lib.free_key
+                    except (ValueError, LibCryptoError) as e:
+                        logging.error(f"Key formats of {algorithm.upper()} with {library}: \n{e}")
+                        continue
+
+                    measured = {}
+                    for (part, fmt), (encode, decode) in codecs.items():
+                        try:
+                            stats = measure_codec(encode, decode, keys[part], iterations, release)
+                        except (ValueError, LibCryptoError) as e:
+                            logging.info(f"No {fmt} {part} key for {algorithm.upper()} with {library}: {e}")
+                            continue
+                        measured.setdefault(part, {})[fmt] = stats
+                        print(f"  {library:<12} {part:<7} {fmt:<3} {stats['size']:>6} B  "
+                              f"encode {stats['encode']['median'] * 1e6:9.2f} us  "
+                              f"decode {stats['decode']['median'] * 1e6:9.2f} us")
+
+                    if release:
+                        for part_key in keys.values():
+                            release(part_key)
+                    if measured:
+                        results.setdefault(test, {}).setdefault(algorithm, {})[library] = measured
+
+                # PEM armour alone: the base64 decoding that DER input avoids
+                if algorithm in results.get(test, {}):
+                    armour = [timed(pem_to_der, key['private_pem'])[1] for _ in range(iterations)]
+                    results[test][algorithm]['pem_armour_decode'] = round(statistics.median(armour) / 1e9, 9)
+    return results
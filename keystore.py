@@ -0,0 +1,107 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+keystore_path = "./keystore"
+
+
+class KeyStore:
+    # Pre-generated key pairs (PEM), kept on disk across runs. Keys are grouped in cells identified by
+    # (algorithm, parameters, OpenSSL/provider version): a new library version never reuses old keys.
+    # The store holds at most `max_keys` pairs; the least recently used cells are evicted first.
+    def __init__(self, path: str = keystore_path, max_keys: int = 5000):
+        self.path = path
+        self.max_keys = max_keys
+        self.index_path = f"{path}/index.json"
+
+        os.makedirs(path, exist_ok=True)
+        self.index = {}
+
+    @staticmethod
+    def cell_id(algorithm: str, key_size: int | None, version: str) -> str:
+        return hashlib.sha256(f"{algorithm}|{key_size}|{version}".encode()).hexdigest()[:20]
+
+    @contextmanager
+    def _locked(self):
+        # Parallel workers share the store: the index is re-read and rewritten under an exclusive lock
+        with open(f"{self.path}/.lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r') as f:
+                    self.index = json.load(f)
+            yield
+
+    def _save_index(self):
+        with open(f"{self.index_path}.tmp", 'w') as f:
+            json.dump(self.index, f, indent=4)
+        os.replace(f"{self.index_path}.tmp", self.index_path)
+
+    def get(self, algorithm: str, key_size: int | None, version: str, count: int | None = None) -> list:
+        cell = self.cell_id(algorithm, key_size, version)
+        with self._locked():
+            if cell not in self.index:
+                return []
+
+            with open(f"{self.path}/{cell}.json", 'r') as f:
+                pairs = json.load(f)
+
+            self.index[cell]['last_used'] = time.time()
+            self._save_index()
+        return [(private.encode(), public.encode()) for private, public in pairs[:count]]
+
+    def put(self, algorithm: str, key_size: int | None, version: str, pairs: list):
+        cell = self.cell_id(algorithm, key_size, version)
+        with self._locked():
+            stored = []
+            if cell in self.index:
+                with open(f"{self.path}/{cell}.json", 'r') as f:
+                    stored = json.load(f)
+
+            stored += [(private.decode(), public.decode()) for private, public in pairs]
+            with open(f"{self.path}/{cell}.json", 'w') as f:
+                json.dump(stored, f)
+
+            self.index[cell] = {
+                'algorithm': algorithm,
+                'key_size': key_size,
+                'version': version,
+                'keys': len(stored),
+                'last_used': time.time()
+            }
+            self._evict(keep=cell)
+            self._save_index()
+
+    def _evict(self, keep: str):
+        total = sum(entry['keys'] for entry in self.index.values())
+        for cell in sorted(self.index, key=lambda c: self.index[c]['last_used']):
+            if total <= self.max_keys:
+                break
+            if cell == keep:
+                continue
+
+            total -= self.index[cell]['keys']
+            logging.info(f"Keystore: evicting {self.index[cell]['keys']} {self.index[cell]['algorithm']} keys")
+            os.remove(f"{self.path}/{cell}.json")
+            del self.index[cell]
+
+
+def key_pool(impl, keystore: KeyStore | None, algorithm: str, key_size: int | None, test: str, size: int) -> list:
+    # `size` loaded keys for the operation benchmarks: cached ones first, the missing ones are generated
+    # (untimed) and added to the store
+    version = impl.version()
+    pairs = keystore.get(algorithm, key_size, version, size) if keystore else []
+
+    generated = []
+    for _ in range(size - len(pairs)):
+        key = impl.generate_key(algorithm, key_size, test)
+        generated.append(impl.export_key(key))
+        impl.release_key(key)
+    if keystore and generated:
+        keystore.put(algorithm, key_size, version, generated)
+
+    logging.info(f"Key pool for {algorithm.upper()}: {len(pairs)} cached, {len(generated)} generated.")
+    return [impl.import_key(algorithm, private, public, test) for private, public in pairs + generated]
@@ -0,0 +1,509 @@
+import ctypes
+import logging
+
+# In-process access to OpenSSL 3 through ctypes: libcrypto and the oqsprovider are
+# loaded once per process and every operation is a plain EVP_PKEY call.
+# NOTE: OpenSSL must be built as a shared library (drop `no-shared` from ./Configure).
+libcrypto_path = "/opt/openssl-3.3.2/lib64/libcrypto.so.3"
+
+RSA_PKCS1_PSS_PADDING = 6
+RSA_PSS_SALTLEN_MAX = -3
+BIO_CTRL_INFO = 3
+OSSL_PARAM_UTF8_PTR = 6
+SSL_CTRL_SET_GROUPS_LIST = 92
+SSL_CTRL_SET_MIN_PROTO_VERSION = 123
+SSL_CTRL_SET_MAX_PROTO_VERSION = 124
+TLS1_3_VERSION = 0x0304
+X509_V_FLAG_PARTIAL_CHAIN = 0x80000
+
+_loaded = {}
+
+
+class LibCryptoError(Exception):
+    pass
+
+
+class OSSL_PARAM(ctypes.Structure):
+    _fields_ = [
+        ("key", ctypes.c_char_p),
+        ("data_type", ctypes.c_uint),
+        ("data", ctypes.c_void_p),
+        ("data_size", ctypes.c_size_t),
+        ("return_size", ctypes.c_size_t),
+    ]
+
+
+def _prototypes(lib):
+    p, i, ul, sz, c = ctypes.c_void_p, ctypes.c_int, ctypes.c_ulong, ctypes.c_size_t, ctypes.c_char_p
+    sz_p, p_p = ctypes.POINTER(ctypes.c_size_t), ctypes.POINTER(ctypes.c_void_p)
+
+    signatures = {
+        "OpenSSL_version": (c, [i]),
+        "ERR_peek_last_error": (ul, []),
+        "ERR_clear_error": (None, []),
+        "ERR_error_string_n": (None, [ul, c, sz]),
+        "OSSL_PROVIDER_set_default_search_path": (i, [p, c]),
+        "OSSL_PROVIDER_load": (p, [p, c]),
+        "OSSL_PROVIDER_unload": (i, [p]),
+        "OSSL_PROVIDER_get_params": (i, [p, p]),
+        "EVP_PKEY_CTX_new_from_name": (p, [p, c, c]),
+        "EVP_PKEY_CTX_new_from_pkey": (p, [p, p, c]),
+        "EVP_PKEY_CTX_free": (None, [p]),
+        "EVP_PKEY_keygen_init": (i, [p]),
+        "EVP_PKEY_CTX_set_rsa_keygen_bits": (i, [p, i]),
+        "EVP_PKEY_CTX_set_group_name": (i, [p, c]),
+        "EVP_PKEY_generate": (i, [p, p_p]),
+        "EVP_PKEY_free": (None, [p]),
+        "EVP_PKEY_CTX_set_kem_op": (i, [p, c]),
+        "EVP_PKEY_encapsulate_init": (i, [p, p]),
+        "EVP_PKEY_encapsulate": (i, [p, c, sz_p, c, sz_p]),
+        "EVP_PKEY_decapsulate_init": (i, [p, p]),
+        "EVP_PKEY_decapsulate": (i, [p, c, sz_p, c, sz]),
+        "EVP_PKEY_derive_init": (i, [p]),
+        "EVP_PKEY_derive_set_peer": (i, [p, p]),
+        "EVP_PKEY_derive": (i, [p, c, sz_p]),
+        "EVP_PKEY_CTX_set_rsa_padding": (i, [p, i]),
+        "EVP_PKEY_CTX_set_rsa_pss_saltlen": (i, [p, i]),
+        "EVP_MD_CTX_new": (p, []),
+        "EVP_MD_CTX_free": (None, [p]),
+        "EVP_DigestSignInit_ex": (i, [p, p_p, c, p, c, p, p]),
+        "EVP_DigestSign": (i, [p, c, sz_p, c, sz]),
+        "EVP_DigestVerifyInit_ex": (i, [p, p_p, c, p, c, p, p]),
+        "EVP_DigestVerify": (i, [p, c, sz, c, sz]),
+        "EVP_DigestSignUpdate": (i, [p, p, sz]),
+        "EVP_DigestSignFinal": (i, [p, c, sz_p]),
+        "EVP_DigestVerifyUpdate": (i, [p, p, sz]),
+        "EVP_DigestVerifyFinal": (i, [p, c, sz]),
+        "BIO_s_mem": (p, []),
+        "BIO_new": (p, [p]),
+        "BIO_new_mem_buf": (p, [c, i]),
+        "BIO_ctrl": (ctypes.c_long, [p, i, ctypes.c_long, p]),
+        "BIO_free": (i, [p]),
+        "BIO_number_read": (ctypes.c_uint64, [p]),
+        "BIO_number_written": (ctypes.c_uint64, [p]),
+        "PEM_write_bio_PrivateKey": (i, [p, p, p, c, i, p, p]),
+        "PEM_write_bio_PUBKEY": (i, [p, p]),
+        "PEM_read_bio_PrivateKey_ex": (p, [p, p, p, p, p, c]),
+        "PEM_read_bio_PUBKEY_ex": (p, [p, p, p, p, p, c]),
+        "i2d_PKCS8PrivateKey_bio": (i, [p, p, p, c, i, p, p]),
+        "i2d_PUBKEY_bio": (i, [p, p]),
+        "d2i_PrivateKey_ex_bio": (p, [p, p, p, c]),
+        "d2i_PUBKEY_ex": (p, [p, ctypes.POINTER(c), ctypes.c_long, p, c]),
+        "EVP_PKEY_get0_type_name": (c, [p]),
+        "EVP_PKEY_get_raw_private_key": (i, [p, c, sz_p]),
+        "EVP_PKEY_get_raw_public_key": (i, [p, c, sz_p]),
+        "EVP_PKEY_new_raw_private_key_ex": (p, [p, c, c, c, sz]),
+        "EVP_PKEY_new_raw_public_key_ex": (p, [p, c, c, c, sz]),
+        "PEM_read_bio_X509": (p, [p, p, p, p]),
+        "X509_free": (None, [p]),
+        "X509_STORE_new": (p, []),
+        "X509_STORE_free": (None, [p]),
+        "X509_STORE_add_cert": (i, [p, p]),
+        "X509_STORE_set_flags": (i, [p, ul]),
+        "X509_STORE_CTX_new": (p, []),
+        "X509_STORE_CTX_free": (None, [p]),
+        "X509_STORE_CTX_init": (i, [p, p, p, p]),
+        "X509_STORE_CTX_get_error": (i, [p]),
+        "X509_verify_cert": (i, [p]),
+        "X509_verify_cert_error_string": (c, [ctypes.c_long]),
+        "OPENSSL_sk_new_null": (p, []),
+        "OPENSSL_sk_push": (i, [p, p]),
+        "OPENSSL_sk_free": (None, [p]),
+    }
+    for name, (restype, argtypes) in signatures.items():
+        func = getattr(lib, name)
+        func.restype = restype
+        func.argtypes = argtypes
+
+
+class LibCrypto:
+    def __init__(self, lib_path: str = libcrypto_path, provider_path: str | None = None,
+                 providers: tuple = ("default", "oqsprovider")):
+        self.lib = ctypes.CDLL(lib_path)
+        _prototypes(self.lib)
+
+        if provider_path:
+            self._check(self.lib.OSSL_PROVIDER_set_default_search_path(None, provider_path.encode()),
+                        "OSSL_PROVIDER_set_default_search_path")
+
+        self.providers = {}
+        for name in providers:
+            handle = self.lib.OSSL_PROVIDER_load(None, name.encode())
+            if not handle:
+                raise LibCryptoError(f"Unable to load provider '{name}': {self._error()}")
+            self.providers[name] = handle
+
+        self.version = self.lib.OpenSSL_version(0).decode()
+        logging.info(f"{self.version} loaded in-process from {lib_path} (providers: {', '.join(providers)}).")
+
+    # - - - - - - - - - - - - - - - - - - - Helpers - - - - - - - - - - - - - - - - - - -
+    def _error(self) -> str:
+        code = self.lib.ERR_peek_last_error()
+        self.lib.ERR_clear_error()
+        if not code:
+            return "no OpenSSL error queued"
+        buf = ctypes.create_string_buffer(256)
+        self.lib.ERR_error_string_n(code, buf, len(buf))
+        return buf.value.decode()
+
+    def _check(self, ret: int, func: str):
+        if ret <= 0:
+            raise LibCryptoError(f"{func} failed: {self._error()}")
+
+    def _pkey_ctx(self, pkey):
+        ctx = self.lib.EVP_PKEY_CTX_new_from_pkey(None, pkey, None)
+        if not ctx:
+            raise LibCryptoError(f"EVP_PKEY_CTX_new_from_pkey failed: {self._error()}")
+        return ctx
+
+    def _write_bio(self, writer, *args) -> bytes:
+        bio = self.lib.BIO_new(self.lib.BIO_s_mem())
+        try:
+            self._check(writer(bio, *args), writer.__name__)
+            data = ctypes.c_void_p()
+            length = self.lib.BIO_ctrl(bio, BIO_CTRL_INFO, 0, ctypes.byref(data))
+            return ctypes.string_at(data, length)
+        finally:
+            self.lib.BIO_free(bio)
+
+    def provider_version(self, name: str) -> str:
+        version = ctypes.c_char_p()
+        params = (OSSL_PARAM * 2)()
+        params[0] = OSSL_PARAM(b"version", OSSL_PARAM_UTF8_PTR,
+                               ctypes.cast(ctypes.byref(version), ctypes.c_void_p), 0, 0)
+        self._check(self.lib.OSSL_PROVIDER_get_params(self.providers[name], params), "OSSL_PROVIDER_get_params")
+        return version.value.decode() if version.value else "unknown"
+
+    # - - - - - - - - - - - - - - - - - - Key management - - - - - - - - - - - - - - - - - -
+    def generate_key(self, name: str, bits: int | None = None, group: str | None = None):
+        ctx = self.lib.EVP_PKEY_CTX_new_from_name(None, name.encode(), None)
+        if not ctx:
+            raise LibCryptoError(f"Algorithm '{name}' not available: {self._error()}")
+        try:
+            self._check(self.lib.EVP_PKEY_keygen_init(ctx), "EVP_PKEY_keygen_init")
+            if bits:
+                self._check(self.lib.EVP_PKEY_CTX_set_rsa_keygen_bits(ctx, bits), "EVP_PKEY_CTX_set_rsa_keygen_bits")
+            if group:
+                self._check(self.lib.EVP_PKEY_CTX_set_group_name(ctx, group.encode()), "EVP_PKEY_CTX_set_group_name")
+
+            pkey = ctypes.c_void_p()
+            self._check(self.lib.EVP_PKEY_generate(ctx, ctypes.byref(pkey)), "EVP_PKEY_generate")
+            return pkey
+        finally:
+            self.lib.EVP_PKEY_CTX_free(ctx)
+
+    def free_key(self, pkey):
+        self.lib.EVP_PKEY_free(pkey)
+
+    def private_pem(self, pkey) -> bytes:
+        return self._write_bio(self.lib.PEM_write_bio_PrivateKey, pkey, None, None, 0, None, None)
+
+    def public_pem(self, pkey) -> bytes:
+        return self._write_bio(self.lib.PEM_write_bio_PUBKEY, pkey)
+
+    def _read_bio(self, read, data: bytes, *args):
+        bio = self.lib.BIO_new_mem_buf(data, len(data))
+        try:
+            pkey = read(bio, *args)
+            if not pkey:
+                raise LibCryptoError(f"{read.__name__} failed: {self._error()}")
+            return ctypes.c_void_p(pkey)
+        finally:
+            self.lib.BIO_free(bio)
+
+    def load_private_pem(self, pem: bytes):
+        return self._read_bio(self.lib.PEM_read_bio_PrivateKey_ex, pem, None, None, None, None, None)
+
+    def load_public_pem(self, pem: bytes):
+        return self._read_bio(self.lib.PEM_read_bio_PUBKEY_ex, pem, None, None, None, None, None)
+
+    def private_der(self, pkey) -> bytes:
+        return self._write_bio(self.lib.i2d_PKCS8PrivateKey_bio, pkey, None, None, 0, None, None)
+
+    def public_der(self, pkey) -> bytes:
+        return self._write_bio(self.lib.i2d_PUBKEY_bio, pkey)
+
+    def load_private_der(self, der: bytes):
+        return self._read_bio(self.lib.d2i_PrivateKey_ex_bio, der, None, None, None)
+
+    def load_public_der(self, der: bytes):
+        data = ctypes.c_char_p(der)
+        pkey = self.lib.d2i_PUBKEY_ex(None, ctypes.byref(data), len(der), None, None)
+        if not pkey:
+            raise LibCryptoError(f"d2i_PUBKEY_ex failed: {self._error()}")
+        return ctypes.c_void_p(pkey)
+
+    def _raw(self, getter, pkey) -> bytes:
+        # Only for key types with a raw encoding (X25519, Ed25519, most PQC keys), not for RSA or EC
+        length = ctypes.c_size_t()
+        self._check(getter(pkey, None, ctypes.byref(length)), getter.__name__)
+        buf = ctypes.create_string_buffer(length.value)
+        self._check(getter(pkey, buf, ctypes.byref(length)), getter.__name__)
+        return buf.raw[:length.value]
+
+    def raw_private_key(self, pkey) -> bytes:
+        return self._raw(self.lib.EVP_PKEY_get_raw_private_key, pkey)
+
+    def raw_public_key(self, pkey) -> bytes:
+        return self._raw(self.lib.EVP_PKEY_get_raw_public_key, pkey)
+
+    def _load_raw(self, new, key_type: str, raw: bytes):
+        pkey = new(None, key_type.encode(), None, raw, len(raw))
+        if not pkey:
+            raise LibCryptoError(f"{new.__name__} failed: {self._error()}")
+        return ctypes.c_void_p(pkey)
+
+    def load_raw_private_key(self, key_type: str, raw: bytes):
+        return self._load_raw(self.lib.EVP_PKEY_new_raw_private_key_ex, key_type, raw)
+
+    def load_raw_public_key(self, key_type: str, raw: bytes):
+        return self._load_raw(self.lib.EVP_PKEY_new_raw_public_key_ex, key_type, raw)
+
+    def key_type(self, pkey) -> str:
+        return self.lib.EVP_PKEY_get0_type_name(pkey).decode()
+
+    # - - - - - - - - - - - - - - - - - - - - KEM - - - - - - - - - - - - - - - - - - - -
+    def encapsulate(self, pkey, kem_op: str | None = None) -> tuple[bytes, bytes]:
+        ctx = self._pkey_ctx(pkey)
+        try:
+            self._check(self.lib.EVP_PKEY_encapsulate_init(ctx, None), "EVP_PKEY_encapsulate_init")
+            if kem_op:
+                self._check(self.lib.EVP_PKEY_CTX_set_kem_op(ctx, kem_op.encode()), "EVP_PKEY_CTX_set_kem_op")
+
+            ct_len, secret_len = ctypes.c_size_t(), ctypes.c_size_t()
+            self._check(self.lib.EVP_PKEY_encapsulate(ctx, None, ctypes.byref(ct_len), None, ctypes.byref(secret_len)),
+                        "EVP_PKEY_encapsulate")
+            ciphertext = ctypes.create_string_buffer(ct_len.value)
+            secret = ctypes.create_string_buffer(secret_len.value)
+            self._check(self.lib.EVP_PKEY_encapsulate(ctx, ciphertext, ctypes.byref(ct_len),
+                                                      secret, ctypes.byref(secret_len)),
+                        "EVP_PKEY_encapsulate")
+            return ciphertext.raw[:ct_len.value], secret.raw[:secret_len.value]
+        finally:
+            self.lib.EVP_PKEY_CTX_free(ctx)
+
+    def decapsulate(self, pkey, ciphertext: bytes, kem_op: str | None = None) -> bytes:
+        ctx = self._pkey_ctx(pkey)
+        try:
+            self._check(self.lib.EVP_PKEY_decapsulate_init(ctx, None), "EVP_PKEY_decapsulate_init")
+            if kem_op:
+                self._check(self.lib.EVP_PKEY_CTX_set_kem_op(ctx, kem_op.encode()), "EVP_PKEY_CTX_set_kem_op")
+
+            secret_len = ctypes.c_size_t()
+            self._check(self.lib.EVP_PKEY_decapsulate(ctx, None, ctypes.byref(secret_len), ciphertext, len(ciphertext)),
+                        "EVP_PKEY_decapsulate")
+            secret = ctypes.create_string_buffer(secret_len.value)
+            self._check(self.lib.EVP_PKEY_decapsulate(ctx, secret, ctypes.byref(secret_len), ciphertext, len(ciphertext)),
+                        "EVP_PKEY_decapsulate")
+            return secret.raw[:secret_len.value]
+        finally:
+            self.lib.EVP_PKEY_CTX_free(ctx)
+
+    def derive(self, pkey, peer) -> bytes:
+        ctx = self._pkey_ctx(pkey)
+        try:
+            self._check(self.lib.EVP_PKEY_derive_init(ctx), "EVP_PKEY_derive_init")
+            self._check(self.lib.EVP_PKEY_derive_set_peer(ctx, peer), "EVP_PKEY_derive_set_peer")
+
+            secret_len = ctypes.c_size_t()
+            self._check(self.lib.EVP_PKEY_derive(ctx, None, ctypes.byref(secret_len)), "EVP_PKEY_derive")
+            secret = ctypes.create_string_buffer(secret_len.value)
+            self._check(self.lib.EVP_PKEY_derive(ctx, secret, ctypes.byref(secret_len)), "EVP_PKEY_derive")
+            return secret.raw[:secret_len.value]
+        finally:
+            self.lib.EVP_PKEY_CTX_free(ctx)
+
+    # - - - - - - - - - - - - - - - - - - - Signatures - - - - - - - - - - - - - - - - - - -
+    def _md_init(self, init, pkey, digest: str | None, pss: bool):
+        mctx = self.lib.EVP_MD_CTX_new()
+        pctx = ctypes.c_void_p()
+        try:
+            self._check(init(mctx, ctypes.byref(pctx), digest.encode() if digest else None, None, None, pkey, None),
+                        init.__name__)
+            if pss:
+                self._check(self.lib.EVP_PKEY_CTX_set_rsa_padding(pctx, RSA_PKCS1_PSS_PADDING),
+                            "EVP_PKEY_CTX_set_rsa_padding")
+                self._check(self.lib.EVP_PKEY_CTX_set_rsa_pss_saltlen(pctx, RSA_PSS_SALTLEN_MAX),
+                            "EVP_PKEY_CTX_set_rsa_pss_saltlen")
+        except LibCryptoError:
+            self.lib.EVP_MD_CTX_free(mctx)
+            raise
+        return mctx
+
+    def sign(self, pkey, message: bytes, digest: str | None = "SHA256", pss: bool = False) -> bytes:
+        mctx = self._md_init(self.lib.EVP_DigestSignInit_ex, pkey, digest, pss)
+        try:
+            sig_len = ctypes.c_size_t()
+            self._check(self.lib.EVP_DigestSign(mctx, None, ctypes.byref(sig_len), message, len(message)),
+                        "EVP_DigestSign")
+            signature = ctypes.create_string_buffer(sig_len.value)
+            self._check(self.lib.EVP_DigestSign(mctx, signature, ctypes.byref(sig_len), message, len(message)),
+                        "EVP_DigestSign")
+            return signature.raw[:sig_len.value]
+        finally:
+            self.lib.EVP_MD_CTX_free(mctx)
+
+    def verify(self, pkey, message: bytes, signature: bytes, digest: str | None = "SHA256", pss: bool = False) -> bool:
+        mctx = self._md_init(self.lib.EVP_DigestVerifyInit_ex, pkey, digest, pss)
+        try:
+            ret = self.lib.EVP_DigestVerify(mctx, signature, len(signature), message, len(message))
+            if ret < 0:
+                raise LibCryptoError(f"EVP_DigestVerify failed: {self._error()}")
+            if ret == 0:
+                self.lib.ERR_clear_error()
+            return ret == 1
+        finally:
+            self.lib.EVP_MD_CTX_free(mctx)
+
+    def _update(self, update, mctx, chunks):
+        # Chunks are writable buffers (e.g. views on a reused bytearray), handed to OpenSSL without copies
+        for chunk in chunks:
+            data = (ctypes.c_char * len(chunk)).from_buffer(chunk)
+            self._check(update(mctx, data, len(chunk)), update.__name__)
+            del data
+
+    def sign_stream(self, pkey, chunks, digest: str = "SHA256", pss: bool = False) -> bytes:
+        mctx = self._md_init(self.lib.EVP_DigestSignInit_ex, pkey, digest, pss)
+        try:
+            self._update(self.lib.EVP_DigestSignUpdate, mctx, chunks)
+            sig_len = ctypes.c_size_t()
+            self._check(self.lib.EVP_DigestSignFinal(mctx, None, ctypes.byref(sig_len)), "EVP_DigestSignFinal")
+            signature = ctypes.create_string_buffer(sig_len.value)
+            self._check(self.lib.EVP_DigestSignFinal(mctx, signature, ctypes.byref(sig_len)), "EVP_DigestSignFinal")
+            return signature.raw[:sig_len.value]
+        finally:
+            self.lib.EVP_MD_CTX_free(mctx)
+
+    def verify_stream(self, pkey, chunks, signature: bytes, digest: str = "SHA256", pss: bool = False) -> bool:
+        mctx = self._md_init(self.lib.EVP_DigestVerifyInit_ex, pkey, digest, pss)
+        try:
+            self._update(self.lib.EVP_DigestVerifyUpdate, mctx, chunks)
+            ret = self.lib.EVP_DigestVerifyFinal(mctx, signature, len(signature))
+            if ret < 0:
+                raise LibCryptoError(f"EVP_DigestVerifyFinal failed: {self._error()}")
+            if ret == 0:
+                self.lib.ERR_clear_error()
+            return ret == 1
+        finally:
+            self.lib.EVP_MD_CTX_free(mctx)
+
+    # - - - - - - - - - - - - - - - - - - - - X.509 - - - - - - - - - - - - - - - - - - - -
+    def load_certificate(self, pem: bytes):
+        return self._read_bio(self.lib.PEM_read_bio_X509, pem, None, None, None)
+
+    def free_certificate(self, cert):
+        self.lib.X509_free(cert)
+
+    def certificate_store(self, trusted: list, partial_chain: bool = False):
+        # Trust anchors for verify_certificate(). With `partial_chain` a trusted intermediate ends the chain:
+        # its own signature (and the root above it) is not checked again.
+        store = self.lib.X509_STORE_new()
+        if not store:
+            raise LibCryptoError(f"X509_STORE_new failed: {self._error()}")
+        try:
+            for cert in trusted:
+                self._check(self.lib.X509_STORE_add_cert(store, cert), "X509_STORE_add_cert")
+            if partial_chain:
+                self._check(self.lib.X509_STORE_set_flags(store, X509_V_FLAG_PARTIAL_CHAIN), "X509_STORE_set_flags")
+        except LibCryptoError:
+            self.lib.X509_STORE_free(store)
+            raise
+        return ctypes.c_void_p(store)
+
+    def free_store(self, store):
+        self.lib.X509_STORE_free(store)
+
+    def verify_certificate(self, store, cert, untrusted: list = ()) -> bool:
+        # Path building and validation of `cert` against `store`, with the `untrusted` intermediates as sent by a peer
+        chain = self.lib.OPENSSL_sk_new_null()
+        ctx = self.lib.X509_STORE_CTX_new()
+        try:
+            for intermediate in untrusted:
+                self.lib.OPENSSL_sk_push(chain, intermediate)
+            self._check(self.lib.X509_STORE_CTX_init(ctx, store, cert, chain), "X509_STORE_CTX_init")
+            if self.lib.X509_verify_cert(ctx) != 1:
+                error = self.lib.X509_verify_cert_error_string(self.lib.X509_STORE_CTX_get_error(ctx)).decode()
+                logging.debug(f"Certificate verification failed: {error}")
+                self.lib.ERR_clear_error()
+                return False
+            return True
+        finally:
+            self.lib.X509_STORE_CTX_free(ctx)
+            self.lib.OPENSSL_sk_free(chain)
+
+
+class LibSSL:
+    # Minimal TLS client on top of libssl: it shares the process (and so the providers loaded by
+    # LibCrypto), which makes PQC and hybrid groups and PQC server certificates available
+    def __init__(self, libcrypto: LibCrypto, lib_path: str):
+        self.crypto = libcrypto
+        self.lib = ctypes.CDLL(lib_path)
+
+        p, i, c = ctypes.c_void_p, ctypes.c_int, ctypes.c_char_p
+        signatures = {
+            "TLS_client_method": (p, []),
+            "SSL_CTX_new": (p, [p]),
+            "SSL_CTX_free": (None, [p]),
+            "SSL_CTX_ctrl": (ctypes.c_long, [p, i, ctypes.c_long, p]),
+            "SSL_new": (p, [p]),
+            "SSL_free": (None, [p]),
+            "SSL_set_fd": (i, [p, i]),
+            "SSL_connect": (i, [p]),
+            "SSL_shutdown": (i, [p]),
+            "SSL_get_error": (i, [p, i]),
+            "SSL_get_rbio": (p, [p]),
+        }
+        for name, (restype, argtypes) in signatures.items():
+            func = getattr(self.lib, name)
+            func.restype = restype
+            func.argtypes = argtypes
+
+    def client_context(self, groups: str):
+        ctx = self.lib.SSL_CTX_new(self.lib.TLS_client_method())
+        if not ctx:
+            raise LibCryptoError(f"SSL_CTX_new failed: {self.crypto._error()}")
+        try:
+            for cmd, value in ((SSL_CTRL_SET_MIN_PROTO_VERSION, TLS1_3_VERSION),
+                               (SSL_CTRL_SET_MAX_PROTO_VERSION, TLS1_3_VERSION)):
+                self.crypto._check(self.lib.SSL_CTX_ctrl(ctx, cmd, value, None), "SSL_CTX_ctrl")
+            self.crypto._check(self.lib.SSL_CTX_ctrl(ctx, SSL_CTRL_SET_GROUPS_LIST, 0, ctypes.c_char_p(groups.encode())),
+                               f"SSL_CTX_set1_groups_list({groups})")
+        except LibCryptoError:
+            self.lib.SSL_CTX_free(ctx)
+            raise
+        return ctx
+
+    def free_context(self, ctx):
+        self.lib.SSL_CTX_free(ctx)
+
+    def handshake(self, ctx, fd: int) -> tuple[int, int]:
+        # Full TLS 1.3 handshake (no session resumption) on a connected socket.
+        # Returns the bytes received and sent by the client during the handshake.
+        ssl = self.lib.SSL_new(ctx)
+        try:
+            self.lib.SSL_set_fd(ssl, fd)
+            ret = self.lib.SSL_connect(ssl)
+            if ret != 1:
+                raise LibCryptoError(f"SSL_connect failed (SSL error {self.lib.SSL_get_error(ssl, ret)}): "
+                                     f"{self.crypto._error()}")
+            bio = self.lib.SSL_get_rbio(ssl)
+            received, sent = self.crypto.lib.BIO_number_read(bio), self.crypto.lib.BIO_number_written(bio)
+            self.lib.SSL_shutdown(ssl)
+            return received, sent
+        finally:
+            self.lib.SSL_free(ssl)
+
+
+def load_libcrypto(lib_path: str = libcrypto_path, provider_path: str | None = None,
+                   providers: tuple = ("default", "oqsprovider")) -> LibCrypto:
+    # libcrypto and its providers are loaded only once per process
+    key = (lib_path, provider_path, providers)
+    if key not in _loaded:
+        _loaded[key] = LibCrypto(lib_path, provider_path, providers)
+    return _loaded[key]
+
+
+def load_libssl(lib_path: str, libcrypto: LibCrypto) -> LibSSL:
+    if lib_path not in _loaded:
+        _loaded[lib_path] = LibSSL(libcrypto, lib_path)
+    return _loaded[lib_path]
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import random
+import statistics
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmark import get_backend, LibCryptoError
+from scheduler import available_cores, fork_context
+from timing import summarize, histogram
+
+OPERATIONS = {
+    "KEM": ["encapsulation", "decapsulation"],
+    "SIGNATURE": ["signing", "verification"],
+}
+
+# Offered loads, as fractions of the capacity estimated from the service time of a single request
+LOAD_FACTORS = (0.1, 0.25, 0.5, 0.75, 0.9, 1.0, 1.1, 1.25)
+
+# Every request is kept (queueing delays are the point, not outliers); fewer resamples for the larger sets
+LOAD_STATS = {"outlier_factor": 0, "bootstrap": 100}
+
+_state = {}
+
+
+def _init_worker(algorithm: str, key_size: int | None, test: str, message: bytes | None, backend: str):
+    # Every worker prepares its key (and the ciphertext / signature to decapsulate / verify) once
+    impl = get_backend(backend)
+    key = impl.generate_key(algorithm, key_size, test)
+    _state.update(impl=impl, algorithm=algorithm, key=key, message=message)
+    if test == "KEM":
+        _state['ciphertext'] = impl.encapsulate(algorithm, key)
+    else:
+        _state['signature'] = impl.sign(algorithm, key, message)
+
+
+def _serve(operation: str) -> int:
+    impl, algorithm, key = _state['impl'], _state['algorithm'], _state['key']
+    start = time.perf_counter_ns()
+    if operation == "encapsulation":
+        impl.encapsulate(algorithm, key)
+    elif operation == "decapsulation":
+        impl.decapsulate(algorithm, key, _state['ciphertext'])
+    elif operation == "signing":
+        impl.sign(algorithm, key, _state['message'])
+    elif operation == "verification":
+        if not impl.verify(algorithm, key, _state['message'], _state['signature']):
+            raise RuntimeError(f"Verification of a valid {algorithm.upper()} signature failed.")
+    return time.perf_counter_ns() - start
+
+
+def timed_request(pool, operation: str) -> float:
+    start = time.perf_counter()
+    pool.submit(_serve, operation).result()
+    return time.perf_counter() - start
+
+
+async def _open_loop(pool, operation: str, rate: float, duration: float, seed: int) -> tuple[list, list, float, float]:
+    # Open loop: requests arrive following a Poisson process at `rate` per second, whether or not the
+    # previous ones completed. Latency runs from the scheduled arrival to the response, so it includes queueing
+    # and any lag of the generator itself (a request created late still counts from when it was due).
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+    latencies, services = [], []
+
+    async def request(arrival: int):
+        service = await loop.run_in_executor(pool, _serve, operation)
+        latencies.append(time.perf_counter_ns() - arrival)
+        services.append(service)
+
+    tasks = []
+    start = time.perf_counter()
+    next_arrival = start
+    while next_arrival - start < duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(request(int(next_arrival * 1e9))))
+        next_arrival += rng.expovariate(rate)
+    arrivals = time.perf_counter() - start
+
+    # Requests still queued when arrivals stop are drained, their waiting time is part of the picture
+    await asyncio.gather(*tasks)
+    return latencies, services, arrivals, time.perf_counter() - start
+
+
+def measure_load(pool, operation: str, rate: float, duration: float, seed: int = 0) -> dict:
+    latencies, services, arrivals, elapsed = asyncio.run(_open_loop(pool, operation, rate, duration, seed))
+    queueing = [latency - service for latency, service in zip(latencies, services)]
+    return {
+        'offered_rate': round(rate, 3),
+        'arrival_rate': round(len(latencies) / arrivals, 3),
+        'achieved_rate': round(len(latencies) / elapsed, 3),
+        'requests': len(latencies),
+        'latency': summarize(latencies, LOAD_STATS),
+        'queueing': summarize(queueing, LOAD_STATS),
+        'service': summarize(services, LOAD_STATS),
+        'latency_histogram': histogram(latencies),
+    }
+
+
+def saturated(point: dict) -> bool:
+    # The workers no longer keep up: the backlog left when arrivals stop takes more than 5% of the run to drain.
+    # Compared with the arrivals actually drawn, not the nominal rate, so that Poisson noise is not saturation.
+    return point['achieved_rate'] < 0.95 * point['arrival_rate']
+
+
+def run_load_test(algorithms, test: str, message: bytes | None, backend: str = "cli", duration: float = 10.0,
+                  workers: int | None = None, load_factors: tuple = LOAD_FACTORS) -> dict:
+    workers = workers or len(available_cores())
+    results = {}
+
+    for category in ['classical', 'pqc']:
+        for algo in algorithms[category]:
+            algorithm = algo['name']
+            key_size = algo.get('key') if test == "KEM" or category == "classical" else None
+            print(f"Algorithm - {algorithm.upper()} (open-loop load, {workers} workers)")
+
+            try:
+                with ProcessPoolExecutor(workers, mp_context=fork_context, initializer=_init_worker,
+                                         initargs=(algorithm, key_size, test, message, backend)) as pool:
+                    for operation in OPERATIONS[test]:
+                        if algorithm == "ecdh" and operation == "decapsulation":
+                            continue
+
+                        # Capacity estimate: `workers` requests in flight, each taking the median round trip
+                        round_trips = [timed_request(pool, operation) for _ in range(20)]
+                        capacity = workers / statistics.median(round_trips)
+
+                        curve = []
+                        for factor in load_factors:
+                            point = measure_load(pool, operation, factor * capacity, duration)
+                            point['saturated'] = saturated(point)
+                            curve.append(point)
+                            print(f"  {operation:<14} offered {point['offered_rate']:10.1f}/s, "
+                                  f"achieved {point['achieved_rate']:10.1f}/s, "
+                                  f"p99 {point['latency']['p99'] * 1e3:9.3f} ms"
+                                  f"{'  (saturated)' if point['saturated'] else ''}")
+
+                        saturation = next((p['offered_rate'] for p in curve if p['saturated']), None)
+                        results.setdefault(algorithm, {})[operation] = {
+                            'capacity_estimate': round(capacity, 3),
+                            'saturation_rate': saturation,
+                            'loads': curve
+                        }
+            except (RuntimeError, LibCryptoError, subprocess.CalledProcessError, OSError) as e:
+                print(f"Error in load test for {algorithm.upper()}: {e}")
+                logging.error(f"Error in load test for {algorithm.upper()}: \n{e}")
+    return results
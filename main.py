@@ -1,53 +1,175 @@
-from benchmark import run_benchmark, save_results, plot_benchmark, plot_key_sizes
+from benchmark import run_benchmark, save_results, results_path, plot_benchmark, plot_key_sizes, plot_scaling, \
+    plot_message_sweep, plot_memory
+from scheduler import run_parallel
+from throughput import run_throughput
+from keystore import KeyStore
+from store import SampleStore
+from sweep import run_message_sweep, message_sizes
+from tls import run_tls_benchmark
+from loadgen import run_load_test
+from wire import cost_model, print_cost_model, LINKS
+from batch import run_batch_verification
+from keyformats import run_key_formats
+from ablation import run_ablation
+from provision import run_provisioning
+from registry import ALGORITHMS, algorithms_table, rsa_bits, selection
+from report import build_report
+from hostenv import NOISE
+from soak import run_soak
+from pki import run_pki_benchmark
+from functools import partial
 import json
 
 execute = {
     "benchmark": False,
+    "discover": False,  # True: every algorithm oqsprovider offers (see registry.py), or a regex on their names
     "plot": True,
+    "report": False,  # static HTML report of ./results (charts rendered headless, in parallel) in results/report/
+    "backends": ["cli"],  # "cli" (one openssl process per operation) and/or "libcrypto" (in-process)
+    "phase": "all",  # "all", "keygen" (key generation only) or "ops" (operations on cached keys, see keystore.py)
+    "resume": True,  # skip the algorithms already measured in this environment (raw samples in results/samples.jsonl)
+    "workers": 1,  # > 1: algorithms are spread over a pool of workers, each pinned to its own core
+    "noise_control": False,  # quiet host where permitted, idle-noise probes, noisy measurements rerun (hostenv.py)
+    "throughput": False,  # ops/sec with 1, 2, 4 ... N concurrent workers, for `throughput_duration` seconds
+    "throughput_duration": 5,
+    "message_sweep": False,  # signing/verification time for messages from 32 B to `message_sweep_max` bytes
+    "message_sweep_max": 1 << 30,
+    "tls": False,  # loopback TLS 1.3 handshakes with classical, PQC and hybrid groups and certificates
+    "tls_concurrency": (1, 4, 16),
+    "pki": False,  # root > intermediate > leaf certificate chains: sizes, issuance rate and chain verification time
+    "loadgen": False,  # open-loop Poisson arrivals at increasing rates: latency under load and saturation point
+    "loadgen_duration": 10,
+    "soak": False,  # burn-in loops for `soak_duration` seconds, OpenMetrics snapshots in results/soak_metrics.prom
+    "soak_algorithms": {"KEM": ["kyber768"], "SIGNATURE": ["dilithium3", "falcon512"]},
+    "soak_duration": 4 * 3600,
+    "batch_verify": False,  # verification of `batch_size` signatures per public key, parsed once (libcrypto)
+    "batch_size": 1000,
+    "ablation": False,  # benchmark rerun with AVX2 / AVX-512 / SHA extensions masked off for OpenSSL
+    "provision": False,  # bulk generation of `provision_count` key pairs per algorithm, streamed to `provision_output`
+    "provision_algorithms": ["rsa4096", "sphincssha2128fsimple", "sphincssha2128ssimple"],
+    "provision_count": 1000,
+    "provision_output": "./provisioned/{algorithm}.tar.gz",  # a directory, or a .tar / .tar.gz / .tar.xz archive
+    "key_formats": False,  # encode/decode time and size of the keys in PEM, DER and raw form
+    "cost_model": False,  # bytes on the wire and estimated latency per handshake / message on the links below
+    "links": LINKS,  # {name: {"bandwidth": bit/s, "rtt": seconds}}
 }
 
 # %% Benchmarking
-ALGORITHMS = {
-    "KEM": {
-        "classical": [
-            {"name": "ecdh", "key": None},
-            {"name": "rsa2048", "key": 2048},
-            {"name": "rsa3072", "key": 3072},
-            {"name": "rsa4096", "key": 4096},
-        ],
-        "pqc": [
-            {"name": "kyber512", "key": None},
-            {"name": "kyber768", "key": None},
-            {"name": "kyber1024", "key": None},
-        ]
-    },
-    "SIGNATURE": {
-        "classical": [
-            {"name": "rsa2048", "key": 2048},
-            {"name": "rsa3072", "key": 2048},
-            {"name": "ecdsa", "key": None},
-        ],
-        "pqc": [
-            {"name": "dilithium2"},
-            {"name": "dilithium3"},
-            {"name": "dilithium5"},
-            {"name": "sphincssha2128fsimple"},
-            {"name": "sphincssha2128ssimple"},
-            {"name": "falcon512"},
-            {"name": "falcon1024"},
-        ]
-    }
-}
+# The hand-picked ALGORITHMS table lives in registry.py, shared with `python -m pqc_bench`
+if execute["discover"]:
+    # Every PQC and hybrid algorithm of the installed providers instead
+    ALGORITHMS = algorithms_table(include=execute["discover"] if isinstance(execute["discover"], str) else None)
 
 results = {"KEM": {}, "SIGNATURE": {}}
 
 if execute["benchmark"]:
-    results["KEM"] = run_benchmark(ALGORITHMS["KEM"], test="KEM", message=None)
+    runner = run_benchmark if execute["workers"] == 1 else partial(run_parallel, workers=execute["workers"])
+    runner = partial(runner, phase=execute["phase"], keystore=KeyStore(), store=SampleStore(resume=execute["resume"]),
+                     noise=NOISE if execute["noise_control"] else None)
+    for backend in execute["backends"]:
+        results["KEM"] = runner(ALGORITHMS["KEM"], test="KEM", message=None, backend=backend)
+
+        message = b"This is a message for the Signature test. Enjoy!"
+        results["SIGNATURE"] = runner(ALGORITHMS["SIGNATURE"], test="SIGNATURE", message=message, backend=backend)
+
+        save_results(results, results_path(backend))
+
+# %% Soak run
+if execute["soak"]:
+    message = b"This is a message for the Signature test. Enjoy!"
+    soak = run_soak({test: selection(names) for test, names in execute["soak_algorithms"].items()}, message,
+                    backend=execute["backends"][0], duration=execute["soak_duration"])
+    save_results(soak, "./results/soak_results.json")
 
+# %% Bulk verification
+if execute["batch_verify"]:
+    # The CLI backend can only keep the classical keys parsed, PQC keys need the in-process backend
+    batch = run_batch_verification(ALGORITHMS["SIGNATURE"], backend="libcrypto", batch_size=execute["batch_size"])
+    save_results(batch, "./results/batch_verification_results.json")
+
+# %% CPU-feature ablation
+if execute["ablation"]:
     message = b"This is a message for the Signature test. Enjoy!"
-    results["SIGNATURE"] = run_benchmark(ALGORITHMS["SIGNATURE"], test="SIGNATURE", message=message)
+    ablation = run_ablation(ALGORITHMS, message, backend=execute["backends"][0], resume=execute["resume"])
+    save_results(ablation, "./results/ablation_results.json")
+
+# %% Bulk key provisioning
+if execute["provision"]:
+    provisioning = run_provisioning([{"name": name, "key": rsa_bits(name)} for name in execute["provision_algorithms"]],
+                                    count=execute["provision_count"], output=execute["provision_output"])
+    save_results(provisioning, "./results/provisioning_results.json")
+
+# %% Key formats
+if execute["key_formats"]:
+    save_results(run_key_formats(ALGORITHMS), "./results/key_formats_results.json")
 
-    save_results(results)
+# %% Bandwidth cost model
+if execute["cost_model"]:
+    with open(results_path(execute["backends"][0]), "r") as f:
+        model = cost_model(json.load(f), execute["links"])
+    print_cost_model(model, execute["links"])
+    save_results(model, "./results/cost_model.json")
+
+# %% Throughput scaling
+if execute["throughput"]:
+    throughput = {"KEM": {}, "SIGNATURE": {}}
+    message = b"This is a message for the Signature test. Enjoy!"
+    for test in ["KEM", "SIGNATURE"]:
+        throughput[test] = run_throughput(ALGORITHMS[test], test=test, message=message if test == "SIGNATURE" else None,
+                                          backend=execute["backends"][0], duration=execute["throughput_duration"])
+    save_results(throughput, "./results/throughput_results.json")
+
+    plot_scaling(
+        data=throughput["KEM"],
+        algorithms=[algo["name"] for algo in ALGORITHMS["KEM"]["classical"] + ALGORITHMS["KEM"]["pqc"]],
+        colors=['#5A6C7F', '#B36B00', '#3D8B3D', '#B22222', '#BDB76B', '#7F7F7F', '#8B4513'],
+        test_type="KEM",
+        figsize=(14, 7),
+        save_path="./results/kem_throughput_scaling.png"
+    )
+    plot_scaling(
+        data=throughput["SIGNATURE"],
+        algorithms=[algo["name"] for algo in ALGORITHMS["SIGNATURE"]["classical"] + ALGORITHMS["SIGNATURE"]["pqc"]],
+        colors=['#8B2635', '#8583B2', '#255687', '#5D2E46', '#C68245',
+                '#18594F', '#6044A7', '#865929', '#7BA5A5', '#116D06'],
+        test_type="SIGNATURE",
+        figsize=(14, 7),
+        save_path="./results/signature_throughput_scaling.png"
+    )
+
+# %% Message-size sweep
+if execute["message_sweep"]:
+    sweep = run_message_sweep(ALGORITHMS["SIGNATURE"], backend=execute["backends"][0],
+                              sizes=message_sizes(max_size=execute["message_sweep_max"]))
+    save_results(sweep, "./results/message_sweep_results.json")
+
+    plot_message_sweep(
+        data=sweep,
+        algorithms=[algo["name"] for algo in ALGORITHMS["SIGNATURE"]["classical"] + ALGORITHMS["SIGNATURE"]["pqc"]],
+        colors=['#8B2635', '#8583B2', '#255687', '#5D2E46', '#C68245',
+                '#18594F', '#6044A7', '#865929', '#7BA5A5', '#116D06'],
+        figsize=(14, 6),
+        save_path="./results/signature_message_sweep.png"
+    )
+
+# %% TLS 1.3 handshakes
+if execute["tls"]:
+    tls_results = run_tls_benchmark(ALGORITHMS, concurrency_levels=execute["tls_concurrency"])
+    save_results(tls_results, "./results/tls_results.json")
+
+# %% X.509 certificate chains
+if execute["pki"]:
+    pki_results = run_pki_benchmark(ALGORITHMS)
+    save_results(pki_results, "./results/pki_results.json")
+
+# %% Latency under load
+if execute["loadgen"]:
+    load = {"KEM": {}, "SIGNATURE": {}}
+    message = b"This is a message for the Signature test. Enjoy!"
+    for test in ["KEM", "SIGNATURE"]:
+        load[test] = run_load_test(ALGORITHMS[test], test=test, message=message if test == "SIGNATURE" else None,
+                                   backend=execute["backends"][0], duration=execute["loadgen_duration"])
+    save_results(load, "./results/loadgen_results.json")
 
 # %% Visualization of the results
 if execute["plot"]:
@@ -55,7 +177,7 @@ if execute["plot"]:
         results = json.load(f)
 
     # KEM Benchmark
-    if results["KEM"] != {} and False:
+    if results["KEM"] != {}:
         plot_benchmark(
             data=results["KEM"],
             algorithms=[algo["name"] for algo in ALGORITHMS["KEM"]["classical"]]
@@ -108,3 +230,19 @@ if execute["plot"]:
             test_type="SIGNATURE",
             save_path="./results/signature_key_sizes.png"
         )
+
+    # Memory and CPU per operation (results measured with resource accounting only)
+    for test in ["KEM", "SIGNATURE"]:
+        if any("key_generation_peak_rss" in result for result in results[test].values()):
+            plot_memory(
+                data=results[test],
+                algorithms=[algo["name"] for algo in ALGORITHMS[test]["classical"]]
+                           + [algo["name"] for algo in ALGORITHMS[test]["pqc"]],
+                test_type=test,
+                figsize=(11, 8),
+                save_path=f"./results/{test.lower()}_memory.png"
+            )
+
+# %% HTML report
+if execute["report"]:
+    build_report()
@@ -0,0 +1,233 @@
+import logging
+import shutil
+import subprocess
+import tempfile
+
+import benchmark
+from benchmark import provider_args, LibCryptoError
+from libcrypto import load_libcrypto
+from registry import family, rsa_bits
+from resources import run_process
+from timing import summarize, timed
+from wire import pem_to_der
+
+# Mixed chains (root, intermediate, leaf) measured besides the all-classical and all-PQC ones: PQC leaves
+# under an existing classical PKI, a classical leaf under a PQC hierarchy, and a PQC intermediate under a
+# classical root
+MIXED_CHAINS = [
+    ("rsa3072", "rsa3072", "dilithium3"),
+    ("ecdsa", "ecdsa", "falcon512"),
+    ("rsa3072", "dilithium3", "dilithium3"),
+    ("dilithium5", "dilithium3", "ecdsa"),
+]
+
+LEVELS = ("root", "intermediate", "leaf")
+
+_extensions = {
+    "root": ["basicConstraints=critical,CA:TRUE", "keyUsage=critical,keyCertSign,cRLSign"],
+    "intermediate": ["basicConstraints=critical,CA:TRUE,pathlen:0", "keyUsage=critical,keyCertSign,cRLSign"],
+    "leaf": ["basicConstraints=critical,CA:FALSE", "keyUsage=critical,digitalSignature",
+             "extendedKeyUsage=serverAuth", "subjectAltName=DNS:localhost"],
+}
+
+
+def newkey_args(signature: str, key_size: int | None) -> list:
+    # `openssl req -newkey` arguments of a signature algorithm of the tables
+    if family(signature) == "rsa":
+        return ["-newkey", f"rsa:{key_size or rsa_bits(signature)}"]
+    elif signature == "ecdsa":
+        return ["-newkey", "ec", "-pkeyopt", "ec_paramgen_curve:prime256v1"]
+    return ["-newkey", signature]
+
+
+def chain_name(chain: tuple) -> str:
+    return chain[0] if len(set(chain)) == 1 else ">".join(chain)
+
+
+def _providers(chain: tuple) -> list:
+    # A classical certificate issued by a PQC CA (or the reverse) needs oqsprovider for both keys
+    return provider_args(pqc=True) if any(family(algorithm) == "pqc" for algorithm in chain) else []
+
+
+def build_chain(chain: tuple, key_sizes: dict, workdir: str) -> dict:
+    # Root CA (self-signed), intermediate CA and leaf with `openssl req` / `openssl x509 -req`:
+    # {level: {"cert": path, "key": path, "csr": path}}
+    providers = _providers(chain)
+    files = {}
+    for level, algorithm in zip(LEVELS, chain):
+        files[level] = {part: f"{workdir}/{level}.{part}" for part in ("cert", "key", "csr")}
+        extensions = [arg for extension in _extensions[level] for arg in ("-addext", extension)]
+        subject = ["-subj", f"/O=PQC benchmark/CN={level} {algorithm}"]
+        request = [benchmark.openssl_path, "req", *newkey_args(algorithm, key_sizes.get(algorithm)), "-nodes",
+                   "-keyout", files[level]["key"], *subject, *extensions] + providers
+        if level == "root":
+            run_process(request + ["-x509", "-days", "2", "-out", files[level]["cert"]])
+        else:
+            run_process(request + ["-new", "-out", files[level]["csr"]])
+            issue(files[LEVELS[LEVELS.index(level) - 1]], files[level]["csr"], files[level]["cert"], providers)
+    return files
+
+
+def issue(issuer: dict, csr: str, output: str, providers: list, serial: int = 1):
+    # The CA `issuer` signs the request, keeping its extensions
+    run_process([
+        benchmark.openssl_path, "x509", "-req",
+        "-in", csr,
+        "-CA", issuer["cert"],
+        "-CAkey", issuer["key"],
+        "-set_serial", str(serial),
+        "-days", "1",
+        "-copy_extensions", "copyall",
+        "-out", output
+    ] + providers)
+
+
+def certificate_sizes(files: dict) -> dict:
+    sizes = {}
+    for level in LEVELS:
+        with open(files[level]["cert"], 'rb') as f:
+            sizes[level] = len(pem_to_der(f.read()))
+    return sizes
+
+
+def _libcrypto_verifiers(pems: dict) -> tuple[dict, list]:
+    # {scenario: verify()} in-process, and what has to be released afterwards:
+    #  - cold:                every certificate parsed and the trust store built for each verification
+    #  - untrusted:           trust store (the root) kept, intermediate and leaf parsed and verified each time,
+    #                         as a TLS client receiving the chain
+    #  - cached_intermediate: the intermediate is already trusted and cached in the store, only the leaf is
+    #                         parsed and its signature checked
+    lib = load_libcrypto(benchmark.libcrypto_path, benchmark.provider_path)
+    root = lib.load_certificate(pems["root"])
+    intermediate = lib.load_certificate(pems["intermediate"])
+    roots = lib.certificate_store([root])
+    intermediates = lib.certificate_store([intermediate], partial_chain=True)
+
+    def parsed(*levels):
+        return [lib.load_certificate(pems[level]) for level in levels]
+
+    def release(*certs):
+        for cert in certs:
+            lib.free_certificate(cert)
+
+    def cold() -> bool:
+        certs = parsed(*LEVELS)
+        store = lib.certificate_store(certs[:1])
+        try:
+            return lib.verify_certificate(store, certs[2], certs[1:2])
+        finally:
+            lib.free_store(store)
+            release(*certs)
+
+    def untrusted() -> bool:
+        certs = parsed("intermediate", "leaf")
+        try:
+            return lib.verify_certificate(roots, certs[1], certs[:1])
+        finally:
+            release(*certs)
+
+    def cached_intermediate() -> bool:
+        leaf = lib.load_certificate(pems["leaf"])
+        try:
+            return lib.verify_certificate(intermediates, leaf)
+        finally:
+            release(leaf)
+
+    cleanup = [lambda: lib.free_store(roots), lambda: lib.free_store(intermediates),
+               lambda: release(root, intermediate)]
+    return {"cold": cold, "untrusted": untrusted, "cached_intermediate": cached_intermediate}, cleanup
+
+
+def _cli_verifiers(files: dict, providers: list) -> tuple[dict, list]:
+    # Same scenarios with `openssl verify`, one process per verification (trust store loaded by every process)
+    def verify(*args) -> bool:
+        try:
+            return b": OK" in run_process([benchmark.openssl_path, "verify", *args, files["leaf"]["cert"]]
+                                          + providers).stdout
+        except subprocess.CalledProcessError as e:
+            logging.debug(f"Certificate verification failed: {e.stdout.decode(errors='replace')}")
+            return False
+
+    return {
+        "untrusted": lambda: verify("-CAfile", files["root"]["cert"], "-untrusted", files["intermediate"]["cert"]),
+        "cached_intermediate": lambda: verify("-partial_chain", "-CAfile", files["intermediate"]["cert"]),
+    }, []
+
+
+def measure_issuance(files: dict, providers: list, iterations: int, workdir: str) -> dict:
+    # The intermediate CA signs the leaf request again and again: issuance latency and certificates per second
+    samples = []
+    for serial in range(2, iterations + 3):
+        _, elapsed = timed(issue, files["intermediate"], files["leaf"]["csr"], f"{workdir}/issued.cert", providers,
+                           serial)
+        samples.append(elapsed)
+
+    # The first issuance (provider loading, page cache) is a warmup
+    stats = summarize(samples[1:])
+    return {**stats, 'per_sec': round(1 / stats['mean'], 3) if stats['mean'] else 0.0}
+
+
+def measure_verification(verify, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations + 1):
+        ok, elapsed = timed(verify)
+        if not ok:
+            raise RuntimeError("the chain does not verify")
+        samples.append(elapsed)
+    return summarize(samples[1:])
+
+
+def run_pki_benchmark(algorithms, mixed: list | None = None, backend: str = "libcrypto", iterations: int = 100,
+                      issuance_iterations: int = 50) -> dict:
+    # Root CA -> intermediate CA -> leaf chains with every signature algorithm of the table, and the `mixed`
+    # ones (MIXED_CHAINS by default, those whose algorithms are all in the table). Certificates are issued
+    # with the openssl CLI; chains are verified in-process ("libcrypto") or with `openssl verify` ("cli").
+    key_sizes = {algo['name']: algo.get('key')
+                 for category in ['classical', 'pqc'] for algo in algorithms["SIGNATURE"][category]}
+    chains = [(name,) * 3 for name in key_sizes]
+    chains += [chain for chain in (MIXED_CHAINS if mixed is None else mixed) if set(chain) <= set(key_sizes)]
+
+    results = {}
+    for chain in chains:
+        name = chain_name(chain)
+        print(f"Certificate chain - {name.upper()} (root > intermediate > leaf)")
+        workdir = tempfile.mkdtemp(prefix="pqc_pki_")
+        cleanup = []
+        try:
+            providers = _providers(chain)
+            files = build_chain(chain, key_sizes, workdir)
+            sizes = certificate_sizes(files)
+            result = {
+                'chain': dict(zip(LEVELS, chain)),
+                'certificate_sizes': sizes,
+                # What a server sends (leaf and intermediate) and the whole chain
+                'chain_size': sizes["leaf"] + sizes["intermediate"],
+                'chain_size_with_root': sum(sizes.values()),
+                'issuance': measure_issuance(files, providers, issuance_iterations, workdir),
+            }
+
+            if backend == "libcrypto":
+                pems = {}
+                for level in LEVELS:
+                    with open(files[level]["cert"], 'rb') as f:
+                        pems[level] = f.read()
+                verifiers, cleanup = _libcrypto_verifiers(pems)
+            else:
+                verifiers, cleanup = _cli_verifiers(files, providers)
+            for scenario, verify in verifiers.items():
+                result[f"verification_{scenario}"] = measure_verification(verify, iterations)
+
+            results[name] = result
+            print(f"  sizes {sizes['root']} / {sizes['intermediate']} / {sizes['leaf']} B "
+                  f"(chain sent {result['chain_size']} B), "
+                  f"issuance {result['issuance']['per_sec']:.1f}/s, verification "
+                  + ", ".join(f"{scenario} {result[f'verification_{scenario}']['median'] * 1e3:.3f} ms"
+                              for scenario in verifiers))
+        except (RuntimeError, LibCryptoError, subprocess.CalledProcessError, OSError) as e:
+            print(f"Error in certificate chain benchmark for {name.upper()}: {e}")
+            logging.error(f"Error in certificate chain benchmark for {name.upper()}: \n{e}")
+        finally:
+            for release in cleanup:
+                release()
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
@@ -0,0 +1,220 @@
+import argparse
+import os
+import sys
+
+# Command-line entry point: `python -m pqc_bench run --kem kyber768 --sig falcon512 --iterations 20`.
+# Only argparse is imported up front; the benchmark modules, and matplotlib only with --plot, are imported
+# by the subcommand that needs them.
+
+MESSAGE = "This is a message for the Signature test. Enjoy!"
+
+
+def _names(values: list | None) -> list | None:
+    # "--kem kyber512,kyber768 rsa2048" and "--kem kyber512 --kem kyber768" are both accepted
+    if values is None:
+        return None
+    return [name for value in values for name in value.split(",") if name]
+
+
+def _algorithms(args) -> dict:
+    from registry import ALGORITHMS, algorithms_table, selection
+
+    kem, sig = _names(args.kem), _names(args.sig)
+    if args.all or args.match:
+        table = algorithms_table(include=args.match)
+    elif kem is None and sig is None:
+        table = ALGORITHMS
+    else:
+        table = {"KEM": selection(kem or []), "SIGNATURE": selection(sig or [])}
+
+    if args.no_classical:
+        table = {test: {"classical": [], "pqc": tables["pqc"]} for test, tables in table.items()}
+    return table
+
+
+def _phase(args, operations: list | None) -> str:
+    # Without key generation the operations run on pre-generated keys, key generation alone is the "keygen" phase
+    if args.phase or not operations:
+        return args.phase or "all"
+    if "key_generation" not in operations:
+        return "ops"
+    return "keygen" if operations == ["key_generation"] else "all"
+
+
+def _timing(args) -> dict:
+    timing = {}
+    for setting, value in [("iterations", args.iterations), ("warmup", args.warmup),
+                           ("target_rel_error", args.target_error), ("time_budget", args.time_budget)]:
+        if value is not None:
+            timing[setting] = value
+    if args.no_resources:
+        timing["resources"] = False
+    if args.no_progress:
+        timing["progress"] = False
+    return timing
+
+
+def _output(args, backend: str) -> str:
+    from benchmark import results_path
+
+    if not args.output:
+        return results_path(backend)
+    if len(args.backend or []) > 1:
+        root, ext = os.path.splitext(args.output)
+        return f"{root}_{backend}{ext}"
+    return args.output
+
+
+def _plot(results: dict, prefix: str):
+    # Headless: the charts are only saved
+    from benchmark import OPERATIONS as TEST_OPERATIONS
+    from report import summary_charts
+
+    for test, data in results.items():
+        if not data:
+            continue
+        if any(f"{operation}_avg" not in result for result in data.values() for operation in TEST_OPERATIONS[test]):
+            print(f"No {test} charts: they need every operation of every algorithm.")
+            continue
+        summary_charts(f"{prefix}{test.lower()}_", test, data)
+
+
+def run(args) -> int:
+    from functools import partial
+
+    from benchmark import OPERATIONS as TEST_OPERATIONS, run_benchmark, save_results
+    from keystore import KeyStore
+    from scheduler import run_parallel
+    from store import SampleStore
+
+    algorithms = _algorithms(args)
+    timing = _timing(args)
+    store = None if args.no_store else SampleStore(resume=not args.no_resume)
+    runner = run_benchmark if args.workers == 1 else partial(run_parallel, workers=args.workers)
+    noise = {"max_reruns": args.max_reruns} if args.noise_control else None
+    os.makedirs("./results", exist_ok=True)
+
+    missing = 0
+    for backend in args.backend or ["cli"]:
+        results = {"KEM": {}, "SIGNATURE": {}}
+        for test, tables in algorithms.items():
+            operations = [op for op in args.operations if op in TEST_OPERATIONS[test]] if args.operations else None
+            if not tables["classical"] + tables["pqc"] or operations == []:
+                continue
+            message = args.message.encode() if test == "SIGNATURE" else None
+            results[test] = runner(tables, test=test, message=message, backend=backend, timing=timing,
+                                   phase=_phase(args, operations), keystore=KeyStore(), store=store,
+                                   operations=operations, noise=noise)
+            missing += len(tables["classical"] + tables["pqc"]) - len(results[test])
+
+        save_results(results, _output(args, backend))
+        if args.plot:
+            _plot(results, f"./results/{backend}_")
+
+    # Non-zero when an algorithm failed: a CI smoke benchmark has to notice
+    return 1 if missing else 0
+
+
+def soak(args) -> int:
+    from benchmark import save_results
+    from soak import run_soak
+
+    results = run_soak(_algorithms(args), args.message.encode(), backend=args.backend, duration=args.duration,
+                       output=args.metrics, settings={"interval": args.interval})
+    save_results(results, args.output)
+    # Non-zero on a latency drift or a growing resident set: a burn-in job has to notice
+    trends = results.get('trends', {})
+    return 1 if not results or trends.get('drifting') or trends.get('leaking') else 0
+
+
+def list_algorithms(args) -> int:
+    from registry import algorithms_table, print_registry
+
+    print_registry(algorithms_table(include=args.match, refresh=args.refresh))
+    return 0
+
+
+def report(args) -> int:
+    from report import build_report
+
+    build_report(args.results, None if args.no_samples else f"{args.results}/samples.jsonl", args.output, args.workers)
+    return 0
+
+
+def compare(arguments: list) -> int:
+    from compare import main
+
+    return main(arguments)
+
+
+def _selection_arguments(parser):
+    selection = parser.add_argument_group("algorithms (default: the table of registry.py)")
+    selection.add_argument("--kem", action="append", metavar="NAMES", help="KEM algorithms, comma separated")
+    selection.add_argument("--sig", action="append", metavar="NAMES", help="signature algorithms, comma separated")
+    selection.add_argument("--all", action="store_true", help="every algorithm the providers offer")
+    selection.add_argument("--match", metavar="REGEX", help="the offered algorithms matching REGEX")
+    selection.add_argument("--no-classical", action="store_true", help="leave out the classical baselines")
+
+
+def main(argv: list | None = None) -> int:
+    from registry import ALL_OPERATIONS
+
+    parser = argparse.ArgumentParser(prog="pqc_bench", description="Classical and post-quantum crypto benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="benchmark a selection of algorithms")
+    _selection_arguments(run_parser)
+    run_parser.add_argument("--operations", nargs="+", choices=ALL_OPERATIONS, help="operations to time (default: all)")
+    run_parser.add_argument("--phase", choices=["all", "keygen", "ops"], help="default: derived from --operations")
+    run_parser.add_argument("--backend", action="append", choices=["cli", "libcrypto"], help="default: cli")
+    run_parser.add_argument("--iterations", type=int, help="samples per algorithm (default 100)")
+    run_parser.add_argument("--warmup", type=int, help="discarded iterations before sampling (default 3)")
+    run_parser.add_argument("--target-error", type=float, help="sample until this relative error of the means")
+    run_parser.add_argument("--time-budget", type=float, help="sample for at most this many seconds")
+    run_parser.add_argument("--workers", type=int, default=1, help="algorithms run in parallel on pinned cores")
+    run_parser.add_argument("--noise-control", action="store_true",
+                            help="quiet the host where permitted, probe it and rerun noisy measurements")
+    run_parser.add_argument("--max-reruns", type=int, default=2, help="reruns of a noisy measurement (default 2)")
+    run_parser.add_argument("--message", default=MESSAGE, help="message of the signature benchmarks")
+    run_parser.add_argument("--no-resources", action="store_true", help="do not record CPU time and peak RSS")
+    run_parser.add_argument("--no-progress", action="store_true", help="no progress bars (CI logs)")
+    run_parser.add_argument("--no-resume", action="store_true", help="measure again what the sample store has")
+    run_parser.add_argument("--no-store", action="store_true", help="do not keep raw samples in results/samples.jsonl")
+    run_parser.add_argument("--output", help="results file (default: results/benchmark_results[_<backend>].json)")
+    run_parser.add_argument("--plot", action="store_true", help="save the charts to results/ (needs matplotlib)")
+    run_parser.set_defaults(handler=run)
+
+    soak_parser = commands.add_parser("soak", help="long-running loops with OpenMetrics snapshots and trend detection")
+    _selection_arguments(soak_parser)
+    soak_parser.add_argument("--duration", type=float, default=3600, help="seconds (default 3600)")
+    soak_parser.add_argument("--interval", type=float, default=60, help="seconds between snapshots (default 60)")
+    soak_parser.add_argument("--backend", choices=["cli", "libcrypto"], default="cli", help="default: cli")
+    soak_parser.add_argument("--message", default=MESSAGE, help="message of the signatures")
+    soak_parser.add_argument("--metrics", default="./results/soak_metrics.prom", help="OpenMetrics text file")
+    soak_parser.add_argument("--output", default="./results/soak_results.json", help="summary, windows and trends")
+    soak_parser.set_defaults(handler=soak)
+
+    list_parser = commands.add_parser("list", help="algorithms a discovered sweep would run")
+    list_parser.add_argument("--match", metavar="REGEX", help="only the offered algorithms matching REGEX")
+    list_parser.add_argument("--refresh", action="store_true", help="query the providers again")
+    list_parser.set_defaults(handler=list_algorithms)
+
+    report_parser = commands.add_parser("report", help="static HTML report of the results, charts rendered headless")
+    report_parser.add_argument("--results", default="./results", help="results directory (default ./results)")
+    report_parser.add_argument("--output", help="report directory (default: <results>/report)")
+    report_parser.add_argument("--workers", type=int, help="rendering processes (default: one per CPU)")
+    report_parser.add_argument("--no-samples", action="store_true", help="no distribution charts of the raw samples")
+    report_parser.set_defaults(handler=report)
+
+    # Listed for the help only: the arguments go untouched to compare.py (see below)
+    commands.add_parser("compare", help="regression comparison of two result sets, see compare.py")
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["compare"]:
+        return compare(argv[1:])
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
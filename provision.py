@@ -0,0 +1,130 @@
+import io
+import logging
+import os
+import tarfile
+import time
+from collections import deque
+
+import benchmark
+from benchmark import generate_key
+from scheduler import available_cores, fork_context
+from timing import summarize
+
+
+def _init_worker():
+    # Provisioned keys are not benchmark iterations: no first-call log lines for each of them
+    benchmark.debug["first"] = False
+
+
+def _generate(job: tuple) -> tuple:
+    # Worker side: one key pair, PEM-serialized by generate_key(), and the time it took
+    algorithm, key_size = job
+    start = time.perf_counter_ns()
+    key = generate_key(algorithm, key_size)
+    elapsed = time.perf_counter_ns() - start
+    return key.get('private_pem'), key.get('public_pem'), elapsed
+
+
+class KeyWriter:
+    # Output keystore: `<output>/<algorithm>_<index>.key.pem` / `.pub.pem` files, or the same entries in a single
+    # tar archive if `output` ends in .tar, .tar.gz or .tar.xz. Pairs are written as they arrive: nothing is
+    # kept in memory.
+    def __init__(self, output: str):
+        self.output = output
+        self.archive = None
+        if output.endswith((".tar", ".tar.gz", ".tar.xz")):
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+            compression = output.rsplit(".", 1)[-1] if not output.endswith(".tar") else ""
+            self.archive = tarfile.open(output, f"w|{compression}")
+        else:
+            os.makedirs(output, exist_ok=True)
+        self.bytes = 0
+
+    def _add(self, name: str, data: bytes, mode: int):
+        self.bytes += len(data)
+        if self.archive:
+            info = tarfile.TarInfo(name)
+            info.size, info.mode, info.mtime = len(data), mode, time.time()
+            self.archive.addfile(info, io.BytesIO(data))
+            return
+        fd = os.open(f"{self.output}/{name}", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+
+    def write(self, name: str, private_pem: bytes, public_pem: bytes):
+        self._add(f"{name}.key.pem", private_pem, 0o600)
+        self._add(f"{name}.pub.pem", public_pem, 0o644)
+
+    def close(self):
+        if self.archive:
+            self.archive.close()
+
+
+def provision_keys(algorithm: str, key_size: int | None, count: int, output: str,
+                   workers: int | None = None, in_flight: int | None = None) -> dict:
+    # Generates `count` key pairs on a pool of workers and streams them to the output keystore. At most
+    # `in_flight` keys (default: twice the workers) are pending at any time, so memory stays bounded whatever
+    # the count. Keys are written in order, as soon as the oldest pending one is ready.
+    workers = min(workers or len(available_cores()), count)
+    in_flight = in_flight or 2 * workers
+    print(f"Algorithm - {algorithm.upper()} (provisioning {count} keys on {workers} workers to '{output}')")
+
+    writer = KeyWriter(output)
+    generation, writing, completed = [], [], []
+    start = time.perf_counter()
+    try:
+        with fork_context.Pool(workers, initializer=_init_worker) as pool:
+            pending = deque()
+            submitted = 0
+            while submitted < count or pending:
+                while submitted < count and len(pending) < in_flight:
+                    pending.append(pool.apply_async(_generate, ((algorithm, key_size),)))
+                    submitted += 1
+
+                private_pem, public_pem, elapsed = pending.popleft().get()
+                if not private_pem:
+                    raise RuntimeError(f"Key generation for {algorithm.upper()} failed, see benchmark.log.")
+
+                write_start = time.perf_counter_ns()
+                writer.write(f"{algorithm}_{len(completed):06d}", private_pem, public_pem)
+                writing.append(time.perf_counter_ns() - write_start)
+                generation.append(elapsed)
+                completed.append(time.perf_counter() - start)
+    except (RuntimeError, OSError, tarfile.TarError) as e:
+        print(f"Error in key provisioning for {algorithm.upper()}: {e}")
+        logging.error(f"Error in key provisioning for {algorithm.upper()}: \n{e}")
+    finally:
+        writer.close()
+
+    if not completed:
+        return {}
+
+    # Sustained rate: from the moment the first round of workers is done, without the pool start-up
+    warm = min(workers, len(completed) - 1)
+    elapsed = completed[-1]
+    sustained = (len(completed) - warm) / (elapsed - completed[warm - 1]) if warm else len(completed) / elapsed
+    result = {
+        'keys': len(completed),
+        'workers': workers,
+        'output': output,
+        'bytes_written': writer.bytes,
+        'elapsed': round(elapsed, 3),
+        'keys_per_sec': round(len(completed) / elapsed, 3),
+        'sustained_keys_per_sec': round(sustained, 3),
+        'generation': summarize(generation),
+        'writing': summarize(writing),
+    }
+    print(f"  {result['keys']} keys in {elapsed:.1f}s: {result['sustained_keys_per_sec']:.1f} keys/s sustained, "
+          f"{result['generation']['median'] * 1e3:.2f} ms per key (generation and PEM serialization), "
+          f"{result['writing']['median'] * 1e6:.1f} us per write")
+    return result
+
+
+def run_provisioning(algorithms: list, count: int, output: str, workers: int | None = None) -> dict:
+    # algorithms: [{"name": ..., "key": ...}]; `output` may contain '{algorithm}', e.g. "./keys/{algorithm}.tar.gz"
+    results = {}
+    for algo in algorithms:
+        result = provision_keys(algo['name'], algo.get('key'), count, output.format(algorithm=algo['name']), workers)
+        if result:
+            results[algo['name']] = result
+    return results
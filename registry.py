@@ -0,0 +1,171 @@
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+
+registry_path = "./results/algorithm_registry.json"
+
+# Classical baselines: not discovered, every OpenSSL has them. Parameters go to generate_key(..., key_size).
+CLASSICAL = {
+    "KEM": [
+        {"name": "ecdh", "key": None},
+        {"name": "rsa2048", "key": 2048},
+        {"name": "rsa3072", "key": 3072},
+        {"name": "rsa4096", "key": 4096},
+    ],
+    "SIGNATURE": [
+        {"name": "rsa2048", "key": 2048},
+        {"name": "rsa3072", "key": 3072},
+        {"name": "ecdsa", "key": None},
+    ]
+}
+
+# Timed operations of each test, and all of them in the order of the results and charts
+OPERATIONS = {
+    "KEM": ["key_generation", "encapsulation", "decapsulation"],
+    "SIGNATURE": ["key_generation", "signing", "verification"],
+}
+ALL_OPERATIONS = list(dict.fromkeys(operation for operations in OPERATIONS.values() for operation in operations))
+
+# Hand-picked table, run by main.py and `pqc_bench run` unless a discovered sweep or a selection is asked for
+ALGORITHMS = {
+    "KEM": {
+        "classical": CLASSICAL["KEM"],
+        "pqc": [
+            {"name": "kyber512", "key": None},
+            {"name": "kyber768", "key": None},
+            {"name": "kyber1024", "key": None},
+        ]
+    },
+    "SIGNATURE": {
+        "classical": CLASSICAL["SIGNATURE"],
+        "pqc": [
+            {"name": "dilithium2"},
+            {"name": "dilithium3"},
+            {"name": "dilithium5"},
+            {"name": "sphincssha2128fsimple"},
+            {"name": "sphincssha2128ssimple"},
+            {"name": "falcon512"},
+            {"name": "falcon1024"},
+        ]
+    }
+}
+
+# PQC algorithms of the default provider (OpenSSL >= 3.5); everything listed by oqsprovider is PQC or hybrid
+_DEFAULT_PQC = re.compile(r"ml-?kem|ml-?dsa|slh-?dsa", re.IGNORECASE)
+_OID = re.compile(r"[0-9]+(\.[0-9]+)+")
+# Classical halves of the hybrid algorithms: p256_kyber512, x25519_mlkem768, rsa3072_dilithium2, X25519MLKEM768...
+_HYBRID = re.compile(r"^(p256|p384|p521|x25519|x448|rsa\d+|rsapss\d+|secp\d+r1|bp\d+)_|^(x25519|x448|secp\d+r1)mlkem",
+                     re.IGNORECASE)
+
+
+def family(algorithm: str) -> str:
+    # How an algorithm is handled by the backends: "ec" (P-256, through ECDH or ECDSA), "rsa" (rsa<bits>)
+    # or "pqc" (a provider algorithm, PQC or hybrid, generated and used by name)
+    if algorithm in ("ecdh", "ecdsa"):
+        return "ec"
+    if re.fullmatch(r"rsa[0-9]+", algorithm):
+        return "rsa"
+    return "pqc"
+
+
+def rsa_bits(algorithm: str) -> int | None:
+    return int(algorithm[3:]) if family(algorithm) == "rsa" else None
+
+
+def is_hybrid(algorithm: str) -> bool:
+    return bool(_HYBRID.search(algorithm))
+
+
+def parse_algorithm_list(output: str) -> list:
+    # `openssl list -<kind>-algorithms` lines: "  { <oid>, <name>, <alias> } @ <provider>" or "  <name> @ <provider>".
+    # Returns [(name, provider)], the name being the first alias that is neither an OID nor an "id-" one.
+    algorithms = []
+    for line in output.splitlines():
+        if " @ " not in line:
+            continue
+        names, provider = line.rsplit(" @ ", 1)
+        aliases = [a.strip() for a in names.strip().strip("{}").split(",")]
+        aliases = [a for a in aliases if a and not _OID.fullmatch(a)]
+        preferred = [a for a in aliases if not a.lower().startswith("id-")] or aliases
+        if preferred:
+            algorithms.append((preferred[0], provider.strip()))
+    return algorithms
+
+
+def list_algorithms(kind: str) -> list:
+    # PQC and hybrid algorithms of the given kind ("kem" or "signature") that the providers make available
+    import benchmark
+
+    result = subprocess.run([benchmark.openssl_path, "list", f"-{kind}-algorithms"]
+                            + benchmark.provider_args(pqc=True), capture_output=True, text=True, check=True)
+    algorithms = []
+    for name, provider in parse_algorithm_list(result.stdout):
+        if (provider == "oqsprovider" or _DEFAULT_PQC.search(name)) and name not in [a['name'] for a in algorithms]:
+            algorithms.append({"name": name, "key": None, "provider": provider, "hybrid": is_hybrid(name)})
+    return algorithms
+
+
+def discover(refresh: bool = False, path: str = registry_path) -> dict:
+    # {"KEM": [...], "SIGNATURE": [...]} of the provider algorithms. `openssl list` is only queried once per
+    # OpenSSL / oqsprovider version: the answer is cached in `path`, keyed by that version.
+    from benchmark import get_backend
+
+    version = get_backend("cli").version()
+    cache = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            cache = json.load(f)
+    if version in cache and not refresh:
+        return cache[version]
+
+    try:
+        cache[version] = {"KEM": list_algorithms("kem"), "SIGNATURE": list_algorithms("signature")}
+    except subprocess.CalledProcessError as e:
+        # Nothing is cached: the next run queries the providers again
+        print(f"Error listing the provider algorithms: {e.stderr}")
+        logging.error(f"Error listing the provider algorithms: \n{e.stderr}")
+        return {"KEM": [], "SIGNATURE": []}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(cache, f, indent=4)
+    os.replace(f"{path}.tmp", path)
+    return cache[version]
+
+
+def selection(names: list) -> dict:
+    # {"classical": [...], "pqc": [...]} of the given algorithm names, e.g. ["rsa3072", "kyber768"]
+    table = {"classical": [], "pqc": []}
+    for name in names:
+        category = "pqc" if family(name) == "pqc" else "classical"
+        table[category].append({"name": name, "key": rsa_bits(name)})
+    return table
+
+
+def algorithms_table(include: str | None = None, hybrids: bool = True, refresh: bool = False) -> dict:
+    # The ALGORITHMS table of main.py, with every discovered algorithm as "pqc". `include` is a regular
+    # expression on the PQC names (e.g. "ml-?kem|mldsa"), the classical baselines are always kept.
+    discovered = discover(refresh)
+    table = {}
+    for test in ("KEM", "SIGNATURE"):
+        table[test] = {
+            "classical": [dict(algo) for algo in CLASSICAL[test]],
+            "pqc": [{"name": algo['name'], "key": None} for algo in discovered[test]
+                    if (hybrids or not algo['hybrid']) and (not include or re.search(include, algo['name'], re.I))]
+        }
+    return table
+
+
+def print_registry(table: dict):
+    for test, tables in table.items():
+        print(f"{test}:")
+        for category in ['classical', 'pqc']:
+            for algo in tables[category]:
+                print(f"  {algo['name']:<32} {family(algo['name']):<4} {'hybrid' if is_hybrid(algo['name']) else ''}")
+
+
+if __name__ == "__main__":
+    # python registry.py [--refresh]: lists what a discovered sweep would run
+    print_registry(algorithms_table(refresh="--refresh" in sys.argv))
@@ -0,0 +1,203 @@
+import glob
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmark import OPERATIONS
+from scheduler import fork_context
+from store import SampleStore
+
+
+def _pyplot():
+    # Non-interactive backend: nothing is ever shown, rendering works without a display
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def violin_chart(path: str, title: str, samples: dict):
+    # Distribution of the raw samples (seconds) of every algorithm, log scale: PQC and RSA are decades apart
+    plt = _pyplot()
+    algorithms = list(samples)
+    fig, ax = plt.subplots(figsize=(max(8, 0.7 * len(algorithms)), 5))
+    ax.violinplot([samples[algo] for algo in algorithms], showmedians=True, showextrema=False)
+    ax.set_yscale("log")
+    ax.set_xticks(range(1, len(algorithms) + 1))
+    ax.set_xticklabels(algorithms, rotation=45, ha="right", fontsize=8)
+    ax.set_ylabel("Time (seconds)")
+    ax.set_title(title, fontweight='bold')
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def ecdf_chart(path: str, title: str, samples: dict):
+    # Empirical CDF of the raw samples, log time axis: tails and multi-modal timings stand out
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(9, 5))
+    for algorithm, values in samples.items():
+        values = sorted(values)
+        ax.step(values, [(i + 1) / len(values) for i in range(len(values))], where="post", label=algorithm)
+    ax.set_xscale("log")
+    ax.set_xlabel("Time (seconds)")
+    ax.set_ylabel("Fraction of samples")
+    ax.set_title(title, fontweight='bold')
+    ax.legend(fontsize=7, ncol=2)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def summary_charts(prefix: str, test: str, data: dict):
+    # The charts of main.py (averages and key sizes), rendered without being shown
+    _pyplot()
+    import benchmark
+
+    benchmark.plots["show"] = False
+    algorithms, width = list(data), max(8, len(data))
+    benchmark.plot_benchmark(data, algorithms, colors=None, title=f"Benchmark {test} Algorithms", suptitle_font=14,
+                             title_font=12, label_font=8, size_key=(width, 5), size_ops=(width, 9),
+                             test_type=test, save_path=prefix)
+    benchmark.plot_key_sizes(data, algorithms, figsize=(width, 5), test_type=test, save_path=f"{prefix}key_sizes.png")
+
+
+CHARTS = {
+    "violin": violin_chart,
+    "ecdf": ecdf_chart,
+    "summary": summary_charts,
+}
+
+
+def _render(job: tuple) -> float:
+    chart, args = job
+    start = time.perf_counter()
+    CHARTS[chart](*args)
+    return time.perf_counter() - start
+
+
+def _slug(*parts: str) -> str:
+    return "_".join(part.lower().replace(" ", "-").replace("/", "-") for part in parts)
+
+
+def collect(results_dir: str, store_path: str | None) -> tuple[dict, dict]:
+    # Summaries: {file name: results} of the benchmark_results*.json files.
+    # Raw samples: {env_id: (env, {(test, operation): {algorithm: [seconds]}})} of every complete run of the
+    # full phase in the sample store.
+    summaries = {}
+    for path in sorted(glob.glob(f"{results_dir}/benchmark_results*.json")):
+        with open(path, 'r') as f:
+            summaries[os.path.basename(path)] = json.load(f)
+
+    raw = {}
+    if store_path and os.path.exists(store_path):
+        store = SampleStore(store_path)
+        for env_id, env in store.environments().items():
+            distributions = {}
+            for (test, algorithm, phase), (_, samples) in store.cells(env_id).items():
+                if phase != "all":
+                    continue
+                for operation, values in samples.items():
+                    if "." not in operation and any(values):
+                        distributions.setdefault((test, operation), {})[algorithm] = [v / 1e9 for v in values]
+            if distributions:
+                raw[env_id] = (env, distributions)
+    return summaries, raw
+
+
+def chart_jobs(summaries: dict, raw: dict, output: str) -> tuple[list, dict]:
+    # (chart, args) jobs and, per report section, the images they produce
+    jobs, images = [], {}
+    for name, results in summaries.items():
+        for test, data in results.items():
+            complete = data and all(f"{operation}_avg" in result
+                                    for result in data.values() for operation in OPERATIONS[test])
+            if not complete:
+                continue
+            prefix = f"{output}/{_slug(os.path.splitext(name)[0], test)}_"
+            jobs.append(("summary", (prefix, test, data)))
+            images[(name, test)] = [f"{prefix}{suffix}" for suffix in
+                                    ("keygen_benchmark.png", "ops_benchmark.png", "key_sizes.png")]
+
+    for env_id, (env, distributions) in raw.items():
+        for (test, operation), samples in sorted(distributions.items()):
+            title = f"{test} {operation.replace('_', ' ')} - {env['backend']} ({env_id[:8]})"
+            for chart in ("violin", "ecdf"):
+                path = f"{output}/{_slug(env_id[:8], test, operation, chart)}.png"
+                jobs.append((chart, (path, title, samples)))
+                images.setdefault(env_id, []).append(path)
+    return jobs, images
+
+
+def _summary_table(test: str, data: dict) -> str:
+    operations = OPERATIONS[test]
+    rows = []
+    for algorithm, result in data.items():
+        cells = []
+        for operation in operations:
+            stats = result.get(operation)
+            cells.append(f"<td>{stats['median'] * 1e3:.3f}</td><td>{stats['p99'] * 1e3:.3f}</td>"
+                         if isinstance(stats, dict) else "<td>-</td><td>-</td>")
+        rows.append(f"<tr><th>{html.escape(algorithm)}</th>{''.join(cells)}"
+                    f"<td>{result.get('public_size', '-')}</td><td>{result.get('private_size', '-')}</td></tr>")
+    header = "".join(f"<th colspan=2>{operation.replace('_', ' ')}</th>" for operation in operations)
+    units = "<th>median</th><th>p99</th>" * len(operations)
+    return (f"<table><tr><th rowspan=2>algorithm</th>{header}<th rowspan=2>public key (B)</th>"
+            f"<th rowspan=2>private key (B)</th></tr><tr>{units}</tr>{''.join(rows)}</table>")
+
+
+def write_html(path: str, summaries: dict, raw: dict, images: dict):
+    directory = os.path.dirname(path)
+
+    def img(image: str) -> str:
+        return f'<img src="{html.escape(os.path.relpath(image, directory))}" loading="lazy">'
+
+    sections = []
+    for name, results in summaries.items():
+        for test, data in results.items():
+            if not data:
+                continue
+            sections.append(f"<h2>{html.escape(name)} - {test}</h2><p>Times in milliseconds.</p>"
+                            f"{_summary_table(test, data)}{''.join(img(i) for i in images.get((name, test), []))}")
+    for env_id, (env, _) in raw.items():
+        details = ", ".join(f"{key}: {html.escape(str(value))}" for key, value in env.items())
+        sections.append(f"<h2>Raw samples - {html.escape(env['backend'])} ({env_id})</h2><p>{details}</p>"
+                        f"{''.join(img(i) for i in images.get(env_id, []))}")
+
+    with open(path, 'w') as f:
+        f.write(f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>PQC benchmark report</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin: 1em 0; font-size: 0.9em; }}
+th, td {{ border: 1px solid #ccc; padding: 0.3em 0.6em; text-align: right; }}
+img {{ max-width: 48%; margin: 0.5em 0.5em 0 0; vertical-align: top; }}
+</style></head><body>
+<h1>PQC benchmark report</h1>
+<p>Generated on {time.strftime("%Y-%m-%d %H:%M:%S")}.</p>
+{"".join(sections) or "<p>No results found.</p>"}
+</body></html>
+""")
+
+
+def build_report(results_dir: str = "./results", store_path: str | None = "./results/samples.jsonl",
+                 output: str | None = None, workers: int | None = None) -> str:
+    # Static HTML report of `results_dir`: summary tables and charts of the benchmark_results*.json files, and
+    # violin / ECDF charts of the raw samples of the sample store. Charts are rendered headless, in parallel.
+    output = output or f"{results_dir}/report"
+    os.makedirs(output, exist_ok=True)
+    start = time.perf_counter()
+
+    summaries, raw = collect(results_dir, store_path)
+    jobs, images = chart_jobs(summaries, raw, output)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    with ProcessPoolExecutor(workers, mp_context=fork_context) as pool:
+        render_time = sum(pool.map(_render, jobs))
+
+    path = f"{output}/index.html"
+    write_html(path, summaries, raw, images)
+    print(f"Report with {len(jobs)} charts written to '{path}' in {time.perf_counter() - start:.1f}s "
+          f"({render_time:.1f}s of rendering on {workers} workers)")
+    return path
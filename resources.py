@@ -0,0 +1,112 @@
+import os
+import resource
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+# Peak RSS (KiB) of the children reaped since the last reset, see run_process()
+children = {"peak_rss": 0}
+
+_clear_refs = {"available": None}
+
+
+def _read_stream(fd: int) -> bytes:
+    with open(fd, 'rb', closefd=False) as f:
+        f.seek(0)
+        return f.read()
+
+
+def run_process(command: list, data: bytes | None = None, fds: tuple = ()) -> subprocess.CompletedProcess:
+    # subprocess.run(command, input=data, pass_fds=fds, capture_output=True, check=True), with stdin, stdout and
+    # stderr in anonymous in-memory files instead of pipes: there is nothing to pump while the child runs, so it
+    # is reaped with wait4(), which also returns the resource usage of that single child (RUSAGE_CHILDREN only
+    # keeps the largest peak RSS of every child ever reaped)
+    streams = [os.memfd_create(name, os.MFD_CLOEXEC) for name in ("stdin", "stdout", "stderr")]
+    try:
+        view = memoryview(data or b"")
+        while view:
+            view = view[os.write(streams[0], view):]
+        os.lseek(streams[0], 0, os.SEEK_SET)
+
+        process = subprocess.Popen(command, stdin=streams[0], stdout=streams[1], stderr=streams[2], pass_fds=fds)
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        children["peak_rss"] = max(children["peak_rss"], usage.ru_maxrss)
+        stdout, stderr = _read_stream(streams[1]), _read_stream(streams[2])
+    finally:
+        for fd in streams:
+            os.close(fd)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+
+def _reset_peak() -> bool:
+    # Linux resets the peak RSS of the process (VmHWM) to its current RSS on "5" > /proc/self/clear_refs;
+    # elsewhere (or if not permitted) the peak of the Python heap is tracked with tracemalloc instead
+    if _clear_refs["available"] is not False:
+        try:
+            with open("/proc/self/clear_refs", 'w') as f:
+                f.write("5")
+            _clear_refs["available"] = True
+            return True
+        except OSError:
+            _clear_refs["available"] = False
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    return False
+
+
+def _rss_peak() -> int:
+    # VmHWM of the process, in bytes
+    with open("/proc/self/status", 'r') as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def current_rss() -> int:
+    with open("/proc/self/statm", 'r') as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def measured(times: dict, operation: str, op, *args, resources: bool = True):
+    # As timing.timed(), with the resources used by the operation recorded next to its wall time (ns):
+    #  - '<operation>.cpu_user' / '.cpu_system': CPU time (ns) of this process and of the children it reaped
+    #  - '<operation>.peak_rss':  bytes; peak RSS of the largest child process for the CLI backend, growth of
+    #                             the peak RSS of this process for in-process operations
+    # The accounting itself happens outside the timed window.
+    if not resources:
+        start = time.perf_counter_ns()
+        result = op(*args)
+        times[operation] = time.perf_counter_ns() - start
+        return result
+
+    children["peak_rss"] = 0
+    procfs = _reset_peak()
+    baseline = current_rss() if procfs else tracemalloc.get_traced_memory()[0]
+    before = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    start = time.perf_counter_ns()
+    result = op(*args)
+    times[operation] = time.perf_counter_ns() - start
+
+    after = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    peak = (_rss_peak() if procfs else tracemalloc.get_traced_memory()[1]) - baseline
+
+    times[f"{operation}.cpu_user"] = round(sum(a.ru_utime - b.ru_utime for a, b in zip(after, before)) * 1e9)
+    times[f"{operation}.cpu_system"] = round(sum(a.ru_stime - b.ru_stime for a, b in zip(after, before)) * 1e9)
+    times[f"{operation}.peak_rss"] = max(children["peak_rss"] * 1024, peak, 0)
+    return result
+
+
+def summarize_memory(samples: list) -> dict:
+    return {
+        'mean': round(statistics.mean(samples)),
+        'median': round(statistics.median(samples)),
+        'max': max(samples),
+    }
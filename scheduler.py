@@ -0,0 +1,69 @@
+import logging
+import multiprocessing
+import os
+import time
+
+import benchmark
+from benchmark import benchmark_algorithm, cleanup_files
+from hostenv import controlled, print_host, with_baseline
+from keystore import KeyStore
+from store import SampleStore
+
+# Fork keeps the configuration of the parent (paths, backends) and does not re-import main.py
+fork_context = multiprocessing.get_context("fork")
+
+# Noise settings of this worker, with the baseline probe of its own core
+_worker = {"noise": None}
+
+
+def available_cores() -> list:
+    return sorted(os.sched_getaffinity(0))
+
+
+def _init_worker(slots, noise: dict | None = None):
+    # Every worker takes one core and is pinned to it, so that workers do not steal cycles from each other
+    core = slots.get()
+    os.sched_setaffinity(0, {core})
+    benchmark.debug["first"] = True
+    _worker["noise"] = with_baseline(noise) if noise is not None else None
+    logging.info(f"Worker {os.getpid()} pinned to core {core}")
+
+
+def _run_job(job: tuple) -> tuple:
+    algo, category, test, message, backend, timing, phase, keystore, store, operations = job
+    start = time.perf_counter()
+    result = benchmark_algorithm(algo, category, test, message, backend, timing, phase, keystore, store, operations,
+                                 _worker["noise"])
+    print(f"Algorithm - {algo['name'].upper()} completed on core {min(os.sched_getaffinity(0))} "
+          f"in {time.perf_counter() - start:.1f}s")
+    return algo['name'], result
+
+
+def run_parallel(algorithms, test: str, message: bytes | None, backend: str = "cli", timing: dict | None = None,
+                 phase: str = "all", keystore: KeyStore | None = None, store: SampleStore | None = None,
+                 workers: int | None = None, cores: list | None = None, operations: list | None = None,
+                 noise: dict | None = None) -> dict:
+    # Same results as run_benchmark(), with one algorithm per job spread over a pool of pinned workers
+    cores = cores or available_cores()
+    jobs = [(algo, category, test, message, backend, timing, phase, keystore, store, operations)
+            for category in ['classical', 'pqc'] for algo in algorithms[category]]
+    workers = min(workers or len(cores), len(cores), len(jobs))
+
+    # Reset the environment
+    cleanup_files("*")
+
+    print(f"Running {len(jobs)} {test} benchmarks on {workers} workers (cores {cores[:workers]})")
+    slots = fork_context.Queue()
+    for core in cores[:workers]:
+        slots.put(core)
+
+    # The workers inherit the host settings of the noise-controlled mode (see hostenv.py)
+    with controlled(noise if noise is not None else {"control": False}, cores[:workers]) as actions:
+        if noise is not None:
+            print_host(actions)
+        # Longest jobs are not known in advance, so jobs are handed out one at a time
+        with fork_context.Pool(workers, initializer=_init_worker, initargs=(slots, noise)) as pool:
+            completed = dict(pool.imap_unordered(_run_job, jobs, chunksize=1))
+
+    # Keep the order of the algorithms table, as run_benchmark() does
+    return {name: completed[name] for name in [job[0]['name'] for job in jobs] if completed.get(name)}
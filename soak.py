@@ -0,0 +1,220 @@
+import logging
+import os
+import statistics
+import subprocess
+import time
+from collections import deque
+
+from benchmark import get_backend, LibCryptoError
+from loadgen import OPERATIONS
+from resources import children, current_rss
+from throughput import prepare_operation
+from timing import Histogram
+
+# Settings of the soak mode
+#  - interval:           seconds between two OpenMetrics snapshots (and length of a trend window)
+#  - quantiles:          latency quantiles exported
+#  - precision:          bits of the histogram sub-buckets (7: values within 1.6%)
+#  - history:            windows kept for the trends and the results (24 hours of 60s windows), the oldest ones
+#                        are dropped; the latency summaries still cover the whole run
+#  - warmup_windows:     first windows left out of the trends (caches, lazy provider initialization, heap growth)
+#  - max_latency_drift:  a median latency growing by more than this fraction per hour is reported as a drift
+#  - max_rss_growth:     a resident set growing by more than this many bytes per hour is reported as a leak
+SOAK = {
+    "interval": 60,
+    "quantiles": (0.5, 0.9, 0.99, 0.999),
+    "precision": 7,
+    "history": 1440,
+    "warmup_windows": 1,
+    "max_latency_drift": 0.05,
+    "max_rss_growth": 1 << 20,
+}
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels.items()) + "}"
+
+
+def openmetrics(jobs: dict, window: float, rss: int, child_rss: int, trends: dict, quantiles: tuple) -> str:
+    # OpenMetrics text exposition of the soak run so far: latency summaries since the start, operations and
+    # errors, rates of the last window, resident set sizes and the current trends
+    lines = ["# TYPE pqc_soak_latency_seconds summary", "# UNIT pqc_soak_latency_seconds seconds",
+             "# HELP pqc_soak_latency_seconds Latency of the operations since the start of the soak run."]
+    for (algorithm, operation), job in jobs.items():
+        labels = {"algorithm": algorithm, "operation": operation}
+        for q in quantiles:
+            lines.append(f"pqc_soak_latency_seconds{_labels(**labels, quantile=q)} "
+                         f"{job['total'].quantile(q) / 1e9:.9f}")
+        lines.append(f"pqc_soak_latency_seconds_sum{_labels(**labels)} {job['total'].sum / 1e9:.9f}")
+        lines.append(f"pqc_soak_latency_seconds_count{_labels(**labels)} {job['total'].total}")
+
+    lines += ["# TYPE pqc_soak_operations counter", "# HELP pqc_soak_operations Operations completed."]
+    lines += [f"pqc_soak_operations_total{_labels(algorithm=a, operation=o)} {job['total'].total}"
+              for (a, o), job in jobs.items()]
+    lines += ["# TYPE pqc_soak_errors counter", "# HELP pqc_soak_errors Operations that failed."]
+    lines += [f"pqc_soak_errors_total{_labels(algorithm=a, operation=o)} {job['errors']}"
+              for (a, o), job in jobs.items()]
+    lines += ["# TYPE pqc_soak_ops_per_second gauge", "# HELP pqc_soak_ops_per_second Rate over the last window."]
+    lines += [f"pqc_soak_ops_per_second{_labels(algorithm=a, operation=o)} {job['window'].total / window:.3f}"
+              for (a, o), job in jobs.items()]
+
+    lines += ["# TYPE pqc_soak_resident_memory_bytes gauge", "# UNIT pqc_soak_resident_memory_bytes bytes",
+              "# HELP pqc_soak_resident_memory_bytes RSS of the benchmark process, peak RSS of its openssl children.",
+              f"pqc_soak_resident_memory_bytes{_labels(process='benchmark')} {rss}",
+              f"pqc_soak_resident_memory_bytes{_labels(process='openssl')} {child_rss}"]
+
+    lines += ["# TYPE pqc_soak_latency_drift_ratio gauge",
+              "# HELP pqc_soak_latency_drift_ratio Growth of the median latency per hour, as a fraction of it."]
+    lines += [f"pqc_soak_latency_drift_ratio{_labels(algorithm=a, operation=o)} {trend['latency_drift']}"
+              for (a, o), trend in trends.get('latency', {}).items()]
+    if 'rss_growth' in trends:
+        lines += ["# TYPE pqc_soak_rss_growth_bytes_per_hour gauge",
+                  f"pqc_soak_rss_growth_bytes_per_hour {trends['rss_growth']}"]
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str, text: str):
+    # Replaced atomically: a scraper never reads a half-written file
+    with open(f"{path}.tmp", 'w') as f:
+        f.write(text)
+    os.replace(f"{path}.tmp", path)
+
+
+def _slope(points: list) -> float:
+    # Least-squares slope of [(hours, value)]
+    if len(points) < 2 or len({x for x, _ in points}) < 2:
+        return 0.0
+    return statistics.linear_regression([x for x, _ in points], [y for _, y in points]).slope
+
+
+def trends(windows: list, settings: dict) -> dict:
+    # Trends over the windows after the warmup: slope of every median latency (fraction of the first median per
+    # hour) and of the resident set (bytes per hour). A trend is reported once the slope exceeds its threshold
+    # and the value has also grown by that much since the first window: on short runs a few pages or a single
+    # histogram bucket would otherwise extrapolate to a large hourly rate.
+    windows = [window for window in windows if window['window'] >= settings["warmup_windows"]]
+    if len(windows) < 3:
+        return {}
+
+    latency = {}
+    for key in windows[0]['latency']:
+        points = [(w['elapsed'] / 3600, w['latency'][key]['median']) for w in windows if key in w['latency']]
+        first, last = points[0][1], points[-1][1]
+        drift = round(_slope(points) / first, 4) if first else 0.0
+        limit = settings["max_latency_drift"]
+        latency[key] = {'latency_drift': drift, 'drifting': drift > limit and last > first * (1 + limit)}
+
+    growth = round(_slope([(w['elapsed'] / 3600, w['rss']) for w in windows]))
+    limit = settings["max_rss_growth"]
+    return {
+        'latency': latency,
+        'rss_growth': growth,
+        'leaking': growth > limit and windows[-1]['rss'] - windows[0]['rss'] > limit,
+        'drifting': any(trend['drifting'] for trend in latency.values()),
+    }
+
+
+def run_soak(algorithms: dict, message: bytes | None, backend: str = "cli", duration: float = 3600,
+             output: str = "./results/soak_metrics.prom", settings: dict | None = None) -> dict:
+    # Burn-in: the operations of every algorithm of the {"KEM": table, "SIGNATURE": table} `algorithms` run in
+    # turn for `duration` seconds. Latencies go to fixed-size histograms (one since the start, one per window),
+    # so memory stays flat over hours; every `interval` seconds the OpenMetrics file `output` is rewritten and
+    # a window point (median latencies, ops/sec, RSS) is added for the latency and memory trends.
+    settings = {**SOAK, **(settings or {})}
+    impl = get_backend(backend)
+
+    jobs = {}
+    for test, table in algorithms.items():
+        for category in ['classical', 'pqc']:
+            for algo in table[category]:
+                key_size = algo.get('key') if test == "KEM" or category == "classical" else None
+                for operation in OPERATIONS[test]:
+                    if algo['name'] == "ecdh" and operation == "decapsulation":
+                        continue
+                    try:
+                        run = prepare_operation(impl, algo['name'], key_size, test, operation, message)
+                    except (RuntimeError, LibCryptoError, OSError, ValueError, subprocess.CalledProcessError) as e:
+                        print(f"Soak setup of {operation} for {algo['name'].upper()} failed: {e}")
+                        logging.error(f"Soak setup of {operation} for {algo['name'].upper()} failed: \n{e}")
+                        continue
+                    jobs[(algo['name'], operation)] = {
+                        'run': run, 'errors': 0,
+                        'total': Histogram(settings["precision"]), 'window': Histogram(settings["precision"]),
+                    }
+    if not jobs:
+        return {}
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    print(f"Soak run of {len(jobs)} operations for {duration:.0f}s, metrics every {settings['interval']}s in "
+          f"'{output}'")
+    # The last `history` windows, numbered from the start of the run
+    windows, current, count = deque(maxlen=settings["history"]), {}, 0
+    start = window_start = time.perf_counter()
+    children["peak_rss"] = 0
+
+    def close_window(now: float):
+        # End of a window: trend point, snapshot, fresh window histograms
+        nonlocal current, count, window_start
+        elapsed = now - window_start
+        windows.append({
+            'window': count,
+            'elapsed': round(now - start, 3),
+            'rss': current_rss(),
+            'child_rss': children["peak_rss"] * 1024,
+            'latency': {key: {'median': job['window'].quantile(0.5) / 1e9,
+                              'p99': job['window'].quantile(0.99) / 1e9,
+                              'ops_per_sec': round(job['window'].total / elapsed, 3)}
+                        for key, job in jobs.items() if job['window'].total},
+        })
+        for job in jobs.values():
+            job['total'].merge(job['window'])
+        current = trends(windows, settings)
+        write_metrics(output, openmetrics(jobs, elapsed, windows[-1]['rss'], windows[-1]['child_rss'], current,
+                                          settings["quantiles"]))
+        for job in jobs.values():
+            job['window'] = Histogram(settings["precision"])
+        count, window_start, children["peak_rss"] = count + 1, now, 0
+
+    try:
+        while time.perf_counter() - start < duration:
+            for job in jobs.values():
+                begin = time.perf_counter_ns()
+                try:
+                    job['run']()
+                except (RuntimeError, LibCryptoError, OSError, subprocess.CalledProcessError) as e:
+                    job['errors'] += 1
+                    logging.error(f"Soak operation failed: \n{e}")
+                    continue
+                job['window'].record(time.perf_counter_ns() - begin)
+
+            now = time.perf_counter()
+            if now - window_start < settings["interval"] and now - start < duration:
+                continue
+            close_window(now)
+            if current.get('drifting') or current.get('leaking'):
+                logging.warning(f"Soak trends at {now - start:.0f}s: {current}")
+    except KeyboardInterrupt:
+        print("Soak run interrupted, keeping the windows measured so far.")
+        # The window in progress is kept too, with the operations it completed
+        if any(job['window'].total for job in jobs.values()):
+            close_window(time.perf_counter())
+
+    for (algorithm, operation), trend in current.get('latency', {}).items():
+        if trend['drifting']:
+            print(f"  {algorithm} {operation}: median latency drifting by {trend['latency_drift']:.1%} per hour")
+    if current.get('leaking'):
+        print(f"  Resident set growing by {current['rss_growth'] / 1024:.0f} KiB per hour")
+
+    # JSON keys: "<algorithm>/<operation>"
+    def named(entries: dict) -> dict:
+        return {f"{algorithm}/{operation}": value for (algorithm, operation), value in entries.items()}
+
+    results = {}
+    for (algorithm, operation), job in jobs.items():
+        results.setdefault(algorithm, {})[operation] = {**job['total'].summary(), 'errors': job['errors']}
+    return {
+        'results': results,
+        'windows': [{**window, 'latency': named(window['latency'])} for window in windows],
+        'trends': {**current, 'latency': named(current.get('latency', {}))},
+    }
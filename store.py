@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import platform
+import time
+import uuid
+
+store_path = "./results/samples.jsonl"
+
+
+def cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo", 'r') as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def cpu_flags() -> set:
+    # Instruction set extensions of the CPU, as listed by the kernel ("avx2", "sha_ni", ...)
+    try:
+        with open("/proc/cpuinfo", 'r') as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def environment(impl) -> dict:
+    # What a measurement depends on besides the algorithm: results of different environments are never mixed
+    env = {
+        'host': platform.node(),
+        'cpu': cpu_model(),
+        'backend': impl.name,
+        'versions': impl.version(),
+        'python': platform.python_version(),
+    }
+    # CPU features masked off for OpenSSL (see ablation.py)
+    if os.environ.get("OPENSSL_ia32cap"):
+        env['ia32cap'] = os.environ["OPENSSL_ia32cap"]
+    return env
+
+
+def environment_id(env: dict) -> str:
+    return hashlib.sha256(json.dumps(env, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class Run:
+    # One measurement of a cell: a header line with the environment, one line per sample as it is taken and a
+    # closing line with the metadata needed to summarise it. A run without its closing line (crash, error) is
+    # ignored when reading the store back.
+    def __init__(self, path: str, cell: dict):
+        self.path = path
+        self.id = uuid.uuid4().hex
+        self.fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        # A run interrupted in the middle of a line leaves it unterminated: the new run starts on a fresh line
+        size = os.fstat(self.fd).st_size
+        if size and os.pread(self.fd, 1, size - 1) != b"\n":
+            os.write(self.fd, b"\n")
+        self._write({'type': 'run', 'run': self.id, 'time': time.time(), **cell})
+
+    def _write(self, record: dict):
+        # A single O_APPEND write per line: concurrent workers appending to the same store do not interleave
+        os.write(self.fd, (json.dumps(record) + "\n").encode())
+
+    def record(self, times: dict):
+        self._write({'type': 'sample', 'run': self.id, 'times': times})
+
+    def finish(self, info: dict):
+        # The run may already be closed: the closing line is written once the samples have been summarised
+        if self.fd is None:
+            self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        self._write({'type': 'done', 'run': self.id, 'info': info})
+        os.fsync(self.fd)
+        self.close()
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class SampleStore:
+    # Append-only JSONL store of raw samples. Completed cells (test, algorithm, phase, environment) can be read
+    # back to rebuild the summaries and, with `resume`, are skipped instead of being measured again.
+    def __init__(self, path: str = store_path, resume: bool = True):
+        self.path = path
+        self.resume = resume
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._offset = 0
+        self._runs = {}
+        self._cells = {}
+        self._environments = {}
+
+    @staticmethod
+    def cell(test: str, algorithm: str, phase: str, env: dict) -> dict:
+        return {'test': test, 'algorithm': algorithm, 'phase': phase, 'env_id': environment_id(env), 'env': env}
+
+    @staticmethod
+    def _key(cell: dict) -> tuple:
+        return cell['test'], cell['algorithm'], cell['phase'], cell['env_id']
+
+    def start(self, cell: dict) -> Run:
+        return Run(self.path, cell)
+
+    def _refresh(self):
+        # Only the lines appended since the last read are parsed
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partial line of a run still being written (or interrupted)
+                self._offset += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                if record['type'] == 'run':
+                    self._runs[record['run']] = {'cell': record, 'samples': {}}
+                elif record['run'] not in self._runs:
+                    continue
+                elif record['type'] == 'sample':
+                    for operation, elapsed in record['times'].items():
+                        self._runs[record['run']]['samples'].setdefault(operation, []).append(elapsed)
+                elif record['type'] == 'done':
+                    run = self._runs.pop(record['run'])
+                    # The latest completed run of a cell replaces the previous ones
+                    self._cells[self._key(run['cell'])] = (record['info'], run['samples'])
+                    self._environments[run['cell']['env_id']] = run['cell']['env']
+
+    def completed(self, cell: dict) -> tuple[dict, dict] | None:
+        # (info, {operation: samples in ns}) of the latest completed run of the cell, if any
+        self._refresh()
+        return self._cells.get(self._key(cell))
+
+    def environments(self) -> dict:
+        # {env_id: environment} of every environment with at least one completed cell
+        self._refresh()
+        return dict(self._environments)
+
+    def cells(self, env_id: str) -> dict:
+        # {(test, algorithm, phase): (info, samples)} of the completed cells of one environment
+        self._refresh()
+        return {key[:3]: cell for key, cell in self._cells.items() if key[3] == env_id}
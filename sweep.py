@@ -0,0 +1,82 @@
+import logging
+import os
+import subprocess
+
+import benchmark
+from benchmark import get_backend, LibCryptoError
+from timing import sample, summarize, timed
+
+# Per message size: a short warmup, at least 3 samples and at most ~2s of sampling
+SWEEP_TIMING = {"warmup": 1, "min_iterations": 3, "time_budget": 2.0}
+
+
+def message_sizes(min_size: int = 32, max_size: int = 1 << 30, factor: int = 4) -> list:
+    sizes, size = [], min_size
+    while size < max_size:
+        sizes.append(size)
+        size *= factor
+    return sizes + [max_size]
+
+
+def write_message(path: str, size: int):
+    # Random content written in chunks, so that even the 1 GiB message never sits in memory
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining:
+            chunk = os.urandom(min(remaining, benchmark.CHUNK_SIZE))
+            f.write(chunk)
+            remaining -= len(chunk)
+
+
+def run_message_sweep(algorithms, backend: str = "cli", sizes: list | None = None,
+                      timing: dict | None = None) -> dict:
+    # Signing and verification time of every signature algorithm against the message size. Messages are
+    # files streamed through the signer, which shows where hashing the input outweighs the signature itself.
+    sizes = sizes or message_sizes()
+    timing = timing or SWEEP_TIMING
+    impl = get_backend(backend)
+    results = {}
+
+    # One key per algorithm for the whole sweep; each message file exists only while its size is measured
+    keys = {}
+    for category in ['classical', 'pqc']:
+        for algo in algorithms[category]:
+            algorithm = algo['name']
+            key_size = algo.get('key') if category == "classical" else None
+            try:
+                keys[algorithm] = impl.generate_key(algorithm, key_size, "SIGNATURE")
+            except (RuntimeError, LibCryptoError, subprocess.CalledProcessError, OSError) as e:
+                print(f"Error in message sweep for {algorithm.upper()}: {e}")
+                logging.error(f"Error in message sweep for {algorithm.upper()}: \n{e}")
+            else:
+                results[algorithm] = {}
+
+    os.makedirs(benchmark.tmp, exist_ok=True)
+    try:
+        for size in sizes:
+            print(f"Message sweep - {size} B ({len(results)} algorithms)")
+            path = f"{benchmark.tmp}/message_{size}.bin"
+            try:
+                write_message(path, size)
+                for algorithm in list(results):
+                    def iteration() -> dict:
+                        signature, sign_time = timed(impl.sign_file, algorithm, keys[algorithm], path)
+                        _, verify_time = timed(impl.verify_file, algorithm, keys[algorithm], path, signature)
+                        return {'signing': sign_time, 'verification': verify_time}
+
+                    try:
+                        samples = sample(iteration, settings=timing, desc=f"{algorithm} {size}B")
+                    except (RuntimeError, LibCryptoError, subprocess.CalledProcessError, OSError) as e:
+                        print(f"Error in message sweep for {algorithm.upper()}: {e}")
+                        logging.error(f"Error in message sweep for {algorithm.upper()}: \n{e}")
+                        del results[algorithm]
+                        continue
+                    results[algorithm][size] = {operation: summarize(values, timing)
+                                                for operation, values in samples.items()}
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+    finally:
+        for key in keys.values():
+            impl.release_key(key)
+    return results
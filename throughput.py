@@ -0,0 +1,145 @@
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+
+from benchmark import OPERATIONS, get_backend, LibCryptoError
+from scheduler import available_cores, fork_context
+
+# Seconds a worker may take to prepare its operation (key generation included) before the others give up on
+# it, and a worker may overrun the duration before the parent gives up on the whole measurement
+THROUGHPUT_TIMEOUTS = {"setup": 300, "run": 60}
+
+
+def worker_levels(max_workers: int) -> list:
+    # 1, 2, 4, ... up to (and always including) the number of available cores
+    levels, n = [], 1
+    while n < max_workers:
+        levels.append(n)
+        n *= 2
+    return levels + [max_workers]
+
+
+def prepare_operation(impl, algorithm: str, key_size: int | None, test: str, operation: str,
+                      message: bytes | None):
+    # Everything the operation needs (key, ciphertext, signature) is prepared once, outside the timed loop
+    if operation == "key_generation":
+        def run():
+            impl.release_key(impl.generate_key(algorithm, key_size, test))
+        return run
+
+    key = impl.generate_key(algorithm, key_size, test)
+    if operation == "encapsulation":
+        return lambda: impl.encapsulate(algorithm, key)
+    elif operation == "decapsulation":
+        ciphertext = impl.encapsulate(algorithm, key)
+        return lambda: impl.decapsulate(algorithm, key, ciphertext)
+    elif operation == "signing":
+        return lambda: impl.sign(algorithm, key, message)
+    elif operation == "verification":
+        signature = impl.sign(algorithm, key, message)
+
+        def run():
+            if not impl.verify(algorithm, key, message, signature):
+                raise RuntimeError(f"Verification of a valid {algorithm.upper()} signature failed.")
+        return run
+    raise ValueError(f"Unknown operation '{operation}'")
+
+
+def _worker(core: int, job: tuple, duration: float, barrier, results):
+    # Always puts one (core, ops, elapsed) result, ops 0 on failure, and breaks the barrier if it never reached
+    # it, so that neither the parent nor the other workers wait for a worker that is gone
+    algorithm, key_size, test, operation, message, backend = job
+    ops, elapsed, started = 0, 0.0, False
+    try:
+        os.sched_setaffinity(0, {core})
+        run = prepare_operation(get_backend(backend), algorithm, key_size, test, operation, message)
+
+        # All workers start together, so that the aggregate rate really comes from concurrent work
+        barrier.wait(timeout=THROUGHPUT_TIMEOUTS["setup"])
+        started = True
+        start = time.perf_counter()
+        deadline = start + duration
+        while time.perf_counter() < deadline:
+            run()
+            ops += 1
+        elapsed = time.perf_counter() - start
+    except threading.BrokenBarrierError:
+        ops = 0
+    except (RuntimeError, LibCryptoError, OSError, ValueError, subprocess.CalledProcessError) as e:
+        logging.error(f"Throughput {'run' if started else 'setup'} of {operation} for {algorithm.upper()} "
+                      f"failed: \n{e}")
+        ops = 0
+    finally:
+        if not started:
+            barrier.abort()
+        results.put((core, ops, elapsed))
+
+
+def measure_throughput(job: tuple, workers: int, cores: list, duration: float) -> float:
+    barrier = fork_context.Barrier(workers)
+    results = fork_context.Queue()
+    processes = [fork_context.Process(target=_worker, args=(core, job, duration, barrier, results))
+                 for core in cores[:workers]]
+
+    deadline = time.perf_counter() + THROUGHPUT_TIMEOUTS["setup"] + duration + THROUGHPUT_TIMEOUTS["run"]
+    outcomes = []
+    try:
+        for process in processes:
+            process.start()
+        for _ in processes:
+            outcomes.append(results.get(timeout=max(deadline - time.perf_counter(), 0)))
+    except queue.Empty:
+        logging.error(f"Throughput run of {job[3]} for {job[0].upper()} timed out "
+                      f"({len(outcomes)} of {workers} workers reported)")
+        return 0.0
+    finally:
+        for process in processes:
+            if process.is_alive() and len(outcomes) < len(processes):
+                process.terminate()
+            process.join()
+
+    if any(ops == 0 for _, ops, _ in outcomes):
+        return 0.0
+    return sum(ops / elapsed for _, ops, elapsed in outcomes)
+
+
+def run_throughput(algorithms, test: str, message: bytes | None, backend: str = "cli", duration: float = 5.0,
+                   max_workers: int | None = None) -> dict:
+    # For every algorithm and operation: aggregate ops/sec with 1, 2, 4 ... N concurrent workers
+    # (one per core) over a fixed duration, and the parallel efficiency ops(n) / (n * ops(1))
+    cores = available_cores()
+    levels = worker_levels(min(max_workers or len(cores), len(cores)))
+    results = {}
+
+    for category in ['classical', 'pqc']:
+        for algo in algorithms[category]:
+            algorithm = algo['name']
+            key_size = algo.get('key') if test == "KEM" or category == "classical" else None
+            print(f"Algorithm - {algorithm.upper()} (throughput, workers: {levels})")
+
+            for operation in OPERATIONS[test]:
+                if algorithm == "ecdh" and operation == "decapsulation":
+                    continue
+
+                job = (algorithm, key_size, test, operation, message, backend)
+                curve = {}
+                for workers in levels:
+                    ops_per_sec = measure_throughput(job, workers, cores, duration)
+                    if not ops_per_sec:
+                        print(f"  {operation}: failed, see benchmark.log")
+                        break
+
+                    single = curve[1]['ops_per_sec'] if curve else ops_per_sec
+                    curve[workers] = {
+                        'ops_per_sec': round(ops_per_sec, 3),
+                        'efficiency': round(ops_per_sec / (workers * single), 4)
+                    }
+                    print(f"  {operation:<15} {workers:>3} workers: {ops_per_sec:12.1f} ops/s "
+                          f"(efficiency {curve[workers]['efficiency']:.2f})")
+
+                if curve:
+                    results.setdefault(algorithm, {})[operation] = curve
+    return results
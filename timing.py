@@ -0,0 +1,213 @@
+import math
+import random
+import statistics
+import time
+
+# Default settings of the measurement engine, overridable per benchmark through the `timing` argument
+#  - warmup:            iterations run and discarded before sampling (caches, lazy provider init, ...)
+#  - iterations:        samples taken without a target error or a time budget (default: the benchmark's own)
+#  - min_iterations:    samples always taken before checking the stop conditions
+#  - target_rel_error:  stop once the 95% confidence half-width of every mean is below this fraction of it
+#  - time_budget:       stop once this many seconds have been spent sampling
+#  - outlier_factor:    samples outside [Q1 - k * IQR, Q3 + k * IQR] are rejected (Tukey fences)
+#  - max_iterations:    upper bound on the samples when a target error or a time budget is set
+#  - bootstrap:         number of resamples for the confidence interval of the median
+#  - resources:         also record CPU time and peak RSS of every operation (see resources.py)
+#  - progress:          show a progress bar (tqdm) while sampling
+TIMING = {
+    "warmup": 3,
+    "iterations": None,
+    "min_iterations": 10,
+    "max_iterations": 10000,
+    "target_rel_error": None,
+    "time_budget": None,
+    "outlier_factor": 3.0,
+    "bootstrap": 1000,
+    "resources": True,
+    "progress": True,
+}
+
+
+def timed(operation, *args, **kwargs):
+    start = time.perf_counter_ns()
+    result = operation(*args, **kwargs)
+    return result, time.perf_counter_ns() - start
+
+
+def relative_error(samples: list) -> float:
+    if len(samples) < 2:
+        return math.inf
+    mean = statistics.mean(samples)
+    if mean == 0:
+        return 0.0
+    return 1.96 * statistics.stdev(samples) / math.sqrt(len(samples)) / mean
+
+
+def reject_outliers(samples: list, factor: float) -> tuple[list, int]:
+    if len(samples) < 4 or not factor:
+        return samples, 0
+
+    q1, _, q3 = statistics.quantiles(samples, n=4)
+    low, high = q1 - factor * (q3 - q1), q3 + factor * (q3 - q1)
+    kept = [s for s in samples if low <= s <= high]
+    return kept, len(samples) - len(kept)
+
+
+def bootstrap_ci(samples: list, resamples: int, confidence: float = 0.95, seed: int = 0) -> tuple[float, float]:
+    if len(samples) < 2 or not resamples:
+        return samples[0], samples[0]
+
+    rng = random.Random(seed)
+    medians = sorted(statistics.median(rng.choices(samples, k=len(samples))) for _ in range(resamples))
+    tail = (1 - confidence) / 2
+    return medians[int(tail * (resamples - 1))], medians[int((1 - tail) * (resamples - 1))]
+
+
+def summarize(samples_ns: list, settings: dict | None = None) -> dict:
+    # Nanosecond samples in, seconds out (as every other timing in the results)
+    settings = {**TIMING, **(settings or {})}
+    samples, outliers = reject_outliers(samples_ns, settings["outlier_factor"])
+
+    if len(samples) > 1:
+        percentiles = statistics.quantiles(samples, n=100, method="inclusive")
+        p90, p99, stddev = percentiles[89], percentiles[98], statistics.stdev(samples)
+    else:
+        p90 = p99 = samples[0]
+        stddev = 0
+    # No interval at all rather than a made-up one when bootstrapping is off
+    ci = bootstrap_ci(samples, settings["bootstrap"]) if settings["bootstrap"] else None
+
+    def seconds(value):
+        return round(value / 1e9, 9)
+
+    return {
+        'mean': seconds(statistics.mean(samples)),
+        'median': seconds(statistics.median(samples)),
+        'p90': seconds(p90),
+        'p99': seconds(p99),
+        'stddev': seconds(stddev),
+        'ci95_median': [seconds(ci[0]), seconds(ci[1])] if ci else None,
+        'relative_error': round(relative_error(samples), 6),
+        'samples': len(samples),
+        'outliers': outliers,
+    }
+
+
+def sample(iteration, num_iterations: int = 100, settings: dict | None = None, desc: str | None = None,
+           record=None) -> dict:
+    # `iteration` returns {operation: elapsed ns} and is repeated after the warmup rounds. Without a
+    # target error or a time budget exactly `num_iterations` samples are taken, otherwise sampling goes
+    # on (up to `max_iterations`) until every operation reached the target or the budget ran out.
+    # The raw samples of each operation are returned, and passed to `record` as soon as they are taken.
+    settings = {**TIMING, **(settings or {})}
+    adaptive = settings["target_rel_error"] or settings["time_budget"]
+    limit = settings["max_iterations"] if adaptive else settings["iterations"] or num_iterations
+
+    for _ in range(settings["warmup"]):
+        iteration()
+
+    samples = {}
+    deadline = time.perf_counter() + settings["time_budget"] if settings["time_budget"] else None
+
+    rounds = range(limit)
+    if settings["progress"]:
+        from tqdm import tqdm
+        rounds = tqdm(rounds, desc=desc, unit="iter")
+
+    for i in rounds:
+        times = iteration()
+        if record:
+            record(times)
+        for operation, elapsed in times.items():
+            samples.setdefault(operation, []).append(elapsed)
+
+        if i + 1 < settings["min_iterations"]:
+            continue
+        if deadline and time.perf_counter() >= deadline:
+            break
+        # '<operation>.<resource>' entries (see resources.py) do not take part in the stopping rule
+        if settings["target_rel_error"] and all(relative_error(s) <= settings["target_rel_error"]
+                                                for operation, s in samples.items() if "." not in operation):
+            break
+    return samples
+
+
+def histogram(samples_ns: list, base: float = 2.0) -> dict:
+    # Counts per logarithmic bucket; keys are the bucket upper bounds in seconds
+    counts = {}
+    for value in samples_ns:
+        bucket = base ** math.ceil(math.log(max(value, 1), base))
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return {round(bucket / 1e9, 9): counts[bucket] for bucket in sorted(counts)}
+
+
+class Histogram:
+    # Fixed-size log-linear histogram of nanosecond values (HDR-style): 2^precision linear sub-buckets per power
+    # of two, so every recorded value is known to within 2^-(precision - 1) of itself (< 1.6% with 7 bits) and
+    # the memory stays the same however many values are recorded. Values above `highest` (ns) are clamped.
+    def __init__(self, precision: int = 7, highest: int = 1 << 42):
+        self.precision = precision
+        self.sub_buckets = 1 << precision
+        self.highest = highest
+        self.counts = [0] * (self._index(highest) + 1)
+        self.total = self.sum = 0
+        self.min, self.max = None, 0
+
+    def _index(self, value: int) -> int:
+        if value < self.sub_buckets:
+            return value
+        shift = value.bit_length() - self.precision
+        half = self.sub_buckets >> 1
+        return self.sub_buckets + (shift - 1) * half + (value >> shift) - half
+
+    def _value(self, index: int) -> int:
+        # Middle of the bucket: at most half a bucket away from any value recorded in it
+        if index < self.sub_buckets:
+            return index
+        half = self.sub_buckets >> 1
+        shift, mantissa = divmod(index - self.sub_buckets, half)
+        shift += 1
+        return ((mantissa + half) << shift) + (1 << (shift - 1))
+
+    def record(self, value: int):
+        value = min(max(int(value), 0), self.highest)
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram"):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> int:
+        if not self.total:
+            return 0
+        rank, seen = max(1, math.ceil(q * self.total)), 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        # Seconds, as summarize()
+        def seconds(value):
+            return round(value / 1e9, 9)
+
+        return {
+            'mean': seconds(self.sum / self.total) if self.total else 0.0,
+            'median': seconds(self.quantile(0.5)),
+            'p90': seconds(self.quantile(0.9)),
+            'p99': seconds(self.quantile(0.99)),
+            'p999': seconds(self.quantile(0.999)),
+            'min': seconds(self.min or 0),
+            'max': seconds(self.max),
+            'samples': self.total,
+        }
@@ -0,0 +1,195 @@
+import logging
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+
+import benchmark
+from benchmark import provider_args, LibCryptoError
+from libcrypto import load_libcrypto, load_libssl
+from pki import newkey_args
+from timing import summarize
+
+libssl_path = "/opt/openssl-3.3.2/lib64/libssl.so.3"
+
+CLASSICAL_GROUPS = ["x25519", "P-256"]
+
+# Hybrid groups of oqsprovider, by the PQC KEM they are built on
+HYBRID_GROUPS = {
+    "kyber512": "x25519_kyber512",
+    "kyber768": "x25519_kyber768",
+    "kyber1024": "p521_kyber1024",
+}
+
+
+def tls_groups(kem_algorithms) -> list:
+    # Classical groups, then the PQC KEMs of the algorithms table and their hybrid counterparts
+    pqc = [algo['name'] for algo in kem_algorithms['pqc']]
+    return CLASSICAL_GROUPS + pqc + [HYBRID_GROUPS[name] for name in pqc if name in HYBRID_GROUPS]
+
+
+def _server_provider_args(group: str, signature: str) -> list:
+    if group in CLASSICAL_GROUPS and not provider_args(signature):
+        return []
+    return provider_args(pqc=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def generate_certificate(signature: str, key_size: int | None, workdir: str) -> tuple[str, str]:
+    # Self-signed server certificate, generated once per signature algorithm (not part of the measurement)
+    cert, key = f"{workdir}/{signature}_cert.pem", f"{workdir}/{signature}_key.pem"
+    subprocess.run([
+        benchmark.openssl_path, "req", "-x509",
+        *newkey_args(signature, key_size),
+        "-keyout", key,
+        "-out", cert,
+        "-nodes",
+        "-subj", "/CN=localhost",
+        "-days", "1"
+    ] + provider_args(signature), capture_output=True, check=True)
+    return cert, key
+
+
+def start_servers(count: int, cert: str, key: str, group: str, signature: str) -> tuple[list, list]:
+    # `s_server` handles one connection at a time: one server process per concurrent client
+    ports = [_free_port() for _ in range(count)]
+    servers = [subprocess.Popen([
+        benchmark.openssl_path, "s_server",
+        "-accept", f"127.0.0.1:{port}",
+        "-cert", cert,
+        "-key", key,
+        "-tls1_3",
+        "-groups", group,
+        "-num_tickets", "0",
+        "-www",
+        "-quiet"
+    ] + _server_provider_args(group, signature),
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) for port in ports]
+
+    deadline = time.perf_counter() + 5
+    for server, port in zip(servers, ports):
+        while True:
+            if server.poll() is not None:
+                stop_servers(servers)
+                raise RuntimeError(f"s_server ({group}, {signature}) exited: {server.stderr.read().decode()}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.perf_counter() > deadline:
+                    stop_servers(servers)
+                    raise RuntimeError(f"s_server ({group}, {signature}) did not start on port {port}")
+                time.sleep(0.05)
+    return servers, ports
+
+
+def stop_servers(servers: list):
+    for server in servers:
+        server.terminate()
+    for server in servers:
+        server.wait()
+
+
+def measure_handshakes(ssl, ctx, ports: list, concurrency: int, duration: float) -> dict:
+    latencies, wire = [], []
+    lock = threading.Lock()
+    errors = []
+    deadline = time.perf_counter() + duration
+
+    def client(index: int):
+        port = ports[index % len(ports)]
+        local_latencies, local_wire = [], []
+        try:
+            while time.perf_counter() < deadline:
+                with socket.create_connection(("127.0.0.1", port)) as sock:
+                    start = time.perf_counter_ns()
+                    received, sent = ssl.handshake(ctx, sock.fileno())
+                    local_latencies.append(time.perf_counter_ns() - start)
+                    local_wire.append((received, sent))
+        except (LibCryptoError, OSError) as e:
+            errors.append(e)
+        with lock:
+            latencies.extend(local_latencies)
+            wire.extend(local_wire)
+
+    # The handshake itself runs in libssl without the GIL, so client threads really run concurrently
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if errors or not latencies:
+        raise RuntimeError(f"Handshakes failed: {errors[0] if errors else 'no handshake completed'}")
+
+    received = sum(r for r, _ in wire) / len(wire)
+    sent = sum(s for _, s in wire) / len(wire)
+    return {
+        'handshakes_per_sec': round(len(latencies) / elapsed, 3),
+        'latency': summarize(latencies),
+        'server_to_client_bytes': round(received, 1),
+        'client_to_server_bytes': round(sent, 1),
+        'bytes_per_handshake': round(received + sent, 1),
+    }
+
+
+def run_tls_benchmark(algorithms, groups: list | None = None, signatures: list | None = None,
+                      concurrency_levels: tuple = (1, 4, 16), duration: float = 5.0, matrix: bool = False,
+                      default_group: str = "x25519", default_signature: str = "ecdsa") -> dict:
+    # Loopback TLS 1.3 handshakes between `openssl s_server` and an in-process libssl client.
+    # Without `matrix`, every group is measured with the default certificate and every certificate with the
+    # default group; with `matrix`, every (group, certificate) pair is measured.
+    groups = groups or tls_groups(algorithms["KEM"])
+    key_sizes = {algo['name']: algo.get('key')
+                 for category in ['classical', 'pqc'] for algo in algorithms["SIGNATURE"][category]}
+    signatures = signatures or list(key_sizes)
+    if matrix:
+        pairs = [(group, signature) for group in groups for signature in signatures]
+    else:
+        pairs = [(group, default_signature) for group in groups]
+        pairs += [(default_group, signature) for signature in signatures if signature != default_signature]
+
+    ssl = load_libssl(libssl_path, load_libcrypto(benchmark.libcrypto_path, benchmark.provider_path))
+    workdir = tempfile.mkdtemp(prefix="pqc_tls_")
+    certificates, results = {}, {}
+    try:
+        for group, signature in pairs:
+            name = f"{group}+{signature}"
+            print(f"TLS 1.3 - group {group}, certificate {signature}")
+            ctx = None
+            try:
+                if signature not in certificates:
+                    certificates[signature] = generate_certificate(signature, key_sizes.get(signature), workdir)
+                ctx = ssl.client_context(group)
+
+                results[name] = {'group': group, 'signature': signature, 'concurrency': {}}
+                for concurrency in concurrency_levels:
+                    servers, ports = start_servers(concurrency, *certificates[signature], group, signature)
+                    try:
+                        stats = measure_handshakes(ssl, ctx, ports, concurrency, duration)
+                    finally:
+                        stop_servers(servers)
+
+                    results[name]['concurrency'][concurrency] = stats
+                    print(f"  {concurrency:>3} clients: {stats['handshakes_per_sec']:10.1f} handshakes/s, "
+                          f"median {stats['latency']['median'] * 1e3:.3f} ms, "
+                          f"p99 {stats['latency']['p99'] * 1e3:.3f} ms, {stats['bytes_per_handshake']:.0f} B")
+            except (RuntimeError, LibCryptoError, subprocess.CalledProcessError, OSError) as e:
+                print(f"Error in TLS benchmark for {name}: {e}")
+                logging.error(f"Error in TLS benchmark for {name}: \n{e}")
+                results.pop(name, None)
+            finally:
+                if ctx:
+                    ssl.free_context(ctx)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
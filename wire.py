@@ -0,0 +1,139 @@
+import base64
+
+from registry import family, OPERATIONS
+
+# Link profiles of the cost model: bandwidth (bit/s) and round-trip time (s)
+LINKS = {
+    "datacenter": {"bandwidth": 10e9, "rtt": 0.0005},
+    "broadband": {"bandwidth": 100e6, "rtt": 0.020},
+    "mobile_4g": {"bandwidth": 10e6, "rtt": 0.060},
+    "constrained": {"bandwidth": 250e3, "rtt": 0.300},
+}
+
+
+def pem_to_der(pem: bytes) -> bytes:
+    return base64.b64decode(b"".join(line for line in pem.splitlines() if line and not line.startswith(b"-----")))
+
+
+def _der_element(der: bytes, offset: int) -> tuple[int, int]:
+    # (start, end) of the contents of the DER element at `offset`
+    length, start = der[offset + 1], offset + 2
+    if length & 0x80:
+        count = length & 0x7f
+        length, start = int.from_bytes(der[start:start + count], "big"), start + count
+    return start, start + length
+
+
+def _sequence_field(der: bytes, index: int) -> bytes:
+    # Contents of the `index`-th element of the outer SEQUENCE
+    offset, _ = _der_element(der, 0)
+    for _ in range(index):
+        offset = _der_element(der, offset)[1]
+    start, end = _der_element(der, offset)
+    return der[start:end]
+
+
+def raw_public_key(spki_der: bytes) -> bytes:
+    # SubjectPublicKeyInfo ::= SEQUENCE { algorithm AlgorithmIdentifier, subjectPublicKey BIT STRING }
+    return _sequence_field(spki_der, 1)[1:]  # without the unused-bits octet
+
+
+def raw_private_key(pkcs8_der: bytes, algorithm: str) -> bytes:
+    # PrivateKeyInfo ::= SEQUENCE { version INTEGER, privateKeyAlgorithm AlgorithmIdentifier, privateKey OCTET STRING }
+    # The OCTET STRING holds the key in its algorithm's own format: the raw key for PQC algorithms, an RFC 5915
+    # ECPrivateKey ::= SEQUENCE { version INTEGER, privateKey OCTET STRING, ... } for EC (the raw key is its
+    # scalar) and a PKCS#1 RSAPrivateKey for RSA, which has no raw form
+    key = _sequence_field(pkcs8_der, 2)
+    if family(algorithm) == "ec":
+        return _sequence_field(key, 1)
+    return key
+
+
+def wire_sizes(impl, algorithm: str, key, test: str, message: bytes | None = None, samples: int = 8) -> dict:
+    # Exact sizes of what goes over the wire, in bytes: DER encodings (SubjectPublicKeyInfo, PKCS#8) and raw keys,
+    # ciphertexts and signatures
+    # RSA keys have no raw form: their sizes are those of the PKCS#1 RSAPublicKey / RSAPrivateKey
+    private_der, public_der = (pem_to_der(pem) for pem in impl.export_key(key))
+    encoding = "pkcs1" if family(algorithm) == "rsa" else "raw"
+    sizes = {
+        'public_key': len(public_der),
+        f'public_key_{encoding}': len(raw_public_key(public_der)),
+        'private_key': len(private_der),
+        f'private_key_{encoding}': len(raw_private_key(private_der, algorithm)),
+    }
+
+    if test == "KEM":
+        # ECDH has no ciphertext: the responder sends its own public key back
+        if algorithm == "ecdh":
+            sizes['ciphertext'] = sent_public_key(sizes)
+        else:
+            sizes['ciphertext'] = len(impl.encapsulate(algorithm, key))
+    else:
+        # ECDSA (DER) and Falcon signatures vary in length: the largest of a few is kept
+        sizes['signature'] = max(len(impl.sign(algorithm, key, message)) for _ in range(samples))
+    return sizes
+
+
+def sent_public_key(sizes: dict) -> int:
+    # Public key as sent in an exchange: raw, or PKCS#1 for RSA
+    return sizes['public_key_pkcs1'] if 'public_key_pkcs1' in sizes else sizes['public_key_raw']
+
+
+def compute_time(result: dict, operation: str) -> float:
+    # Time of one operation: start-up corrected for the CLI backend, median otherwise
+    if f"{operation}_corrected_avg" in result:
+        return result[f"{operation}_corrected_avg"]
+    if isinstance(result.get(operation), dict):
+        return result[operation]['median']
+    return result.get(f"{operation}_avg", 0)
+
+
+def exchange(test: str, result: dict, include_public_key: bool = False) -> dict:
+    # Bytes and computation of one exchange:
+    #  - KEM: one round trip, the initiator sends a fresh public key, the responder the ciphertext
+    #  - SIGNATURE: one message, the signature travels with it (and the public key, e.g. in a certificate)
+    sizes = result['wire_sizes']
+    if test == "KEM":
+        return {
+            'bytes': sent_public_key(sizes) + sizes['ciphertext'],
+            'round_trips': 1,
+            'compute': sum(compute_time(result, op) for op in OPERATIONS["KEM"])
+        }
+    return {
+        'bytes': sizes['signature'] + (sizes['public_key'] if include_public_key else 0),
+        'round_trips': 0.5,
+        'compute': sum(compute_time(result, op) for op in OPERATIONS["SIGNATURE"][1:])
+    }
+
+
+def cost_model(results: dict, links: dict | None = None, include_public_key: bool = False) -> dict:
+    # End-to-end latency estimate of a KEM handshake or a signed message on each link:
+    # propagation (round trips * RTT) + transmission (bytes / bandwidth) + computation.
+    # No framing, congestion window or loss: a lower bound that shows where the bytes start to dominate.
+    links = links or LINKS
+    model = {}
+    for test, algorithms in results.items():
+        for algorithm, result in algorithms.items():
+            if 'wire_sizes' not in result:
+                continue
+
+            cost = exchange(test, result, include_public_key)
+            model.setdefault(test, {})[algorithm] = {'bytes': cost['bytes'], 'compute': round(cost['compute'], 7)}
+            for link, profile in links.items():
+                transmission = cost['bytes'] * 8 / profile['bandwidth']
+                propagation = cost['round_trips'] * profile['rtt']
+                model[test][algorithm][link] = {
+                    'transmission': round(transmission, 7),
+                    'latency': round(propagation + transmission + cost['compute'], 7)
+                }
+    return model
+
+
+def print_cost_model(model: dict, links: dict | None = None):
+    links = links or LINKS
+    for test, algorithms in model.items():
+        print(f"\n{test} - estimated latency per {'handshake' if test == 'KEM' else 'message'} (ms)")
+        print(f"{'algorithm':<24} {'bytes':>8} {'compute':>9} " + " ".join(f"{link:>12}" for link in links))
+        for algorithm, cost in algorithms.items():
+            print(f"{algorithm:<24} {cost['bytes']:>8} {cost['compute'] * 1e3:>9.3f} "
+                  + " ".join(f"{cost[link]['latency'] * 1e3:>12.3f}" for link in links))